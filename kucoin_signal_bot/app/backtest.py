@@ -0,0 +1,252 @@
+# Historical replay of the live rule set.
+#   python backtest.py --data /share/klines [--symbols BTC-USDT,ETH-USDT] [--workers 4]
+# Klines are read from <data>/<SYMBOL>_<tf>.json (raw KuCoin `data` array) or
+# .csv (KuCoin column order: time, open, close, high, low, volume[, turnover]).
+# Every closed 5m bar is walked through should_signal_np -> make_sl_tp ->
+# adjust_tps with the live cooldown; trades are then simulated on the
+# following 5m bars with taker fees and spread.
+import argparse, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import yaml
+from features import ohlcv_array
+from indicators import IndicatorState, indicator_params
+from kucoin_client import TF_SECONDS
+from rules import should_signal_np, adjust_tps, tail_rows
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_klines(data_dir: str, symbol: str, tf: str) -> np.ndarray:
+    base = os.path.join(data_dir, f"{symbol}_{tf}")
+    if os.path.exists(base + ".json"):
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if isinstance(raw, dict):
+            raw = raw.get("data", [])
+        return ohlcv_array(raw)
+    if os.path.exists(base + ".csv"):
+        arr = np.loadtxt(base + ".csv", delimiter=",", dtype=np.float64, ndmin=2,
+                         comments="#", skiprows=_header_rows(base + ".csv"))
+        return ohlcv_array(arr[:, :6].tolist()) if len(arr) else ohlcv_array([])
+    raise FileNotFoundError(base)
+
+def _header_rows(path: str) -> int:
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline().split(",")[0].strip()
+    try:
+        float(first)
+        return 0
+    except ValueError:
+        return 1
+
+def list_symbols(data_dir: str) -> List[str]:
+    syms = set()
+    for name in os.listdir(data_dir):
+        stem, ext = os.path.splitext(name)
+        if ext in (".json", ".csv") and stem.endswith("_5m"):
+            syms.add(stem[:-3])
+    return sorted(syms)
+
+def _closed_index(t_open: np.ndarray, step: int, t_close: np.ndarray) -> np.ndarray:
+    # index of the last higher-timeframe bar fully closed at each 5m close
+    return np.searchsorted(t_open + step, t_close, side="right") - 1
+
+def _window(st: IndicatorState, rows: np.ndarray, win: int, lag: int = 0) -> Dict[str, np.ndarray]:
+    # indicator columns `lag` bars before each row, on the live candle window
+    # ending at that row (the window start does not move with the lag)
+    rows = np.asarray(rows, dtype=np.int64)
+    s = np.maximum(rows - win + 1, 0)
+    return st.anchored(np.maximum(rows - lag, s), s)
+
+def _bias_mask(rsi: np.ndarray, e20: np.ndarray, e50: np.ndarray, c15: np.ndarray, e200_15: np.ndarray,
+               opts: Dict[str, Any]) -> np.ndarray:
+    # bias_ok for every bar at once (inputs already aligned to the 5m bars)
+    low_rsi = rsi < int(opts.get("bias_rsi_min", 50))
+    if bool(opts.get("bias_allow_price_above_ema200_15m", True)):
+        alt = c15 >= e200_15
+    else:
+        alt = np.zeros(len(rsi), dtype=bool)
+    order = (e20 >= e50) if bool(opts.get("bias_need_ema_order", True)) else np.ones(len(rsi), dtype=bool)
+    return np.where(low_rsi, alt, order)
+
+def _anti_noise_mask(c: np.ndarray, o: np.ndarray, atr: np.ndarray, e200: np.ndarray,
+                     opts: Dict[str, Any]) -> np.ndarray:
+    atr = np.nan_to_num(atr, nan=0.0)
+    body_bad = (atr > 0) & (np.abs(c - o) > float(opts.get("breakout_body_max_atr_mult", 1.8)) * atr)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dist = np.abs(c - e200) / e200 * 100
+    near = (e200 > 0) & (dist < float(opts.get("ema200_5m_min_distance_pct", 0.2)))
+    return ~body_bad & ~near
+
+def _prefilter(w5: Dict[str, np.ndarray], w15: Dict[str, np.ndarray], w1h: Dict[str, np.ndarray],
+               opts: Dict[str, Any]) -> np.ndarray:
+    # bias_ok and anti_noise_checks evaluated for every 5m bar at once (inputs
+    # are _window columns aligned to the 5m bars); same comparisons (and NaN
+    # behaviour) as the scalar rules, so only bars that can still signal are
+    # handed to should_signal_np
+    bias = _bias_mask(w1h["rsi"], w1h["ema20"], w1h["ema50"], w15["close"], w15["ema200"], opts)
+    return bias & _anti_noise_mask(w5["close"], w5["open"], w5["atr"], w5["ema200"], opts)
+
+def simulate_trade(bars5: np.ndarray, i: int, entry: float, sl: float, tps: List[float],
+                   opts: Dict[str, Any], spread_bps: float, max_hold: int) -> Dict[str, Any]:
+    # equal thirds at each TP, remainder at SL or at the close of the last held bar;
+    # a bar touching both SL and a TP counts as SL first
+    fee = int(opts.get("taker_fee_bps", 10)) / 10000.0
+    half_spread = spread_bps / 20000.0
+    fill = entry * (1 + half_spread)
+    parts = len(tps)
+    hit = [False] * parts
+    exit_px: List[float] = []
+    outcome = "timeout"
+    end = min(len(bars5), i + 1 + max_hold)
+    for j in range(i + 1, end):
+        lo, hi = bars5[j, 4], bars5[j, 3]
+        if lo <= sl:
+            exit_px += [sl] * (parts - len(exit_px))
+            outcome = "sl"
+            break
+        for k, tp in enumerate(tps):
+            if not hit[k] and hi >= tp:
+                hit[k] = True
+                exit_px.append(tp)
+        if all(hit):
+            outcome = "tp"
+            break
+    else:
+        last = bars5[end - 1, 2] if end > i + 1 else entry
+        exit_px += [last] * (parts - len(exit_px))
+    ret = float(np.mean([(px * (1 - half_spread)) / fill - 1 for px in exit_px])) - 2 * fee
+    return {"hits": hit, "outcome": outcome, "ret": ret, "bars_held": j - i if end > i + 1 else 0}
+
+def backtest_symbol(symbol: str, data_dir: str, cfg: Dict[str, Any], opts: Dict[str, Any],
+                    start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Any]:
+    tfs = cfg["timeframes"]
+    b5 = load_klines(data_dir, symbol, tfs["trigger_tf"])
+    b15 = load_klines(data_dir, symbol, tfs["setup_tf"])
+    b1h = load_klines(data_dir, symbol, tfs["bias_tf"])
+    res = {"symbol": symbol, "bars": len(b5), "evaluated": 0, "candidates": 0, "signals": 0, "trades": []}
+    if min(len(b5), len(b15), len(b1h)) < 30:
+        return res
+    # indicator carries once over the whole history; every bar reads them
+    # re-seeded at the start of the candle window the live bot would hold
+    params = indicator_params(opts)
+    st5, st15, st1h = (IndicatorState(params, b, len(b)) for b in (b5, b15, b1h))
+    win = int(opts.get("candle_window", 300))
+
+    step5 = TF_SECONDS.get(tfs["trigger_tf"], 300)
+    t_close = b5[:, 0] + step5
+    i15 = _closed_index(b15[:, 0], TF_SECONDS.get(tfs["setup_tf"], 900), t_close)
+    i1h = _closed_index(b1h[:, 0], TF_SECONDS.get(tfs["bias_tf"], 3600), t_close)
+
+    k5, k15, k1h = tail_rows(opts)
+    cooldown = int(opts.get("cooldown_minutes", 20)) * 60
+    min_conf = max(3, int(opts.get("min_confirms", 3)))
+    spread_bps = float(opts.get("backtest_spread_bps", opts.get("roundtrip_extra_buffer_bps", 5)))
+    max_hold = int(opts.get("backtest_max_hold_bars", 288))
+    last_ts, last_conf = -1e18, 0
+
+    live = (i15 >= 20) & (i1h >= 1) & (np.arange(len(b5)) >= k5)
+    if start:
+        live &= t_close >= start
+    if end:
+        live &= t_close <= end
+    res["evaluated"] = int(live.sum())
+    a = np.clip(i15, 0, None); b = np.clip(i1h, 0, None)
+    cand = live & _prefilter(_window(st5, np.arange(len(b5)), win), _window(st15, a, win),
+                             _window(st1h, b, win), opts)
+    res["candidates"] = int(cand.sum())
+
+    for i in np.flatnonzero(cand):
+        t5 = st5.columns(win, k5, end=i + 1)
+        t15 = st15.columns(win, k15, end=int(i15[i]) + 1); t1h = st1h.columns(win, k1h, end=int(i1h[i]) + 1)
+        r = should_signal_np(t1h, t15, t5, cfg, opts, bias=True)
+        if not r.get("ok"):
+            continue
+        confirms = int(r["confirms"])
+        if confirms < min_conf:
+            continue
+        now = t_close[i]
+        if not (now - last_ts >= cooldown or confirms > last_conf):
+            continue
+        last_ts, last_conf = now, confirms
+        entry = float(r["entry"])
+        tps = adjust_tps(entry, cfg["exits"]["tp_levels_pct"], opts, spread_bps)
+        tr = simulate_trade(b5, i, entry, float(r["sl"]), tps, opts, spread_bps, max_hold)
+        tr.update({"symbol": symbol, "time": int(b5[i, 0]), "confirms": confirms, "entry": entry,
+                   "sl": float(r["sl"]), "tps": tps})
+        res["trades"].append(tr)
+        res["signals"] += 1
+    return res
+
+def summarize(results: List[Dict[str, Any]], n_tps: int) -> Dict[str, Any]:
+    trades = [t for r in results for t in r["trades"]]
+    n = len(trades)
+    out = {"symbols": len(results), "bars": sum(r["bars"] for r in results),
+           "evaluated": sum(r["evaluated"] for r in results),
+           "candidates": sum(r.get("candidates", 0) for r in results), "signals": n}
+    if not n:
+        return out
+    rets = np.array([t["ret"] for t in trades])
+    for k in range(n_tps):
+        out[f"tp{k+1}_hit_rate"] = round(sum(t["hits"][k] for t in trades) / n, 4)
+    out["sl_rate"] = round(sum(t["outcome"] == "sl" for t in trades) / n, 4)
+    out["timeout_rate"] = round(sum(t["outcome"] == "timeout" for t in trades) / n, 4)
+    out["expectancy_pct"] = round(float(rets.mean()) * 100, 4)
+    out["win_rate"] = round(float((rets > 0).mean()), 4)
+    out["by_confirms"] = {c: sum(t["confirms"] == c for t in trades) for c in sorted({t["confirms"] for t in trades})}
+    return out
+
+def _run_one(args):
+    return backtest_symbol(*args)
+
+def load_cfg_opts(options_path: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    with open(os.path.join(APP_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    opts: Dict[str, Any] = {}
+    addon = os.path.join(APP_DIR, "..", "config.json")
+    if os.path.exists(addon):
+        with open(addon, "r", encoding="utf-8") as f:
+            opts.update(json.load(f).get("options", {}))
+    if options_path:
+        with open(options_path, "r", encoding="utf-8") as f:
+            over = json.load(f)
+        opts.update(over)
+        # the live bot takes TP levels from config.yaml; let an override file tune them
+        if over.get("tp_levels_pct"):
+            cfg["exits"]["tp_levels_pct"] = list(over["tp_levels_pct"])
+    return cfg, opts
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay stored klines through the signal rules")
+    ap.add_argument("--data", required=True, help="directory with <SYMBOL>_<tf>.json|csv files")
+    ap.add_argument("--symbols", default="", help="comma separated; default: every symbol with 5m data")
+    ap.add_argument("--options", default="", help="JSON file with option overrides")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--start", type=int, default=0, help="unix seconds")
+    ap.add_argument("--end", type=int, default=0, help="unix seconds")
+    ap.add_argument("--trades", default="", help="write every simulated trade to this CSV")
+    a = ap.parse_args()
+
+    cfg, opts = load_cfg_opts(a.options)
+    symbols = [s for s in a.symbols.split(",") if s] or list_symbols(a.data)
+    t0 = time.time()
+    jobs = [(s, a.data, cfg, opts, a.start or None, a.end or None) for s in symbols]
+    if a.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=a.workers) as ex:
+            results = list(ex.map(_run_one, jobs))
+    else:
+        results = [_run_one(j) for j in jobs]
+    summary = summarize(results, len(cfg["exits"]["tp_levels_pct"]))
+    summary["wall_sec"] = round(time.time() - t0, 2)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if a.trades:
+        rows = [{k: v for k, v in t.items() if k not in ("hits", "tps")} |
+                {f"tp{k+1}": px for k, px in enumerate(t["tps"])} |
+                {f"tp{k+1}_hit": h for k, h in enumerate(t["hits"])}
+                for r in results for t in r["trades"]]
+        pd.DataFrame(rows).to_csv(a.trades, index=False)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import asyncio, os, time
+from typing import Dict, Tuple, Optional, Iterable, List
+import numpy as np
+from kucoin_client import KucoinClient, TF_SECONDS
+from features import ohlcv_array, resample_bars
+
+# Rolling per-(symbol, timeframe) window of the last `maxlen` bars. The first
+# request for a key backfills the window; later ones ask KuCoin only for bars
+# from the last stored open time on, so the forming bar is replaced in place.
+# With `path` set, windows are persisted as one .npy file per key and mapped
+# back on startup, so a restart only fetches the gap since the last flush.
+# With `base_tf` set, coarser timeframes that are a multiple of it are only
+# fetched once to seed their window; after that every base merge rebuilds
+# their forming bar locally, so a refresh costs one base request per symbol
+# (shared by concurrent callers and reused for `base_fresh_sec`).
+class CandleStore:
+    def __init__(self, ku: KucoinClient, maxlen: int = 300, path: Optional[str] = None,
+                 base_tf: Optional[str] = None, base_fresh_sec: float = 2.0):
+        self.ku = ku
+        self.maxlen = maxlen
+        self.path = path or None
+        self.base_tf = base_tf if base_tf in TF_SECONDS else None
+        self.base_fresh_sec = base_fresh_sec
+        self._bars: Dict[Tuple[str, str], np.ndarray] = {}
+        self._dirty: set = set()
+        self._base_ts: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"backfills": 0, "incremental": 0, "bars_received": 0, "loaded": 0, "flushed": 0,
+                      "derived": 0, "base_reused": 0}
+
+    def derives(self, tf: str) -> bool:
+        # tf is built from the base series instead of being fetched
+        if not self.base_tf or tf == self.base_tf or tf not in TF_SECONDS:
+            return False
+        step, base = TF_SECONDS[tf], TF_SECONDS[self.base_tf]
+        return step > base and step % base == 0
+
+    def get(self, symbol: str, tf: str) -> Optional[np.ndarray]:
+        return self._bars.get((symbol, tf))
+
+    def merge(self, symbol: str, tf: str, rows: np.ndarray) -> np.ndarray:
+        key = (symbol, tf)
+        old = self._bars.get(key)
+        if len(rows) == 0:
+            return old if old is not None else rows
+        if old is not None and len(old):
+            old = old[old[:, 0] < rows[0, 0]]
+            rows = np.concatenate([old, rows]) if len(old) else rows
+        bars = rows[-self.maxlen:]
+        self._bars[key] = bars
+        self._dirty.add(key)
+        if tf == self.base_tf:
+            for dtf in TF_SECONDS:
+                if (symbol, dtf) in self._bars and self.derives(dtf):
+                    self._derive(symbol, dtf)
+        return bars
+
+    def _derive(self, symbol: str, tf: str) -> Optional[np.ndarray]:
+        # rebuild tf from its last (forming) bar on; None when the base window
+        # no longer reaches back to that bar's open
+        bars = self._bars.get((symbol, tf)); base = self._bars.get((symbol, self.base_tf))
+        if bars is None or not len(bars) or base is None or not len(base) or base[0, 0] > bars[-1, 0]:
+            return None
+        rows = resample_bars(base[base[:, 0] >= bars[-1, 0]], TF_SECONDS[tf], keep_head=True)
+        self.stats["derived"] += 1
+        return self.merge(symbol, tf, rows)
+
+    async def _update_base(self, symbol: str) -> np.ndarray:
+        key = (symbol, self.base_tf)
+        fut = self._inflight.get(symbol)
+        if fut is not None:
+            self.stats["base_reused"] += 1
+            return await fut
+        if key in self._bars and time.monotonic() - self._base_ts.get(symbol, 0.0) < self.base_fresh_sec:
+            self.stats["base_reused"] += 1
+            return self._bars[key]
+        fut = self._inflight[symbol] = asyncio.ensure_future(self._fetch(symbol, self.base_tf))
+        try:
+            bars = await fut
+            self._base_ts[symbol] = time.monotonic()
+            return bars
+        finally:
+            self._inflight.pop(symbol, None)
+
+    async def update(self, symbol: str, tf: str) -> np.ndarray:
+        if self.base_tf:
+            if tf == self.base_tf:
+                return await self._update_base(symbol)
+            if self.derives(tf):
+                await self._update_base(symbol)
+                bars = self._derive(symbol, tf)
+                if bars is not None:
+                    return bars
+                # first use or a gap: seed the window from the exchange, then
+                # lay the (possibly newer) base bars over its tail
+                bars = await self._fetch(symbol, tf)
+                derived = self._derive(symbol, tf)
+                return derived if derived is not None else bars
+        return await self._fetch(symbol, tf)
+
+    async def _fetch(self, symbol: str, tf: str) -> np.ndarray:
+        bars = self._bars.get((symbol, tf))
+        step = TF_SECONDS.get(tf, 60)
+        now = int(time.time())
+        if bars is None or not len(bars) or now - bars[-1, 0] > (self.maxlen - 1) * step:
+            kl = await self.ku.fetch_candles(symbol, tf=tf, limit=self.maxlen)
+            self._bars.pop((symbol, tf), None)
+            self.stats["backfills"] += 1
+        else:
+            kl = await self.ku.fetch_candles(symbol, tf=tf, limit=self.maxlen,
+                                             start_at=int(bars[-1, 0]), end_at=now + step)
+            self.stats["incremental"] += 1
+        self.stats["bars_received"] += len(kl)
+        return self.merge(symbol, tf, ohlcv_array(kl))
+
+    def retain(self, symbols: Iterable[str]):
+        keep = set(symbols)
+        for key in [k for k in self._bars if k[0] not in keep]:
+            self._drop(key)
+
+    def _drop(self, key: Tuple[str, str]):
+        del self._bars[key]
+        self._dirty.discard(key)
+        if key[1] == self.base_tf:
+            self._base_ts.pop(key[0], None)
+        if self.path:
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+
+    def _file(self, key: Tuple[str, str]) -> str:
+        return os.path.join(self.path, f"{key[0]}__{key[1]}.npy")
+
+    def load(self) -> int:
+        # map every stored window; only the tail past its last bar is fetched later
+        if not self.path or not os.path.isdir(self.path):
+            return 0
+        for name in os.listdir(self.path):
+            stem, ext = os.path.splitext(name)
+            if ext != ".npy" or "__" not in stem:
+                continue
+            sym, tf = stem.rsplit("__", 1)
+            try:
+                arr = np.load(os.path.join(self.path, name), mmap_mode="r")
+            except Exception:
+                continue
+            if arr.ndim == 2 and arr.shape[1] == 6 and len(arr):
+                self._bars[(sym, tf)] = arr[-self.maxlen:]
+                self.stats["loaded"] += 1
+        return self.stats["loaded"]
+
+    def _write(self, items: List[Tuple[Tuple[str, str], np.ndarray]]):
+        os.makedirs(self.path, exist_ok=True)
+        for key, bars in items:
+            fn = self._file(key); tmp = fn + ".tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    np.save(f, np.ascontiguousarray(bars, dtype=np.float64))
+                os.replace(tmp, fn)
+                self.stats["flushed"] += 1
+            except OSError:
+                pass
+
+    async def flush(self):
+        # windows are replaced, never mutated, so the snapshot can be written off-loop
+        if not self.path or not self._dirty:
+            return
+        items = [(k, self._bars[k]) for k in self._dirty if k in self._bars]
+        self._dirty.clear()
+        await asyncio.to_thread(self._write, items)
+
+    def __len__(self):
+        return len(self._bars)
@@ -0,0 +1,68 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Dict, Any, List, Tuple, Optional
+import numpy as np
+
+# Offloads per-symbol indicator + rule evaluation to worker processes. The
+# three candle arrays of a symbol travel in one shared-memory block; only
+# its name, the row counts and the (small) result dict are pickled.
+
+def _evaluate_shm(name: str, rows: Tuple[int, int, int], cfg: Dict[str, Any], opts: Dict[str, Any],
+                  bias: Optional[bool] = None) -> Dict[str, Any]:
+    from features import bars_df, add_indicators
+    from rules import should_signal, should_signal_np, tail_rows, frame_tail
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # one memcpy out of the block, so no view outlives shm.close()
+        data = np.array(np.ndarray((sum(rows), 6), dtype=np.float64, buffer=shm.buf))
+    finally:
+        shm.close()
+    frames, off = [], 0
+    for n in rows:
+        frames.append(add_indicators(bars_df(data[off:off+n]), opts))
+        off += n
+    df5, df15, df1h = frames
+    if bool(opts.get("numpy_rules", True)):
+        k5, k15, k1h = tail_rows(opts)
+        res = should_signal_np(frame_tail(df1h, k1h), frame_tail(df15, k15), frame_tail(df5, k5), cfg, opts, bias=bias)
+    else:
+        res = should_signal(df1h, df15, df5, cfg, opts, bias=bias)
+    return {k: (float(v) if isinstance(v, np.floating) else v) for k, v in res.items()}
+
+def _warmup() -> bool:
+    import features, rules
+    return True
+
+class EvalPool:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._ex = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        self.stats = {"submitted": 0, "failed": 0}
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._ex, _warmup) for _ in range(self.workers)))
+
+    async def evaluate(self, bars5: np.ndarray, bars15: np.ndarray, bars1h: np.ndarray,
+                       cfg: Dict[str, Any], opts: Dict[str, Any], bias: Optional[bool] = None) -> Dict[str, Any]:
+        parts: List[np.ndarray] = [bars5, bars15, bars1h]
+        rows = tuple(len(b) for b in parts)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(rows)) * 6 * 8)
+        try:
+            buf = np.ndarray((sum(rows), 6), dtype=np.float64, buffer=shm.buf)
+            if sum(rows):
+                np.concatenate(parts, out=buf)
+            del buf
+            self.stats["submitted"] += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._ex, _evaluate_shm, shm.name, rows, cfg, opts, bias)
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        self._ex.shutdown(wait=False, cancel_futures=True)
@@ -5,17 +5,54 @@ from ta.trend import EMAIndicator, MACD
 from ta.momentum import RSIIndicator
 from ta.volatility import AverageTrueRange
 
-def ohlcv_df(klines: List[List[Any]]) -> pd.DataFrame:
+OHLCV_COLS = ("time", "open", "close", "high", "low", "volume")
+
+def ohlcv_array(klines: List[List[Any]]) -> np.ndarray:
+    # raw KuCoin klines (strings, kline column order) -> float64 array, oldest first
     if not klines:
+        return np.empty((0, len(OHLCV_COLS)), dtype=np.float64)
+    try:
+        arr = np.array(klines, dtype=np.float64)[:, :len(OHLCV_COLS)]
+    except ValueError:
+        # ragged rows: fall back to trimming each one
+        arr = np.array([k[:len(OHLCV_COLS)] for k in klines], dtype=np.float64)
+    t = arr[:, 0]
+    if len(t) > 1 and not (t[1:] >= t[:-1]).all():
+        arr = arr[np.argsort(t, kind="stable")]
+    return arr
+
+def resample_bars(bars: np.ndarray, step: int, keep_head: bool = False) -> np.ndarray:
+    # aggregate ohlcv_array rows into `step`-second bars aligned like KuCoin's
+    # (UTC epoch multiples). The last bucket is the forming bar, built from
+    # whatever base bars it has so far. A first bucket that starts before the
+    # base data does is incomplete and dropped, unless keep_head says the
+    # caller knows the rows begin at a bucket boundary.
+    if bars is None or not len(bars):
+        return np.empty((0, len(OHLCV_COLS)), dtype=np.float64)
+    bucket = bars[:, 0] // step * step
+    starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+    ends = np.concatenate([starts[1:], [len(bars)]]) - 1
+    out = np.empty((len(starts), len(OHLCV_COLS)), dtype=np.float64)
+    out[:, 0] = bucket[starts]
+    out[:, 1] = bars[starts, 1]
+    out[:, 2] = bars[ends, 2]
+    out[:, 3] = np.maximum.reduceat(bars[:, 3], starts)
+    out[:, 4] = np.minimum.reduceat(bars[:, 4], starts)
+    out[:, 5] = np.add.reduceat(bars[:, 5], starts)
+    if not keep_head and bars[0, 0] > out[0, 0]:
+        out = out[1:]
+    return out
+
+def ohlcv_df(klines: List[List[Any]]) -> pd.DataFrame:
+    return bars_df(ohlcv_array(klines))
+
+def bars_df(bars: np.ndarray) -> pd.DataFrame:
+    # bars: ohlcv_array layout; KuCoin kline times are in seconds
+    if bars is None or not len(bars):
         return pd.DataFrame(columns=["time","open","high","low","close","volume"])
-    rows = []
-    for k in klines:
-        t = int(float(k[0]))
-        rows.append({"time": pd.to_datetime(t, unit="ms"),
-                     "open": float(k[1]), "close": float(k[2]),
-                     "high": float(k[3]), "low": float(k[4]),
-                     "volume": float(k[5])})
-    return pd.DataFrame(rows).sort_values("time").reset_index(drop=True)
+    df = pd.DataFrame(bars[:, [1, 3, 4, 2, 5]], columns=["open","high","low","close","volume"])
+    df.insert(0, "time", bars[:, 0].astype("int64").astype("datetime64[s]"))
+    return df
 
 def add_indicators(df: pd.DataFrame, opts: Dict[str, Any]) -> pd.DataFrame:
     if df.empty:
@@ -0,0 +1,244 @@
+from typing import Dict, Any, Tuple, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+# Streaming counterpart of features.add_indicators. Each (symbol, timeframe,
+# params) key keeps the recursive carries of EMA/MACD/RSI/ATR per bar plus
+# running VWAP sums, so appending a bar or revising the forming one is O(1).
+# The carries run over the whole history seen since the cold start; reads
+# re-seed them at the first bar of the candle window (anchored()), so values
+# match the `ta` batch output over that window, as add_indicators computes it
+# on the fetched candles. backtest/optimize read the same window basis.
+
+ATR_LEN = 14
+
+def indicator_params(opts: Dict[str, Any]) -> Tuple:
+    efast = int(opts.get("ema_fast",20)); emid = int(opts.get("ema_mid",50)); eslow = int(opts.get("ema_slow",200))
+    return ((efast, emid, eslow),
+            (int(opts.get("macd_fast",12)), int(opts.get("macd_slow",26)), int(opts.get("macd_signal",9))),
+            int(opts.get("rsi_length",14)))
+
+def _alpha_span(span: int) -> float:
+    # pandas converts span/alpha to a centre of mass and back; do the same
+    return 1.0 / (1.0 + (span - 1) / 2.0)
+
+def _alpha_wilder(window: int) -> float:
+    a = 1.0 / window
+    return 1.0 / (1.0 + (1.0 - a) / a)
+
+def _ewm_raw(x: np.ndarray, alpha: float) -> np.ndarray:
+    return pd.Series(x).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def _ewm_step(prev: float, x: float, alpha: float) -> float:
+    # one step of pandas' adjust=False ewm_mean recursion
+    if prev != prev:
+        return x
+    if x != x or prev == x:
+        return prev
+    f = 1.0 - alpha
+    return (f * prev + alpha * x) / (f + alpha)
+
+class IndicatorState:
+    def __init__(self, params: Tuple, bars: np.ndarray, maxlen: int):
+        self.params = params
+        self.emas = tuple(sorted(set(params[0]) | {20, 50, 200}))
+        self.mfast, self.mslow, self.msign = params[1]
+        self.rsi_len = params[2]
+        self.m0 = max(self.mfast, self.mslow) - 1
+        self.keep = maxlen + 1
+        self.cap = 2 * self.keep
+        self.base = 0
+        self.n = 0
+        names = ["t", "o", "h", "l", "c", "v", "tr", "atr", "up", "dn", "nu", "nd", "ntr", "mf", "ms", "sig", "cpv", "cv"]
+        names += [f"e{p}" for p in self.emas]
+        self.a: Dict[str, np.ndarray] = {k: np.full(self.cap, np.nan) for k in names}
+        self._cold(bars)
+
+    def _cold(self, bars: np.ndarray):
+        n = min(len(bars), self.cap)
+        bars = bars[-n:]
+        a = self.a
+        a["t"][:n] = bars[:, 0]; a["o"][:n] = bars[:, 1]; a["c"][:n] = bars[:, 2]
+        a["h"][:n] = bars[:, 3]; a["l"][:n] = bars[:, 4]; a["v"][:n] = bars[:, 5]
+        c = bars[:, 2]; h = bars[:, 3]; l = bars[:, 4]; v = bars[:, 5]
+        for p in self.emas:
+            a[f"e{p}"][:n] = _ewm_raw(c, _alpha_span(p))
+        mf = _ewm_raw(c, _alpha_span(self.mfast)); ms = _ewm_raw(c, _alpha_span(self.mslow))
+        a["mf"][:n] = mf; a["ms"][:n] = ms
+        macd = mf - ms; macd[:self.m0] = np.nan
+        a["sig"][:n] = _ewm_raw(macd, _alpha_span(self.msign))
+        diff = np.diff(c, prepend=np.nan)
+        up = np.where(diff > 0, diff, 0.0); dn = np.where(diff < 0, -diff, 0.0)
+        a["up"][:n] = _ewm_raw(up, _alpha_wilder(self.rsi_len))
+        a["dn"][:n] = _ewm_raw(dn, _alpha_wilder(self.rsi_len))
+        a["nu"][:n] = np.cumsum(diff > 0); a["nd"][:n] = np.cumsum(diff < 0)
+        pc = np.concatenate([[np.nan], c[:-1]])
+        tr = np.fmax(h - l, np.fmax(np.abs(h - pc), np.abs(l - pc)))
+        a["tr"][:n] = tr; a["ntr"][:n] = np.cumsum(tr > 0)
+        atr = np.zeros(n)
+        if n >= ATR_LEN:
+            atr[ATR_LEN-1] = pd.Series(tr[:ATR_LEN]).mean()
+            for i in range(ATR_LEN, n):
+                atr[i] = (atr[i-1] * (ATR_LEN - 1) + tr[i]) / float(ATR_LEN)
+        a["atr"][:n] = atr
+        a["cpv"][:n] = np.cumsum(c * v); a["cv"][:n] = np.cumsum(v)
+        self.n = n
+
+    def _step(self, i: int, bar: np.ndarray):
+        # recompute row i from the carries of row i-1
+        a = self.a; k = self.base + i
+        t, o, c, h, l, v = bar[0], bar[1], bar[2], bar[3], bar[4], bar[5]
+        a["t"][i] = t; a["o"][i] = o; a["c"][i] = c; a["h"][i] = h; a["l"][i] = l; a["v"][i] = v
+        pc = a["c"][i-1]
+        for p in self.emas:
+            e = a[f"e{p}"]; e[i] = _ewm_step(e[i-1], c, _alpha_span(p))
+        mf = _ewm_step(a["mf"][i-1], c, _alpha_span(self.mfast)); a["mf"][i] = mf
+        ms = _ewm_step(a["ms"][i-1], c, _alpha_span(self.mslow)); a["ms"][i] = ms
+        macd = mf - ms if k >= self.m0 else np.nan
+        a["sig"][i] = _ewm_step(a["sig"][i-1], macd, _alpha_span(self.msign))
+        d = c - pc
+        aw = _alpha_wilder(self.rsi_len)
+        a["up"][i] = _ewm_step(a["up"][i-1], d if d > 0 else 0.0, aw)
+        a["dn"][i] = _ewm_step(a["dn"][i-1], -d if d < 0 else 0.0, aw)
+        a["nu"][i] = a["nu"][i-1] + (d > 0); a["nd"][i] = a["nd"][i-1] + (d < 0)
+        tr = max(h - l, abs(h - pc), abs(l - pc)); a["tr"][i] = tr
+        a["ntr"][i] = a["ntr"][i-1] + (tr > 0)
+        if k == ATR_LEN - 1:
+            a["atr"][i] = pd.Series(a["tr"][i-k:i+1]).mean()
+        elif k >= ATR_LEN:
+            a["atr"][i] = (a["atr"][i-1] * (ATR_LEN - 1) + tr) / float(ATR_LEN)
+        else:
+            a["atr"][i] = 0.0
+        a["cpv"][i] = a["cpv"][i-1] + c * v; a["cv"][i] = a["cv"][i-1] + v
+
+    def _compact(self):
+        drop = self.n - self.keep
+        for arr in self.a.values():
+            arr[:self.keep] = arr[drop:self.n]
+        self.base += drop
+        self.n = self.keep
+
+    def update(self, bars: np.ndarray) -> bool:
+        # False means the new window does not continue this state: cold start
+        if self.n < 2 or not len(bars):
+            return False
+        t_last = self.a["t"][self.n-1]
+        k = int(np.searchsorted(bars[:, 0], t_last))
+        if k >= len(bars) or bars[k, 0] != t_last:
+            return False
+        i = self.n - 1
+        if not (bars[k, 1:6] == np.array([self.a["o"][i], self.a["c"][i], self.a["h"][i], self.a["l"][i], self.a["v"][i]])).all():
+            self._step(i, bars[k])
+        for bar in bars[k+1:]:
+            if self.n == self.cap:
+                self._compact()
+            self._step(self.n, bar)
+            self.n += 1
+        return True
+
+    def anchored(self, rows: np.ndarray, starts) -> Dict[str, np.ndarray]:
+        # indicator columns at `rows` as if the batch had started at `starts`
+        # (state row indices, starts <= rows). Every recursion is linear in
+        # its seed, so the window value is the carried value minus the decayed
+        # difference between the carried seed and the window's own seed.
+        a = self.a
+        r = np.asarray(rows, dtype=np.int64)
+        w = np.broadcast_to(np.asarray(starts, dtype=np.int64), r.shape)
+        d = r - w
+        c = a["c"]; cw = c[w]
+        out = {"t": a["t"][r], "open": a["o"][r], "high": a["h"][r], "low": a["l"][r],
+               "close": c[r], "volume": a["v"][r]}
+        def ewm(x, span):
+            return x[r] - (1.0 - _alpha_span(span)) ** d * (x[w] - cw)
+        def first(x, p):
+            return np.where(d < p, np.nan, x)
+        for p in self.emas:
+            out[f"ema{p}"] = first(ewm(a[f"e{p}"], p), p - 1)
+        macd = first(ewm(a["mf"], self.mfast) - ewm(a["ms"], self.mslow), self.m0)
+        # the signal line starts at the window's first MACD value and is fed
+        # the window MACD, whose offset from the carried one decays per leg
+        ag = _alpha_span(self.msign); g = 1.0 - ag
+        w2 = np.minimum(w + self.m0, r); m = r - w2
+        gm = g ** m
+        def leg(q):
+            qm = q ** m
+            s = gm + ag * m * qm if q == g else gm + ag * q * (qm - gm) / (q - g)
+            return q ** (w2 - w) * s
+        sig = a["sig"][r] - gm * (a["sig"][w2] - (a["mf"][w2] - a["ms"][w2]))
+        sig = sig - (a["mf"][w] - cw) * leg(1.0 - _alpha_span(self.mfast)) \
+                  + (a["ms"][w] - cw) * leg(1.0 - _alpha_span(self.mslow))
+        sig = first(sig, self.m0 + self.msign - 1)
+        out["macd"] = macd; out["macd_signal"] = sig; out["macd_hist"] = macd - sig
+        # the window's first diff is NaN, i.e. up/dn are seeded at 0; a window
+        # without a single up (down) move is exactly 0 rather than rounding noise
+        G = (1.0 - _alpha_wilder(self.rsi_len)) ** d
+        up = np.where(a["nu"][r] == a["nu"][w], 0.0, np.maximum(a["up"][r] - G * a["up"][w], 0.0))
+        dn = np.where(a["nd"][r] == a["nd"][w], 0.0, np.maximum(a["dn"][r] - G * a["dn"][w], 0.0))
+        up = first(up, self.rsi_len - 1); dn = first(dn, self.rsi_len - 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["rsi"] = np.where(dn == 0, 100, 100 - (100 / (1 + up / dn)))
+        # ATR: mean of the window's first 14 TRs (the first one is high-low),
+        # then Wilder's recursion; 0 before that, as in `ta`, and 0 for a
+        # window without any range
+        s0 = np.minimum(w + ATR_LEN - 1, r)
+        tr = a["tr"][np.minimum(w[:, None] + np.arange(ATR_LEN), self.n - 1)]
+        tr[:, 0] = a["h"][w] - a["l"][w]
+        atr = a["atr"][r] - ((ATR_LEN - 1) / float(ATR_LEN)) ** (r - s0) * (a["atr"][s0] - tr.mean(axis=1))
+        rng0 = (a["ntr"][r] == a["ntr"][w]) & (tr[:, 0] == 0)
+        out["atr"] = np.where((d < ATR_LEN - 1) | rng0, 0.0, np.maximum(atr, 0.0))
+        v = a["v"]
+        vv = a["cv"][r] - a["cv"][w] + v[w]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["vwap"] = np.where(vv == 0, np.nan, (a["cpv"][r] - a["cpv"][w] + cw * v[w]) / vv)
+        return out
+
+    def columns(self, m: int, k: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        # indicator columns of the last k rows of the m-row window ending
+        # before row `end` (default: the newest row), as plain arrays
+        n = self.n if end is None else min(end, self.n)
+        m = min(m, n); k = m if k is None else min(k, m)
+        return self.anchored(np.arange(n - k, n), n - m)
+
+    def frame(self, m: int) -> pd.DataFrame:
+        cols = self.columns(m)
+        t = cols.pop("t")
+        df = pd.DataFrame(cols)
+        df.insert(0, "time", t.astype("int64").astype("datetime64[s]"))
+        return df
+
+class IndicatorEngine:
+    def __init__(self, maxlen: int = 300):
+        self.maxlen = maxlen
+        self._states: Dict[Tuple, IndicatorState] = {}
+        self.stats = {"cold_starts": 0, "incremental": 0}
+
+    def frame(self, symbol: str, tf: str, bars: np.ndarray, opts: Dict[str, Any]) -> pd.DataFrame:
+        return self._state(symbol, tf, bars, opts).frame(len(bars))
+
+    def _state(self, symbol: str, tf: str, bars: np.ndarray, opts: Dict[str, Any]) -> IndicatorState:
+        params = indicator_params(opts)
+        key = (symbol, tf, params)
+        st = self._states.get(key)
+        if st is not None and st.update(bars):
+            self.stats["incremental"] += 1
+        else:
+            st = IndicatorState(params, bars, max(self.maxlen, len(bars)))
+            self._states[key] = st
+            self.stats["cold_starts"] += 1
+        return st
+
+    def tail(self, symbol: str, tf: str, bars: np.ndarray, opts: Dict[str, Any], k: int) -> Dict[str, np.ndarray]:
+        # like frame() but only the last k rows, as arrays (no DataFrame)
+        return self._state(symbol, tf, bars, opts).columns(len(bars), k)
+
+    def retain(self, symbols: Iterable[str]):
+        keep = set(symbols)
+        for key in [k for k in self._states if k[0] not in keep]:
+            del self._states[key]
+
+    def evict(self, params: Tuple):
+        for key in [k for k in self._states if k[2] == params]:
+            del self._states[key]
+
+    def __len__(self):
+        return len(self._states)
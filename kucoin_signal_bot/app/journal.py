@@ -0,0 +1,313 @@
+import asyncio, json, os, sqlite3, time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import metrics
+
+# Every sent signal goes to a local SQLite file (WAL, so API reads never wait
+# on the writer). `record` only queues; one background task commits whatever
+# piled up within `batch_sec` in a single transaction off the event loop.
+# Open signals are also kept in memory and `track` walks them over the
+# closed bars of the candle cache: TPs fill in order, a bar touching the SL
+# ends the trade (SL first when a bar touches both, as in the backtest),
+# and `max_hold` bars without either closes it at the last close. A signal
+# whose symbol has no new bars in the cache (it left the universe) times out
+# by wall clock once its hold window has passed, at the last close it saw
+# (or the entry). Outcome counters per profile are updated on each
+# transition, so /stats reads one row instead of the history.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    confirms INTEGER NOT NULL,
+    entry REAL NOT NULL,
+    sl REAL NOT NULL,
+    tps TEXT NOT NULL,
+    reasons TEXT NOT NULL,
+    spread_bps REAL,
+    rvol15m REAL,
+    status TEXT NOT NULL DEFAULT 'open',
+    hits INTEGER NOT NULL DEFAULT 0,
+    bars_held INTEGER NOT NULL DEFAULT 0,
+    last_bar REAL,
+    ret REAL,
+    closed_ts REAL
+);
+CREATE INDEX IF NOT EXISTS signals_profile_id ON signals(profile, id);
+CREATE INDEX IF NOT EXISTS signals_symbol_id ON signals(symbol, id);
+CREATE INDEX IF NOT EXISTS signals_status_id ON signals(status, id);
+CREATE TABLE IF NOT EXISTS outcome_stats (
+    profile TEXT PRIMARY KEY,
+    signals INTEGER NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    tp INTEGER NOT NULL DEFAULT 0,
+    sl INTEGER NOT NULL DEFAULT 0,
+    timeout INTEGER NOT NULL DEFAULT 0,
+    tp1 INTEGER NOT NULL DEFAULT 0,
+    tp2 INTEGER NOT NULL DEFAULT 0,
+    tp3 INTEGER NOT NULL DEFAULT 0,
+    ret_sum REAL NOT NULL DEFAULT 0
+);
+"""
+COLUMNS = ("id", "ts", "symbol", "profile", "confirms", "entry", "sl", "tps", "reasons", "spread_bps", "rvol15m",
+           "status", "hits", "bars_held", "last_bar", "ret", "closed_ts")
+STATUSES = ("open", "tp", "sl", "timeout")
+
+def _connect(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+class SignalJournal:
+    def __init__(self, batch_sec: float = 1.0, max_batch: int = 500, max_queue: int = 10000, retries: int = 2):
+        self.path: Optional[str] = None
+        self.batch_sec = batch_sec
+        self.max_batch = max_batch
+        self.retries = retries
+        self._con: Optional[sqlite3.Connection] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._writer: Optional[asyncio.Task] = None
+        self._open: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 1
+        self.stats = {"recorded": 0, "written": 0, "batches": 0, "closed": 0, "dropped": 0, "errors": 0, "lost": 0,
+                      "open": 0}
+
+    def open(self, path: str):
+        # blocking; called once at startup
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        con = _connect(path)
+        con.executescript(SCHEMA)
+        self._next_id = (con.execute("SELECT MAX(id) FROM signals").fetchone()[0] or 0) + 1
+        cur = con.execute("SELECT id, ts, symbol, profile, entry, sl, tps, spread_bps, hits, bars_held, last_bar "
+                          "FROM signals WHERE status = 'open'")
+        for sid, ts, sym, prof, entry, sl, tps, spread, hits, held, last_bar in cur:
+            tps = json.loads(tps)
+            self._open[sid] = {"id": sid, "ts": ts, "symbol": sym, "profile": prof, "entry": entry, "sl": sl,
+                               "tps": tps, "spread_bps": spread, "hit": [bool(hits >> k & 1) for k in range(len(tps))],
+                               "bars_held": held, "last_bar": last_bar}
+        self.stats["open"] = len(self._open)
+        self._con = con
+        self.path = path
+
+    def record(self, symbol: str, profile: str, res: Dict[str, Any], confirms: int, tps: List[float],
+               spread_bps: Optional[float], ts: Optional[float] = None) -> Optional[int]:
+        # never blocks the caller; returns the signal id
+        if self._con is None:
+            return None
+        sid = self._next_id; self._next_id += 1
+        ts = time.time() if ts is None else ts
+        row = {"id": sid, "ts": ts, "symbol": symbol, "profile": profile, "confirms": int(confirms),
+               "entry": float(res["entry"]), "sl": float(res["sl"]), "tps": json.dumps([float(x) for x in tps]),
+               "reasons": json.dumps(list(res.get("reasons", [])), ensure_ascii=False),
+               "spread_bps": None if spread_bps is None else float(spread_bps),
+               "rvol15m": float(res["rvol15m"]) if res.get("rvol15m") is not None else None}
+        if not self._put(("insert", row)):
+            return None
+        self._open[sid] = {"id": sid, "ts": ts, "symbol": symbol, "profile": profile, "entry": row["entry"],
+                           "sl": row["sl"], "tps": [float(x) for x in tps], "spread_bps": row["spread_bps"],
+                           "hit": [False] * len(tps), "bars_held": 0, "last_bar": None}
+        self.stats["recorded"] += 1
+        self.stats["open"] = len(self._open)
+        return sid
+
+    def _put(self, item: Tuple[str, Dict[str, Any]]) -> bool:
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+
+    def track(self, store, tf: str, step: int, opts: Dict[str, Any], now: Optional[float] = None) -> int:
+        # advance open signals over the closed `tf` bars in the store; returns how many closed
+        if not self._open:
+            return 0
+        now = time.time() if now is None else now
+        max_hold = int(opts.get("journal_max_hold_bars", opts.get("backtest_max_hold_bars", 288)))
+        fee = int(opts.get("taker_fee_bps", 10)) / 10000.0
+        buffer = float(opts.get("roundtrip_extra_buffer_bps", 5))
+        closed = 0
+        for sid, s in list(self._open.items()):
+            bars = store.get(s["symbol"], tf)
+            if bars is None:
+                bars = np.empty((0, 6))
+            # closed bars from the one forming when the signal went out (the
+            # backtest enters at the close of the signal bar), then resumed
+            start = s["last_bar"] + step if s["last_bar"] is not None else s["ts"] // step * step
+            new = bars[(bars[:, 0] >= start) & (bars[:, 0] + step <= now)]
+            if not len(new):
+                # one bar of slack past the hold window for a lagging store
+                if now >= s["ts"] + (max_hold + 1) * step:
+                    self._put(("update", self._close(sid, s, "timeout", s.get("last_close", s["entry"]), now, fee, buffer)))
+                    closed += 1
+                continue
+            status = "open"
+            for t, hi, lo, c in zip(new[:, 0], new[:, 3], new[:, 4], new[:, 2]):
+                s["bars_held"] += 1; s["last_bar"] = float(t); s["last_close"] = float(c)
+                if lo <= s["sl"]:
+                    status = "sl"
+                    break
+                for k, tp in enumerate(s["tps"]):
+                    if not s["hit"][k] and hi >= tp:
+                        s["hit"][k] = True
+                if all(s["hit"]):
+                    status = "tp"
+                    break
+                if s["bars_held"] >= max_hold:
+                    status = "timeout"
+                    break
+            if status != "open":
+                self._put(("update", self._close(sid, s, status, s["sl"] if status == "sl" else float(c), now, fee, buffer)))
+                closed += 1
+            else:
+                self._put(("update", {"id": sid, "profile": s["profile"], "status": status, "bars_held": s["bars_held"],
+                                      "hits": sum(1 << k for k, h in enumerate(s["hit"]) if h), "last_bar": s["last_bar"]}))
+        self.stats["closed"] += closed
+        self.stats["open"] = len(self._open)
+        return closed
+
+    def _close(self, sid: int, s: Dict[str, Any], status: str, rest: float, now: float, fee: float,
+               buffer: float) -> Dict[str, Any]:
+        # equal parts at each TP reached, the rest at `rest` (SL or last close)
+        spread = s["spread_bps"] if s["spread_bps"] is not None else buffer
+        half = spread / 20000.0
+        fill = s["entry"] * (1 + half)
+        px = [tp for tp, h in zip(s["tps"], s["hit"]) if h]
+        px += [rest] * (len(s["tps"]) - len(px))
+        del self._open[sid]
+        return {"id": sid, "profile": s["profile"], "status": status, "bars_held": s["bars_held"],
+                "hits": sum(1 << k for k, h in enumerate(s["hit"]) if h), "last_bar": s["last_bar"],
+                "ret": float(np.mean([(p * (1 - half)) / fill - 1 for p in px])) - 2 * fee,
+                "closed_ts": now, "hit": list(s["hit"])}
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.batch_sec
+            while len(batch) < self.max_batch:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), left))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        # the transaction rolls back on error, so a failed batch is retried as
+        # a whole (locked database, full disk); after that row by row, so only
+        # the rows that keep failing are lost, and those are counted
+        for attempt in range(self.retries + 1):
+            try:
+                await asyncio.to_thread(self._apply, batch)
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                return
+            except Exception:
+                self.stats["errors"] += 1
+                metrics.inc("swallowed_exceptions_total", stage="journal_write")
+                await asyncio.sleep(self.batch_sec * (attempt + 1))
+        for row in batch:
+            try:
+                await asyncio.to_thread(self._apply, [row])
+                self.stats["written"] += 1
+            except Exception:
+                self.stats["lost"] += 1
+                metrics.inc("journal_rows_lost_total", kind=row[0])
+
+    def _apply(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        con = self._con
+        with con:
+            for kind, r in batch:
+                if kind == "insert":
+                    con.execute("INSERT INTO signals (id, ts, symbol, profile, confirms, entry, sl, tps, reasons, spread_bps, rvol15m) "
+                                "VALUES (:id, :ts, :symbol, :profile, :confirms, :entry, :sl, :tps, :reasons, :spread_bps, :rvol15m)", r)
+                    con.execute("INSERT INTO outcome_stats (profile, signals) VALUES (?, 1) "
+                                "ON CONFLICT(profile) DO UPDATE SET signals = signals + 1", (r["profile"],))
+                elif r["status"] == "open":
+                    con.execute("UPDATE signals SET hits = :hits, bars_held = :bars_held, last_bar = :last_bar WHERE id = :id", r)
+                else:
+                    con.execute("UPDATE signals SET status = :status, hits = :hits, bars_held = :bars_held, last_bar = :last_bar, "
+                                "ret = :ret, closed_ts = :closed_ts WHERE id = :id", r)
+                    h = r["hit"] + [False] * (3 - len(r["hit"]))
+                    con.execute(f"UPDATE outcome_stats SET closed = closed + 1, wins = wins + ?, {r['status']} = {r['status']} + 1, "
+                                "tp1 = tp1 + ?, tp2 = tp2 + ?, tp3 = tp3 + ?, ret_sum = ret_sum + ? WHERE profile = ?",
+                                (int(r["ret"] > 0), int(h[0]), int(h[1]), int(h[2]), r["ret"], r["profile"]))
+
+    async def flush(self, timeout: float = 10.0):
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def close(self):
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    # --- queries (own read connection per call, run off the event loop) ----
+
+    def _read(self, sql: str, args: tuple) -> List[sqlite3.Row]:
+        con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=10)
+        try:
+            con.row_factory = sqlite3.Row
+            return con.execute(sql, args).fetchall()
+        finally:
+            con.close()
+
+    async def query(self, profile: Optional[str] = None, symbol: Optional[str] = None, status: Optional[str] = None,
+                    before: Optional[int] = None, limit: int = 50) -> Dict[str, Any]:
+        # newest first, keyset-paginated on id: pass the returned `next` as `before`
+        if status and status not in STATUSES:
+            raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+        if not self.path:
+            return {"items": [], "next": None}
+        where, args = [], []
+        for col, val in (("profile", profile), ("symbol", symbol), ("status", status)):
+            if val:
+                where.append(f"{col} = ?"); args.append(val)
+        if before:
+            where.append("id < ?"); args.append(int(before))
+        limit = max(1, min(int(limit), 500))
+        sql = (f"SELECT {', '.join(COLUMNS)} FROM signals" + (" WHERE " + " AND ".join(where) if where else "") +
+               " ORDER BY id DESC LIMIT ?")
+        rows = await asyncio.to_thread(self._read, sql, tuple(args) + (limit,))
+        items = []
+        for r in rows:
+            d = dict(r)
+            d["tps"] = json.loads(d["tps"]); d["reasons"] = json.loads(d["reasons"])
+            d["tp_hits"] = [bool(d["hits"] >> k & 1) for k in range(len(d["tps"]))]
+            items.append(d)
+        return {"items": items, "next": items[-1]["id"] if len(items) == limit else None}
+
+    async def outcome_stats(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        if not self.path:
+            return {}
+        sql = "SELECT * FROM outcome_stats" + (" WHERE profile = ?" if profile else "")
+        rows = await asyncio.to_thread(self._read, sql, (profile,) if profile else ())
+        out = {}
+        for r in rows:
+            d = dict(r); n = d["closed"]
+            d["open"] = d["signals"] - n
+            if n:
+                d["win_rate"] = round(d["wins"] / n, 4)
+                for k in ("tp1", "tp2", "tp3", "sl", "timeout"):
+                    d[f"{k}_rate"] = round(d[k] / n, 4)
+                d["expectancy_pct"] = round(d["ret_sum"] / n * 100, 4)
+            out[d.pop("profile")] = d
+        return out
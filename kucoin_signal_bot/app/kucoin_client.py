@@ -1,28 +1,119 @@
+import asyncio, time, random
 import httpx
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import metrics
 KU_PUBLIC = "https://api.kucoin.com"
 
-TF_MAP = {"5m":"5min","15m":"15min","1h":"1hour"}
+TF_MAP = {"1m":"1min","5m":"5min","15m":"15min","1h":"1hour"}
+TF_SECONDS = {"1m":60,"5m":300,"15m":900,"1h":3600}
+
+# KuCoin public REST pool: 2000 weight units per 30s per IP
+KU_PUBLIC_QUOTA = 2000
+KU_QUOTA_WINDOW = 30.0
+KU_WEIGHTS = {
+    "/api/v1/market/allTickers": 15,
+    "/api/v1/market/candles": 3,
+    "/api/v1/market/orderbook/level1": 2,
+    "/api/v1/bullet-public": 10,
+}
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = float(capacity)
+        self.rate = float(refill_per_sec)
+        self._tokens = float(capacity)
+        self._ts = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    async def acquire(self, cost: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill()
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                await asyncio.sleep((cost - self._tokens) / self.rate)
+
+    def block(self, seconds: float):
+        # server said slow down: empty the bucket and hold everyone back
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
 
 class KucoinClient:
-    def __init__(self):
+    def __init__(self, weight_per_window: int = KU_PUBLIC_QUOTA, max_retries: int = 4):
         self._http = httpx.AsyncClient(timeout=15)
+        self.bucket = TokenBucket(weight_per_window, weight_per_window / KU_QUOTA_WINDOW)
+        self.max_retries = max_retries
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0}
 
-    async def fetch_all_tickers(self) -> Dict[str, Any]:
-        r = await self._http.get(f"{KU_PUBLIC}/api/v1/market/allTickers")
+    @staticmethod
+    def _retry_after(r: httpx.Response, attempt: int) -> float:
+        # gw-ratelimit-reset is in ms; fall back to exponential backoff with jitter
+        for h, scale in (("Retry-After", 1.0), ("gw-ratelimit-reset", 0.001)):
+            v = r.headers.get(h)
+            if v:
+                try:
+                    return max(float(v) * scale, 0.5)
+                except Exception:
+                    pass
+        return min(2 ** attempt, 30) + random.random()
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire(KU_WEIGHTS.get(path, 1))
+            self.stats["requests"] += 1
+            metrics.inc("kucoin_requests_total", endpoint=path)
+            # the HTTP round-trip only; bucket waits and 429 backoff are not in it
+            with metrics.timer("kucoin_request_seconds", endpoint=path):
+                r = await self._http.get(f"{KU_PUBLIC}{path}", params=params)
+            if r.status_code != 429 or attempt == self.max_retries:
+                break
+            self.stats["throttled"] += 1
+            metrics.inc("kucoin_429_total", endpoint=path)
+            self.bucket.block(self._retry_after(r, attempt))
+        if r.status_code >= 400:
+            self.stats["errors"] += 1
+            metrics.inc("kucoin_http_errors_total", endpoint=path, status=r.status_code)
         r.raise_for_status()
+        return r
+
+    async def fetch_all_tickers(self) -> Dict[str, Any]:
+        r = await self._get("/api/v1/market/allTickers")
         return r.json()
 
-    async def fetch_candles(self, symbol: str, tf: str, limit: int = 300) -> List[List[Any]]:
+    async def fetch_candles(self, symbol: str, tf: str, limit: int = 300,
+                            start_at: Optional[int] = None, end_at: Optional[int] = None) -> List[List[Any]]:
+        # KuCoin returns newest first; keep the newest `limit` bars, oldest first
         tftag = TF_MAP.get(tf, tf)
-        r = await self._http.get(f"{KU_PUBLIC}/api/v1/market/candles", params={"symbol": symbol, "type": tftag})
-        r.raise_for_status()
+        params = {"symbol": symbol, "type": tftag}
+        if start_at is not None:
+            params["startAt"] = int(start_at)
+        if end_at is not None:
+            params["endAt"] = int(end_at)
+        r = await self._get("/api/v1/market/candles", params=params)
         data = r.json().get("data", [])
-        data = list(reversed(data))[:limit]
+        data = list(reversed(data[:limit]))
         return data
 
     async def fetch_level1(self, symbol: str) -> Dict[str, Any]:
-        r = await self._http.get(f"{KU_PUBLIC}/api/v1/market/orderbook/level1", params={"symbol": symbol})
+        r = await self._get("/api/v1/market/orderbook/level1", params={"symbol": symbol})
+        return r.json().get("data", {})
+
+    async def fetch_ws_token(self) -> Dict[str, Any]:
+        path = "/api/v1/bullet-public"
+        await self.bucket.acquire(KU_WEIGHTS[path])
+        self.stats["requests"] += 1
+        r = await self._http.post(f"{KU_PUBLIC}{path}")
         r.raise_for_status()
         return r.json().get("data", {})
 
@@ -0,0 +1,188 @@
+import asyncio, json, time, uuid
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterable
+import numpy as np
+import websockets
+from kucoin_client import KucoinClient, TF_MAP
+from candle_store import CandleStore
+from spreads import SpreadBook
+
+TF_FROM_TAG = {v: k for k, v in TF_MAP.items()}
+
+# KuCoin allows up to 100 symbols per subscribe message and a few hundred
+# topics per connection; stay below both.
+SUBSCRIBE_BATCH = 100
+TOPICS_PER_CONN = 300
+
+class KucoinStream:
+    # Public WebSocket feed for candles and level-1 tickers. Candle pushes are
+    # merged into the CandleStore; every trigger-timeframe push marks the
+    # symbol dirty (closed=True when a new bar opens) for the evaluator.
+    def __init__(self, ku: KucoinClient, store: CandleStore, tfs: Iterable[str], trigger_tf: str,
+                 token_provider: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+                 topics_per_conn: int = TOPICS_PER_CONN, spreads: Optional[SpreadBook] = None):
+        self.ku = ku
+        self.store = store
+        self.tfs = list(tfs)
+        self.trigger_tf = trigger_tf
+        self.token_provider = token_provider or ku.fetch_ws_token
+        self.topics_per_conn = topics_per_conn
+        self.symbols: List[str] = []
+        self.spreads = spreads if spreads is not None else SpreadBook()
+        self.stats = {"connects": 0, "reconnects": 0, "messages": 0, "candles": 0, "tickers": 0, "backfills": 0}
+        self._dirty: Dict[str, bool] = {}
+        self._event = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def _feeds(self) -> List[str]:
+        # candle topics actually subscribed: timeframes the store derives from
+        # its base series are rebuilt from the base pushes instead
+        base = self.store.base_tf
+        tfs = [tf for tf in self.tfs if not self.store.derives(tf)]
+        return tfs + [base] if base and base not in tfs else tfs
+
+    def _chunks(self) -> List[List[str]]:
+        per_sym = len(self._feeds()) + 1
+        n = max(1, self.topics_per_conn // per_sym)
+        return [self.symbols[i:i+n] for i in range(0, len(self.symbols), n)]
+
+    def set_symbols(self, symbols: Iterable[str]):
+        symbols = list(symbols)
+        if set(symbols) == set(self.symbols) and self._tasks:
+            return
+        self.symbols = symbols
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = [asyncio.create_task(self._run_conn(chunk)) for chunk in self._chunks()]
+
+    async def close(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _mark(self, symbol: str, closed: bool):
+        self._dirty[symbol] = self._dirty.get(symbol, False) or closed
+        self._event.set()
+
+    async def next_events(self, timeout: float) -> Dict[str, bool]:
+        # symbol -> closed, for every symbol pushed since the last call
+        if not self._dirty:
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        out, self._dirty = self._dirty, {}
+        return out
+
+    def _topics(self, symbols: List[str]) -> List[str]:
+        topics = []
+        for i in range(0, len(symbols), SUBSCRIBE_BATCH):
+            batch = symbols[i:i+SUBSCRIBE_BATCH]
+            for tf in self._feeds():
+                tag = TF_MAP.get(tf, tf)
+                topics.append("/market/candles:" + ",".join(f"{s}_{tag}" for s in batch))
+            topics.append("/market/ticker:" + ",".join(batch))
+        return topics
+
+    def handle(self, msg: Dict[str, Any]):
+        if msg.get("type") != "message":
+            return
+        self.stats["messages"] += 1
+        topic = msg.get("topic", ""); data = msg.get("data") or {}
+        if topic.startswith("/market/candles:"):
+            sym = data.get("symbol", "")
+            tf = TF_FROM_TAG.get(topic.rsplit("_", 1)[-1])
+            if not tf:
+                return
+            row = np.array([data["candles"][:6]], dtype=np.float64)
+            bars = self.store.get(sym, tf)
+            if bars is None or not len(bars):
+                return
+            if row[0, 0] < bars[-1, 0]:
+                return
+            closed = row[0, 0] > bars[-1, 0]
+            derived = tf == self.store.base_tf and self.store.derives(self.trigger_tf)
+            if derived:
+                trig = self.store.get(sym, self.trigger_tf)
+                last = trig[-1, 0] if trig is not None and len(trig) else -1
+            self.store.merge(sym, tf, row)
+            self.stats["candles"] += 1
+            if tf == self.trigger_tf:
+                self._mark(sym, closed)
+            elif derived:
+                trig = self.store.get(sym, self.trigger_tf)
+                self._mark(sym, bool(trig is not None and len(trig) and trig[-1, 0] > last))
+        elif topic.startswith("/market/ticker:"):
+            # one topic lists many symbols; each push names its own in the
+            # topic ("/market/ticker:BTC-USDT"), subject is "trade.ticker"
+            sym = topic.split(":", 1)[1]
+            try:
+                self.spreads.update(sym, float(data.get("bestBid") or 0), float(data.get("bestAsk") or 0))
+                self.stats["tickers"] += 1
+            except Exception:
+                pass
+
+    async def _backfill(self, symbols: List[str]):
+        # REST fills whatever was missed while the socket was down
+        for sym in symbols:
+            for tf in self.tfs:
+                try:
+                    await self.store.update(sym, tf)
+                    self.stats["backfills"] += 1
+                except Exception:
+                    pass
+            self._mark(sym, True)
+
+    async def _run_conn(self, symbols: List[str]):
+        attempt = 0
+        while True:
+            try:
+                tok = await self.token_provider()
+                srv = (tok.get("instanceServers") or [{}])[0]
+                ping_iv = float(srv.get("pingInterval", 18000)) / 1000.0
+                ping_to = float(srv.get("pingTimeout", 10000)) / 1000.0
+                url = f"{srv['endpoint']}?token={tok.get('token','')}&connectId={uuid.uuid4().hex}"
+                async with websockets.connect(url, ping_interval=None, max_size=2**22) as ws:
+                    welcome = json.loads(await asyncio.wait_for(ws.recv(), ping_iv + ping_to))
+                    if welcome.get("type") != "welcome":
+                        raise ConnectionError(f"unexpected handshake: {welcome}")
+                    self.stats["connects"] += 1
+                    for topic in self._topics(symbols):
+                        await ws.send(json.dumps({"id": uuid.uuid4().hex, "type": "subscribe", "topic": topic,
+                                                  "privateChannel": False, "response": True}))
+                    backfill = asyncio.create_task(self._backfill(symbols))
+                    attempt = 0
+                    try:
+                        await self._pump(ws, ping_iv, ping_to)
+                    finally:
+                        backfill.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            self.stats["reconnects"] += 1
+            attempt += 1
+            await asyncio.sleep(min(2 ** attempt, 30))
+
+    async def _pump(self, ws, ping_iv: float, ping_to: float):
+        seen = [time.monotonic()]
+
+        async def pinger():
+            while True:
+                await asyncio.sleep(ping_iv)
+                if time.monotonic() - seen[0] > ping_iv + ping_to:
+                    await ws.close()
+                    return
+                await ws.send(json.dumps({"id": str(int(time.time()*1000)), "type": "ping"}))
+
+        pt = asyncio.create_task(pinger())
+        try:
+            async for raw in ws:
+                seen[0] = time.monotonic()
+                msg = json.loads(raw)
+                if msg.get("type") == "error":
+                    raise ConnectionError(msg.get("data"))
+                self.handle(msg)
+        finally:
+            pt.cancel()
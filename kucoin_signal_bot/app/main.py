@@ -1,12 +1,24 @@
 import asyncio, os, time, json, re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import yaml
 import pandas as pd
 from fastapi import FastAPI
-from kucoin_client import KucoinClient
-from features import ohlcv_df, add_indicators
-from rules import should_signal
-from notifier import TelegramNotifier
+from kucoin_client import KucoinClient, TF_SECONDS
+from candle_store import CandleStore
+from features import bars_df, add_indicators
+from indicators import IndicatorEngine, indicator_params
+from kucoin_ws import KucoinStream
+from rules import should_signal, should_signal_np, bias_1h_np, adjust_tps, tail_rows, frame_tail
+from matrix import Panel, bias_1h_mat, bias_15m_mat, screen_mat, signal_at
+from scheduler import BarClock
+from universe import UniverseManager
+from spreads import SpreadBook
+from journal import SignalJournal
+from options_store import OptionsStore, write_json_atomic
+from profiles import Profile, DEFAULT, build_profiles, universe_quote
+import metrics
+from eval_pool import EvalPool
+from notifier import TelegramNotifier, get_notifier
 
 import os as _os
 import httpx as _httpx
@@ -46,10 +58,38 @@ STATE = {
     "symbols": [],
     "cfg": None,
     "started_ts": time.time(),
-    "runtime": {"min_confirms": 3}
+    "runtime": {"min_confirms": 3},
+    "scan": {},
+    "scheduler": {},
+    "bias": {},
+    "telegram": {},
+    "spreads": {},
+    "options": {},
+    "profiles": {},
+    "journal": {}
 }
 
+# best bid/ask snapshot shared by the universe (allTickers) and the ticker stream
+SPREADS = SpreadBook()
+STATE["spreads"] = SPREADS.stats
+# every sent signal and its TP/SL outcome; opened by the worker (journal_path)
+JOURNAL = SignalJournal()
+STATE["journal"] = JOURNAL.stats
+
 RUNTIME_PATH = "/data/runtime.json"
+COOLDOWN_PATH = "/data/cooldown.json"
+OPTIONS_PATH = "/data/options.json"
+USER_CONFIG_PATH = "/data/user_config.json"
+
+# merged add-on + UI options, reloaded in the background on mtime change
+OPTIONS = OptionsStore(OPTIONS_PATH, USER_CONFIG_PATH)
+# read once when the worker starts; a change is reported in /health until restart
+RESTART_KEYS = ("kucoin_weight_per_30s", "candle_window", "candle_store_dir", "resample_base_tf", "eval_workers",
+                "market_data_mode", "align_to_bar_close", "bar_close_grace_sec")
+BIAS_KEYS = ("bias_rsi_min", "bias_need_ema_order", "bias_allow_price_above_ema200_15m")
+# how far a symbol got; a symbol scanned for several profiles reports its furthest stage
+STAGE_ORDER = ("skipped", "error", "ticker", "no_data", "bias_1h", "bias_15m", "bias", "anti_noise", "confirms",
+               "min_confirms", "cooldown", "dropped", "signal")
 
 app = FastAPI()
 
@@ -67,13 +107,6 @@ def load_cfg() -> Dict[str, Any]:
         cfg['allowed_keys'] = []
     return cfg
 
-def get_addon_options() -> Dict[str, Any]:
-    opts_path = "/data/options.json"
-    if os.path.exists(opts_path):
-        with open(opts_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
 def confirms_emoji(confirms: int) -> str:
     return "🟢" if confirms==5 else ("🟡" if confirms==4 else ("🟠" if confirms==3 else ("🔴" if confirms==2 else "⚪")))
 
@@ -90,8 +123,7 @@ def load_runtime_min_confirms(default_val:int) -> int:
 
 def write_json(path, data):
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json_atomic(path, data)
         return True
     except Exception:
         return False
@@ -105,27 +137,57 @@ def read_json(path, default):
         pass
     return default
 
-def merge_dicts(a: dict, b: dict) -> dict:
-    c = dict(a or {})
-    c.update(b or {})
-    return c
-
 def merged_options():
-    opts = get_addon_options()
-    user = read_json('/data/user_config.json', {})
-    return merge_dicts(opts, user)
+    return OPTIONS.get()
 
 async def persist_options(new_vals: dict):
-    # Update user_config.json
-    user = read_json('/data/user_config.json', {})
-    user = merge_dicts(user, new_vals or {})
-    write_json('/data/user_config.json', user)
+    # Update user_config.json (atomic, off-loop) and push to the running worker
+    _, opts = await OPTIONS.persist(new_vals or {})
     # Also update Supervisor options (HA UI)
-    opts = get_addon_options()
-    opts = merge_dicts(opts, new_vals or {})
     allowed = set(STATE['cfg']['allowed_keys']) if STATE.get('cfg') and 'allowed_keys' in STATE['cfg'] else set(opts.keys())
     clean = {k: v for k, v in opts.items() if k in allowed or k in opts}
     await supervisor_set_options(clean)
+
+
+def options_listener(ind: IndicatorEngine):
+    # drop only what the changed options invalidate
+    def on_change(old: Dict[str, Any], new: Dict[str, Any]):
+        was = {indicator_params(p.opts) for p in build_profiles(old)}
+        now = {indicator_params(p.opts) for p in build_profiles(new)}
+        for params in was - now:
+            ind.evict(params=params)
+        if was != now or old.get("profiles") != new.get("profiles") or any(old.get(k) != new.get(k) for k in BIAS_KEYS):
+            STATE["bias"].clear()
+        pending = {k for k in RESTART_KEYS if old.get(k) != new.get(k)}
+        if pending:
+            STATE["options"]["restart_required"] = sorted(pending | set(STATE["options"].get("restart_required", [])))
+        STATE["options"]["version"] = OPTIONS.version
+    return on_change
+
+def load_cooldowns():
+    data = read_json(COOLDOWN_PATH, {})
+    STATE["last_signal_ts"].update({k: float(v) for k, v in (data.get("last_signal_ts") or {}).items()})
+    STATE["last_confirms"].update({k: int(v) for k, v in (data.get("last_confirms") or {}).items()})
+
+_COOLDOWN_SAVE: Dict[str, Any] = {"task": None, "dirty": False}
+
+def save_cooldowns(delay: float = 1.0):
+    # debounced: one atomic write per burst of signals, done off the event loop
+    _COOLDOWN_SAVE["dirty"] = True
+    t = _COOLDOWN_SAVE["task"]
+    if t is None or t.done():
+        _COOLDOWN_SAVE["task"] = asyncio.create_task(_write_cooldowns(delay))
+
+async def _write_cooldowns(delay: float):
+    while _COOLDOWN_SAVE["dirty"]:
+        _COOLDOWN_SAVE["dirty"] = False
+        await asyncio.sleep(delay)
+        # entries older than a day can no longer block anything
+        cutoff = time.time() - 86400
+        ts = {k: v for k, v in STATE["last_signal_ts"].items() if v >= cutoff}
+        data = {"last_signal_ts": ts, "last_confirms": {k: v for k, v in STATE["last_confirms"].items() if k in ts}}
+        await asyncio.to_thread(write_json, COOLDOWN_PATH, data)
+
 def save_runtime_min_confirms(val:int):
     try:
         with open(RUNTIME_PATH, "w", encoding="utf-8") as f:
@@ -133,19 +195,7 @@ def save_runtime_min_confirms(val:int):
     except Exception:
         pass
 
-def adjust_tps(entry: float, raw_levels, opts: Dict[str, Any], spread_bps: float=None):
-    fee = int(opts.get("taker_fee_bps",10))
-    buffer = int(opts.get("roundtrip_extra_buffer_bps",5))
-    min_net = int(opts.get("min_net_profit_bps",10))
-    cost_bps = 2*fee + (int(spread_bps) if spread_bps is not None else buffer)
-    min_pct = (cost_bps + min_net) / 10000.0
-    result = []
-    for lvl in raw_levels:
-        pct = max(float(lvl), min_pct)
-        result.append(entry*(1.0+pct))
-    return result
-
-def format_signal(sym: str, res: Dict[str, Any], confirms: int, adjusted_tps):
+def format_signal(sym: str, res: Dict[str, Any], confirms: int, adjusted_tps, profile: Optional[str] = None):
     entry = res["entry"]; sl = res["sl"]
     emoji = confirms_emoji(confirms)
     reasons = ", ".join(res["reasons"])
@@ -153,103 +203,644 @@ def format_signal(sym: str, res: Dict[str, Any], confirms: int, adjusted_tps):
             f"Вход: {entry:.6f}\n"
             f"SL:   {sl:.6f}\n"
             f"TP1:  {adjusted_tps[0]:.6f}\nTP2:  {adjusted_tps[1]:.6f}\nTP3:  {adjusted_tps[2]:.6f}\n"
-            f"Причины: {reasons}")
-
-async def build_symbol_universe(ku: KucoinClient, quote: str, top_n: int, min_vol24: float):
-    data = await ku.fetch_all_tickers()
-    arr = data.get("data", {}).get("ticker", [])
-    rows = []
-    for t in arr:
-        sym = t.get("symbol", "")
-        if not sym.endswith(f"-{quote}"):
+            f"Причины: {reasons}" + (f"\nПрофиль: {profile}" if profile and profile != DEFAULT else ""))
+
+def make_universe(ku: KucoinClient, store: CandleStore, ind: IndicatorEngine, cfg: Dict[str, Any], opts: Dict[str, Any],
+                  warm: bool = True) -> UniverseManager:
+    # dropped symbols leave every cache; new ones get their candles backfilled
+    # in the background instead of inside the next scan
+    u = UniverseManager(ku, opts.get("symbols_quote","USDT"), int(opts.get("top_n_by_volume", 120)),
+                        float(opts.get("min_vol_24h_usd", 5000000)), ttl=float(opts.get("universe_ttl_sec", 300)),
+                        spreads=SPREADS)
+    tfs = cfg["timeframes"]
+
+    async def warm_up(symbols: List[str]):
+        for sym in symbols:
+            for tf in (tfs["bias_tf"], tfs["setup_tf"], tfs["trigger_tf"]):
+                if sym not in u.symbols:
+                    break
+                try:
+                    await store.update(sym, tf)
+                except Exception:
+                    metrics.inc("swallowed_exceptions_total", stage="warm_up")
+
+    def on_change(added: List[str], removed: List[str]):
+        STATE["symbols"] = u.symbols[:]
+        # the first ranking removes nothing, but windows loaded from
+        # candle_store_dir may belong to symbols that have left the universe
+        store.retain(u.symbols)
+        ind.retain(u.symbols)
+        for sym in removed:
+            STATE["bias"].pop(sym, None)
+        if warm and added and store.stats["backfills"]:
+            # skip the very first ranking: the first scan fills everything anyway
+            asyncio.create_task(warm_up(added))
+
+    u.on_change(on_change)
+    return u
+
+def configure_universe(u: UniverseManager, profiles: List[Profile], opts: Dict[str, Any]):
+    # one universe for all profiles: every quote, the widest top-N and volume floor
+    u.configure(universe_quote(profiles),
+                max(int(p.opts.get("top_n_by_volume", 120)) for p in profiles),
+                min(float(p.opts.get("min_vol_24h_usd", 5000000)) for p in profiles),
+                float(opts.get("universe_ttl_sec", 300)))
+
+async def fetch_df(store: CandleStore, ind: IndicatorEngine, symbol: str, tf: str, opts: Dict[str, Any], refresh: bool = True):
+    bars = await store.update(symbol, tf) if refresh else store.get(symbol, tf)
+    if bars is None:
+        return bars_df(bars)
+    if len(bars) and bool(opts.get("incremental_indicators", True)):
+        with metrics.timer("indicator_seconds", tf=tf, mode="incremental"):
+            return ind.frame(symbol, tf, bars, opts)
+    with metrics.timer("indicator_seconds", tf=tf, mode="full"):
+        df = bars_df(bars)
+        df = add_indicators(df, opts)
+    return df
+
+async def fetch_tail(store: CandleStore, ind: IndicatorEngine, symbol: str, tf: str, opts: Dict[str, Any], k: int,
+                     refresh: bool = True):
+    # last k indicator rows as arrays, for the NumPy rule path
+    bars = await store.update(symbol, tf) if refresh else store.get(symbol, tf)
+    if bars is not None and len(bars) and bool(opts.get("incremental_indicators", True)):
+        with metrics.timer("indicator_seconds", tf=tf, mode="tail"):
+            return ind.tail(symbol, tf, bars, opts, k)
+    return frame_tail(await fetch_df(store, ind, symbol, tf, opts, refresh=False), k)
+
+def _pct(vals: List[float], q: float) -> float:
+    if not vals:
+        return 0.0
+    vals = sorted(vals)
+    return vals[min(len(vals)-1, int(q*len(vals)))]
+
+async def prescreen(sym: str, store: CandleStore, ind: IndicatorEngine, cfg: Dict[str, Any], opts: Dict[str, Any],
+                    refresh, ticker: Optional[Dict[str, Any]], fresh: set, profile: str = DEFAULT) -> Optional[str]:
+    # cheapest checks first; returns the rejecting stage or None. The 1h
+    # candles are only refetched when refresh() says the bar rolled, and the
+    # 15m leg of bias_ok is decided from the ticker's last price.
+    tfs = cfg["timeframes"]
+    t = ticker or {}
+    try:
+        chg = float(t.get("changeRate") or 0) * 100
+    except Exception:
+        chg = 0.0
+    if chg < float(opts.get("prefilter_min_change_pct", -100)):
+        return "ticker"
+
+    btf, stf = tfs["bias_tf"], tfs["setup_tf"]
+    if refresh(btf):
+        b1h = await store.update(sym, btf)
+        fresh.add(btf)
+    else:
+        b1h = store.get(sym, btf)
+    if b1h is None or not len(b1h):
+        return "no_data"
+    key = (b1h[-1, 0], b1h[-1, 2])
+    cache = STATE["bias"].setdefault(sym, {})
+    cached = cache.get(profile)
+    if cached and cached[0] == key:
+        leg = cached[1]
+    else:
+        leg = bias_1h_np(await fetch_tail(store, ind, sym, btf, opts, 1, refresh=False), opts)
+        cache[profile] = (key, leg)
+    if leg is not None:
+        return None if leg else "bias_1h"
+
+    try:
+        last = float(t.get("last") or 0)
+    except Exception:
+        last = 0.0
+    step = TF_SECONDS.get(stf, 900)
+    b15 = store.get(sym, stf)
+    if last > 0 and b15 is not None and len(b15) >= 2 and b15[-1, 0] == time.time() // step * step:
+        # EMA200 including the forming bar lies between the previous EMA and
+        # the close, so close >= ema200[-1] <=> close >= ema200[-2]
+        t15 = await fetch_tail(store, ind, sym, stf, opts, 2, refresh=False)
+        ok = last >= t15["ema200"][-2]
+    else:
+        t15 = await fetch_tail(store, ind, sym, stf, opts, 1, refresh=True)
+        fresh.add(stf)
+        ok = len(t15["close"]) > 0 and t15["close"][-1] >= t15["ema200"][-1]
+    return None if ok else "bias_15m"
+
+async def scan_symbol(sym: str, tg: TelegramNotifier, ku: KucoinClient, store: CandleStore, ind: IndicatorEngine, cfg: Dict[str, Any], opts: Dict[str, Any],
+                      stream: Optional[KucoinStream] = None, rolled: Optional[Dict[str, bool]] = None,
+                      pool: Optional[EvalPool] = None, ticker: Optional[Dict[str, Any]] = None,
+                      profiles: Optional[List[Profile]] = None) -> str:
+    # with a stream the store is already fed by pushes, so no REST refresh;
+    # with `rolled` (bar-aligned scan) the bias frame is refreshed only when
+    # its bar closed. The setup frame is always refreshed: RVOL15m reads its
+    # forming bar. Every profile runs on the same candles (fetched at most
+    # once here) and the same indicator states when their periods match.
+    # Returns the furthest stage any profile reached.
+    tfs = cfg["timeframes"]
+    fresh: set = set()
+    def refresh(tf: str) -> bool:
+        if stream is not None or tf in fresh:
+            return False
+        if rolled is None or tf != tfs["bias_tf"] or store.get(sym, tf) is None:
+            return True
+        return rolled.get(tf, True)
+
+    best = "skipped"
+    for prof in profiles or build_profiles(opts):
+        if not prof.accepts(sym, ticker):
             continue
+        stage = await scan_profile(sym, prof, tg, ku, store, ind, cfg, refresh, fresh, stream, pool, ticker)
+        fresh.update(tfs.values())
+        if STAGE_ORDER.index(stage) > STAGE_ORDER.index(best):
+            best = stage
+    return best
+
+async def scan_profile(sym: str, prof: Profile, tg: TelegramNotifier, ku: KucoinClient, store: CandleStore, ind: IndicatorEngine,
+                       cfg: Dict[str, Any], refresh, fresh: set, stream: Optional[KucoinStream] = None,
+                       pool: Optional[EvalPool] = None, ticker: Optional[Dict[str, Any]] = None) -> str:
+    tfs = cfg["timeframes"]
+    opts = prof.opts
+    bias = None
+    if stream is None and bool(opts.get("staged_scan", True)):
+        stage = await prescreen(sym, store, ind, cfg, opts, refresh, ticker, fresh, prof.name)
+        if stage:
+            return stage
+        bias = True
+
+    if pool is not None:
+        # indicators and rules run in a worker process on the raw candle arrays
+        async def get_bars(tf: str):
+            return await store.update(sym, tf) if refresh(tf) else store.get(sym, tf)
+        bars = await asyncio.gather(*(get_bars(tf) for tf in (tfs["trigger_tf"], tfs["setup_tf"], tfs["bias_tf"])))
+        if any(b is None or not len(b) for b in bars):
+            return "no_data"
+        # indicators + rules in the worker, timed as one
+        with metrics.timer("rules_seconds", mode="pool"):
+            res = await pool.evaluate(bars[0], bars[1], bars[2], cfg, opts, bias=bias)
+    else:
+        res = await evaluate_frames(sym, store, ind, cfg, opts, refresh, bias)
+    if res is None:
+        return "no_data"
+    if not res.get("ok"):
+        why = res.get("why", "")
+        return "bias" if why.startswith("bias") else "anti_noise" if why.startswith("anti") else \
+               "confirms" if why.startswith("only") else "no_data"
+    return await dispatch_signal(sym, res, tg, ku, cfg, opts, prof)
+
+async def evaluate_frames(sym: str, store: CandleStore, ind: IndicatorEngine, cfg: Dict[str, Any], opts: Dict[str, Any],
+                          refresh, bias: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    tfs = cfg["timeframes"]
+    if bool(opts.get("numpy_rules", True)):
+        k5, k15, k1h = tail_rows(opts)
+        t5, t15, t1h = await asyncio.gather(
+            fetch_tail(store, ind, sym, tfs["trigger_tf"], opts, k5, refresh=refresh(tfs["trigger_tf"])),
+            fetch_tail(store, ind, sym, tfs["setup_tf"],   opts, k15, refresh=refresh(tfs["setup_tf"])),
+            fetch_tail(store, ind, sym, tfs["bias_tf"],    opts, k1h, refresh=refresh(tfs["bias_tf"])))
+        if not all(len(t.get("close", ())) for t in (t5, t15, t1h)):
+            return None
+        with metrics.timer("rules_seconds", mode="numpy"):
+            return should_signal_np(t1h, t15, t5, cfg, opts, bias=bias)
+    df5, df15, df1h = await asyncio.gather(
+        fetch_df(store, ind, sym, tf=tfs["trigger_tf"], opts=opts, refresh=refresh(tfs["trigger_tf"])),
+        fetch_df(store, ind, sym, tf=tfs["setup_tf"],   opts=opts, refresh=refresh(tfs["setup_tf"])),
+        fetch_df(store, ind, sym, tf=tfs["bias_tf"],    opts=opts, refresh=refresh(tfs["bias_tf"])))
+    if df5.empty or df15.empty or df1h.empty:
+        return None
+    with metrics.timer("rules_seconds", mode="inline"):
+        return should_signal(df1h, df15, df5, cfg, opts, bias=bias)
+
+async def matrix_scan(symbols: List[str], tg: TelegramNotifier, ku: KucoinClient, store: CandleStore, ind: IndicatorEngine,
+                      cfg: Dict[str, Any], opts: Dict[str, Any], profiles: List[Profile], tickers: Dict[str, Dict[str, Any]],
+                      stream: Optional[KucoinStream] = None, rolled: Optional[Dict[str, bool]] = None,
+                      pool: Optional[EvalPool] = None) -> Dict[str, str]:
+    # matrix_screen: the same stages as prescreen + scan_profile, but each
+    # one runs on every symbol at once (matrix.Panel); only the symbols that
+    # pass reach dispatch_signal. Candles are fetched stage by stage, so the
+    # 15m / 5m requests are only made for symbols still alive. Symbols with
+    # too few bars go through scan_symbol. Returns the stage per symbol.
+    tfs = cfg["timeframes"]
+    btf, stf, ttf = tfs["bias_tf"], tfs["setup_tf"], tfs["trigger_tf"]
+    sem = asyncio.Semaphore(max(1, int(opts.get("scan_concurrency", 8))))
+    stages: Dict[str, str] = {}
+    def reach(sym: str, stage: str):
+        if STAGE_ORDER.index(stage) > STAGE_ORDER.index(stages.get(sym, "skipped")):
+            stages[sym] = stage
+
+    async def load(syms: List[str], tf: str) -> Dict[str, Any]:
+        async def one(sym: str):
+            async with sem:
+                try:
+                    stale = stream is None and (tf != btf or rolled is None or rolled.get(tf, True) or store.get(sym, tf) is None)
+                    return sym, await store.update(sym, tf) if stale else store.get(sym, tf)
+                except Exception:
+                    metrics.inc("swallowed_exceptions_total", stage="matrix_fetch")
+                    return sym, None
+        return dict(await asyncio.gather(*(one(s) for s in syms)))
+
+    # ticker pre-filter, per profile
+    alive: Dict[str, List[str]] = {}
+    for prof in profiles:
+        keep = []
+        for sym in symbols:
+            t = tickers.get(sym)
+            if not prof.accepts(sym, t):
+                continue
+            try:
+                chg = float((t or {}).get("changeRate") or 0) * 100
+            except Exception:
+                chg = 0.0
+            if stream is None and bool(prof.opts.get("staged_scan", True)) and \
+               chg < float(prof.opts.get("prefilter_min_change_pct", -100)):
+                reach(sym, "ticker")
+                continue
+            keep.append(sym)
+        alive[prof.name] = keep
+    union = lambda: list(dict.fromkeys(s for syms in alive.values() for s in syms))
+
+    short: set = set()
+    def panel(wins: Dict[str, Any]) -> Panel:
+        p = Panel(wins)
+        short.update(p.short)
+        for sym in p.short:
+            if wins.get(sym) is None or not len(wins[sym]):
+                reach(sym, "no_data")
+        return p
+
+    # bias leg on the 1h frame
+    p1h = panel(await load(union(), btf))
+    legs: Dict[str, Dict[str, int]] = {}
+    with metrics.timer("rules_seconds", mode="matrix"):
+        for prof in profiles:
+            syms = [s for s in alive[prof.name] if s in p1h.index]
+            leg = bias_1h_mat(p1h.take(p1h.columns(indicator_params(prof.opts), 1), p1h.rows(syms)), prof.opts)
+            for sym in (s for s, g in zip(syms, leg) if not g):
+                reach(sym, "bias_1h")
+            legs[prof.name] = dict(zip(syms, leg))
+            alive[prof.name] = [s for s, g in zip(syms, leg) if g]
+
+    # 15m: EMA200 leg of the bias where the 1h leg left it open. As in
+    # prescreen, a current forming bar in the store lets the ticker's last
+    # price decide it before any request; RVOL needs the refreshed bars later.
+    step = TF_SECONDS.get(stf, 900)
+    last: Dict[str, float] = {}
+    if stream is None:
+        for sym in union():
+            try:
+                px = float((tickers.get(sym) or {}).get("last") or 0)
+            except Exception:
+                px = 0.0
+            b15 = store.get(sym, stf)
+            if px > 0 and b15 is not None and len(b15) >= 2 and b15[-1, 0] == time.time() // step * step:
+                last[sym] = px
+    decided: Dict[str, set] = {prof.name: set() for prof in profiles}
+    if last:
+        pq = Panel({s: store.get(s, stf) for s in last})
+        with metrics.timer("rules_seconds", mode="matrix"):
+            for prof in profiles:
+                if not bool(prof.opts.get("staged_scan", True)):
+                    continue
+                syms = [s for s in alive[prof.name] if legs[prof.name][s] == -1 and s in pq.index]
+                ema = pq.take(pq.columns(indicator_params(prof.opts), 2), pq.rows(syms))["ema200"]
+                for sym, e in zip(syms, ema[:, -2] if len(syms) else ()):
+                    decided[prof.name].add(sym)
+                    if not last[sym] >= e:
+                        reach(sym, "bias_15m")
+                        alive[prof.name].remove(sym)
+    p15 = panel(await load(union(), stf))
+    with metrics.timer("rules_seconds", mode="matrix"):
+        for prof in profiles:
+            syms = [s for s in alive[prof.name] if s in p15.index]
+            ok = bias_15m_mat(p15.take(p15.columns(indicator_params(prof.opts), 1), p15.rows(syms)))
+            keep = []
+            for sym, good in zip(syms, ok):
+                if legs[prof.name][sym] == 1 or sym in decided[prof.name] or good:
+                    keep.append(sym)
+                else:
+                    reach(sym, "bias_15m")
+            alive[prof.name] = keep
+
+    # 5m: anti-noise and confirmations
+    p5 = panel(await load(union(), ttf))
+    hits = []
+    with metrics.timer("rules_seconds", mode="matrix"):
+        for prof in profiles:
+            syms = [s for s in alive[prof.name] if s in p5.index]
+            params = indicator_params(prof.opts)
+            k5, k15, _ = tail_rows(prof.opts)
+            c5 = p5.take(p5.columns(params, k5), p5.rows(syms))
+            stage, count, conf = screen_mat(p15.take(p15.columns(params, k15), p15.rows(syms)), c5, cfg, prof.opts)
+            for i, sym in enumerate(syms):
+                if stage[i]:
+                    reach(sym, str(stage[i]))
+                else:
+                    hits.append((sym, prof, signal_at(i, c5, count, conf, cfg)))
+    for sym, prof, res in hits:
         try:
-            vol_usd = float(t.get("volValue", "0"))
+            reach(sym, await dispatch_signal(sym, res, tg, ku, cfg, prof.opts, prof))
         except Exception:
-            vol_usd = 0.0
-        rows.append((sym, vol_usd))
-    rows.sort(key=lambda x: x[1], reverse=True)
-    rows = [s for s,v in rows if v >= min_vol24][:top_n]
-    return rows
-
-async def fetch_df(ku: KucoinClient, symbol: str, tf: str, opts: Dict[str, Any]):
-    kl = await ku.fetch_candles(symbol, tf=tf, limit=300)
-    df = ohlcv_df(kl)
-    df = add_indicators(df, opts)
-    return df
-
-async def scan_once(tg: TelegramNotifier, ku: KucoinClient, cfg: Dict[str, Any], opts: Dict[str, Any]):
-    quote = opts.get("symbols_quote","USDT")
-    topn = int(opts.get("top_n_by_volume", 120))
-    min_vol24 = float(opts.get("min_vol_24h_usd", 5000000))
-    symbols = await build_symbol_universe(ku, quote, topn, min_vol24)
-    STATE["symbols"] = symbols[:]
-    cooldown = int(opts.get("cooldown_minutes", 20)) * 60
-    min_conf = STATE["runtime"]["min_confirms"]
+            metrics.inc("swallowed_exceptions_total", stage="dispatch")
+            reach(sym, "error")
 
+    # new listings: too short a window to stack
+    async def fallback(sym: str):
+        try:
+            reach(sym, await scan_symbol(sym, tg, ku, store, ind, cfg, opts, stream=stream, rolled=rolled, pool=pool,
+                                         ticker=tickers.get(sym), profiles=profiles))
+        except Exception:
+            metrics.inc("swallowed_exceptions_total", stage="scan_symbol")
+            reach(sym, "error")
+    await asyncio.gather(*(fallback(s) for s in short if stages.get(s) != "no_data"))
     for sym in symbols:
+        stages.setdefault(sym, "skipped")
+    return stages
+
+async def dispatch_signal(sym: str, res: Dict[str, Any], tg: TelegramNotifier, ku: KucoinClient, cfg: Dict[str, Any], opts: Dict[str, Any],
+                          profile: Optional[Profile] = None) -> str:
+    # a profile's own min_confirms wins over the runtime /min value
+    prof = profile or Profile(DEFAULT, opts, {}, [])
+    confirms = int(res.get("confirms", len(res.get("reasons", []))))
+    min_confirms = int(prof.overrides.get("min_confirms", STATE["runtime"]["min_confirms"]))
+    if confirms < max(3, min_confirms):
+        return "min_confirms"
+
+    spread_bps = None
+    if bool(opts.get("use_level1_spread", False)):
         try:
-            df5  = await fetch_df(ku, sym, tf=cfg["timeframes"]["trigger_tf"], opts=opts)
-            df15 = await fetch_df(ku, sym, tf=cfg["timeframes"]["setup_tf"],  opts=opts)
-            df1h = await fetch_df(ku, sym, tf=cfg["timeframes"]["bias_tf"],   opts=opts)
-            if df5.empty or df15.empty or df1h.empty:
-                continue
+            # allTickers / ticker-stream snapshot; level1 request only when stale
+            spread_bps = await SPREADS.spread_bps(sym, ku, float(opts.get("spread_max_age_sec", 30)))
+        except Exception:
+            metrics.inc("swallowed_exceptions_total", stage="level1_spread")
+            spread_bps = None
 
-            res = should_signal(df1h, df15, df5, cfg, opts)
-            if res.get("ok"):
-                confirms = int(res.get("confirms", len(res.get("reasons", []))))
-                if confirms < max(3, min_conf):
-                    continue
+    entry = float(res["entry"])
+    adjusted_tps = adjust_tps(entry, cfg["exits"]["tp_levels_pct"], opts, spread_bps)
 
-                spread_bps = None
-                if bool(opts.get("use_level1_spread", False)):
-                    try:
-                        lvl1 = await ku.fetch_level1(sym)
-                        best_ask = float(lvl1.get("bestAsk", 0)); best_bid = float(lvl1.get("bestBid", 0))
-                        if best_ask > 0 and best_bid > 0:
-                            spread_bps = int(((best_ask - best_bid) / best_bid) * 10000)
-                    except Exception:
-                        spread_bps = None
-
-                entry = float(res["entry"])
-                adjusted_tps = adjust_tps(entry, cfg["exits"]["tp_levels_pct"], opts, spread_bps)
-
-                now = time.time()
-                last = STATE["last_signal_ts"].get(sym, 0)
-                last_confirms = STATE["last_confirms"].get(sym, 0)
-
-                if now - last >= cooldown or confirms > last_confirms:
-                    msg = format_signal(sym, res, confirms, adjusted_tps)
-                    await tg.send(msg)
-                    STATE["last_signal_ts"][sym] = now
-                    STATE["last_confirms"][sym] = confirms
-                    STATE["signals_sent"] += 1
-        except Exception:
-            continue
+    cooldown = int(opts.get("cooldown_minutes", 20)) * 60
+    now = time.time()
+    key = prof.key(sym)
+    last = STATE["last_signal_ts"].get(key, 0)
+    last_confirms = STATE["last_confirms"].get(key, 0)
+
+    if now - last >= cooldown or confirms > last_confirms:
+        msg = format_signal(sym, res, confirms, adjusted_tps, prof.name)
+        if prof.chat_ids:
+            # the profile's own chats (build_profiles falls back to the base chat)
+            queued = [get_notifier(opts.get("telegram_token", ""), chat, float(opts.get("telegram_batch_sec", 1))).enqueue(msg)
+                      for chat in prof.chat_ids]
+            queued = any(queued)
+        else:
+            queued = tg.enqueue(msg)
+        if not queued:
+            # no chat took it (not configured / queue full): keep the cooldown
+            # open so the next scan can deliver it
+            return "dropped"
+        STATE["last_signal_ts"][key] = now
+        STATE["last_confirms"][key] = confirms
+        STATE["signals_sent"] += 1
+        JOURNAL.record(sym, prof.name, res, confirms, adjusted_tps, spread_bps, ts=now)
+        st = STATE["profiles"].setdefault(prof.name, {"signals": 0})
+        st["signals"] += 1
+        metrics.inc("signals_sent_total", profile=prof.name)
+        save_cooldowns()
+        return "signal"
+    return "cooldown"
+
+async def scan_once(tg: TelegramNotifier, ku: KucoinClient, store: CandleStore, ind: IndicatorEngine, cfg: Dict[str, Any], opts: Dict[str, Any],
+                    rolled: Optional[Dict[str, bool]] = None, pool: Optional[EvalPool] = None,
+                    universe: Optional[UniverseManager] = None):
+    t0 = time.monotonic()
+    req0 = ku.stats["requests"]
+    if universe is None:
+        universe = make_universe(ku, store, ind, cfg, opts, warm=False)
+    profiles = build_profiles(opts)
+    configure_universe(universe, profiles, opts)
+    # the staged pre-screen and the spread snapshot read ticker prices, so
+    # keep those fresh; the ranking itself only changes once per universe_ttl_sec
+    max_age = float(opts.get("prefilter_ticker_max_age_sec", 30))
+    staged = bool(opts.get("staged_scan", True))
+    spreads = bool(opts.get("use_level1_spread", False))
+    if spreads:
+        max_age = min(max_age, float(opts.get("spread_max_age_sec", 30)))
+    await universe.refresh(max_age=max_age if staged or spreads else None)
+    for prof in profiles:
+        prof.scope(universe.symbols, universe.tickers)
+    symbols = universe.symbols[:]
+    tickers = universe.tickers if universe.ticker_age() <= max_age else {}
+
+    sem = asyncio.Semaphore(max(1, int(opts.get("scan_concurrency", 8))))
+    latencies: List[float] = []
+    stages: Dict[str, int] = {}
+
+    async def run(sym: str):
+        async with sem:
+            ts = time.monotonic()
+            try:
+                stage = await scan_symbol(sym, tg, ku, store, ind, cfg, opts, rolled=rolled, pool=pool,
+                                          ticker=tickers.get(sym), profiles=profiles)
+            except Exception:
+                metrics.inc("swallowed_exceptions_total", stage="scan_symbol")
+                stage = "error"
+            stages[stage] = stages.get(stage, 0) + 1
+            latencies.append(time.monotonic() - ts)
+            metrics.observe("symbol_eval_seconds", latencies[-1], mode="rest")
+            metrics.inc("scan_stage_total", stage=stage)
+            metrics.inc("symbol_evaluations_total", symbol=sym)
+
+    if bool(opts.get("matrix_screen", False)):
+        ts = time.monotonic()
+        for sym, stage in (await matrix_scan(symbols, tg, ku, store, ind, cfg, opts, profiles, tickers, rolled=rolled, pool=pool)).items():
+            stages[stage] = stages.get(stage, 0) + 1
+            metrics.inc("scan_stage_total", stage=stage)
+            metrics.inc("symbol_evaluations_total", symbol=sym)
+        # one pass for the whole universe: the per-symbol latency is its share
+        latencies = [(time.monotonic() - ts) / max(1, len(symbols))] * len(symbols)
+    else:
+        await asyncio.gather(*(run(sym) for sym in symbols))
+    track_signals(store, cfg, opts)
+    try:
+        await store.flush()
+    except Exception:
+        metrics.inc("swallowed_exceptions_total", stage="store_flush")
+
+    metrics.observe("scan_cycle_seconds", time.monotonic() - t0)
+    STATE["scan"] = {
+        "cycles": STATE["scan"].get("cycles", 0) + 1,
+        "cycle_sec": round(time.monotonic() - t0, 3),
+        "symbols": len(symbols),
+        "symbol_latency_ms": {"p50": round(_pct(latencies, 0.5)*1000, 1),
+                              "p95": round(_pct(latencies, 0.95)*1000, 1),
+                              "max": round(max(latencies, default=0.0)*1000, 1)},
+        # where each symbol stopped this cycle (rejections per stage, "signal" = sent)
+        "stages": stages,
+        "profiles": [p.name for p in profiles],
+        "requests": ku.stats["requests"] - req0,
+        "api": dict(ku.stats),
+        "candles": dict(store.stats),
+        "indicators": dict(ind.stats),
+        "universe": dict(universe.stats),
+    }
+
+async def stream_loop(tg: TelegramNotifier, ku: KucoinClient, store: CandleStore, ind: IndicatorEngine, cfg: Dict[str, Any], opts: Dict[str, Any],
+                      pool: Optional[EvalPool] = None, universe: Optional[UniverseManager] = None):
+    tfs = cfg["timeframes"]
+    universe = universe or make_universe(ku, store, ind, cfg, opts, warm=False)
+    stream = KucoinStream(ku, store, [tfs["trigger_tf"], tfs["setup_tf"], tfs["bias_tf"]], tfs["trigger_tf"], spreads=SPREADS)
+    sem = asyncio.Semaphore(max(1, int(opts.get("scan_concurrency", 8))))
+    eval_every = float(opts.get("ws_eval_interval_sec", 5))
+    last_eval: Dict[str, float] = {}
+    next_flush = time.monotonic() + 60
+    latencies: List[float] = []
+    evals = 0
+
+    async def run(sym: str):
+        async with sem:
+            ts = time.monotonic()
+            try:
+                stage = await scan_symbol(sym, tg, ku, store, ind, cfg, opts, stream=stream, pool=pool, profiles=profiles)
+            except Exception:
+                metrics.inc("swallowed_exceptions_total", stage="scan_symbol")
+                stage = "error"
+            latencies.append(time.monotonic() - ts)
+            metrics.observe("symbol_eval_seconds", latencies[-1], mode="ws")
+            metrics.inc("scan_stage_total", stage=stage)
+            metrics.inc("symbol_evaluations_total", symbol=sym)
+
+    try:
+        while True:
+            # latest UI / add-on options for this batch
+            opts = OPTIONS.get(); tg = notifier_for(opts)
+            profiles = build_profiles(opts)
+            try:
+                # no-op until universe_ttl_sec has passed; the stream backfills new symbols itself
+                configure_universe(universe, profiles, opts)
+                added, removed = await universe.refresh()
+                if added or removed or not stream.symbols:
+                    stream.set_symbols(universe.symbols)
+            except Exception:
+                metrics.inc("swallowed_exceptions_total", stage="universe")
+            for prof in profiles:
+                prof.scope(universe.symbols, universe.tickers)
+
+            events = await stream.next_events(timeout=eval_every)
+            now = time.monotonic()
+            due = [sym for sym, closed in events.items() if closed or now - last_eval.get(sym, 0.0) >= eval_every]
+            for sym in due:
+                last_eval[sym] = now
+            latencies = []
+            if len(due) > 1 and bool(opts.get("matrix_screen", False)):
+                ts = time.monotonic()
+                for sym, stage in (await matrix_scan(due, tg, ku, store, ind, cfg, opts, profiles, {}, stream=stream, pool=pool)).items():
+                    metrics.inc("scan_stage_total", stage=stage)
+                    metrics.inc("symbol_evaluations_total", symbol=sym)
+                latencies = [(time.monotonic() - ts) / len(due)] * len(due)
+            else:
+                await asyncio.gather(*(run(sym) for sym in due))
+            evals += len(due)
+            if any(events.values()):
+                track_signals(store, cfg, opts)
+            STATE["scan"] = {
+                "mode": "ws",
+                "evaluations": evals,
+                "last_batch": len(due),
+                "symbols": len(stream.symbols),
+                "symbol_latency_ms": {"p50": round(_pct(latencies, 0.5)*1000, 1),
+                                      "p95": round(_pct(latencies, 0.95)*1000, 1),
+                                      "max": round(max(latencies, default=0.0)*1000, 1)},
+                "api": dict(ku.stats),
+                "stream": dict(stream.stats),
+                "candles": dict(store.stats),
+                "indicators": dict(ind.stats),
+                "universe": dict(universe.stats),
+            }
+            if time.monotonic() >= next_flush:
+                await store.flush()
+                next_flush = time.monotonic() + 60
+    finally:
+        await stream.close()
+
+def track_signals(store: CandleStore, cfg: Dict[str, Any], opts: Dict[str, Any]):
+    # mark TP / SL hits of journalled signals from the bars the scan just cached
+    tf = cfg["timeframes"]["trigger_tf"]
+    try:
+        JOURNAL.track(store, tf, TF_SECONDS[tf], opts)
+    except Exception:
+        metrics.inc("swallowed_exceptions_total", stage="journal_track")
+
+def notifier_for(opts: Dict[str, Any]) -> TelegramNotifier:
+    tg = get_notifier(opts.get("telegram_token",""), opts.get("telegram_chat_id",""),
+                      batch_sec=float(opts.get("telegram_batch_sec", 1)))
+    STATE["telegram"] = tg.stats
+    return tg
 
 async def worker_loop():
-    opts = get_addon_options()
+    # options are re-read from the store every cycle, so UI changes apply on
+    # the next scan; only RESTART_KEYS need a restart
+    opts = OPTIONS.get()
     cfg = load_cfg()
     STATE["cfg"] = cfg
     def_val = int(opts.get("min_confirms", 3))
     STATE["runtime"]["min_confirms"] = load_runtime_min_confirms(def_val)
 
-    tg = TelegramNotifier(opts.get("telegram_token",""), opts.get("telegram_chat_id",""))
-    ku = KucoinClient()
+    tg = notifier_for(opts)
+    ku = KucoinClient(weight_per_window=int(opts.get("kucoin_weight_per_30s", 1600)))
+    store = CandleStore(ku, maxlen=int(opts.get("candle_window", 300)), path=opts.get("candle_store_dir", "/data/candles"),
+                        base_tf=opts.get("resample_base_tf") or None)
+    try:
+        store.load()
+    except Exception:
+        metrics.inc("swallowed_exceptions_total", stage="store_load")
+    load_cooldowns()
+    if opts.get("journal_path", "/data/signals.db"):
+        try:
+            await asyncio.to_thread(JOURNAL.open, opts.get("journal_path", "/data/signals.db"))
+        except Exception:
+            metrics.inc("swallowed_exceptions_total", stage="journal_open")
+    ind = IndicatorEngine(maxlen=store.maxlen)
+    OPTIONS.on_change(options_listener(ind))
+    pool = None
+    if int(opts.get("eval_workers", 0)) > 0:
+        try:
+            pool = EvalPool(int(opts.get("eval_workers", 0)))
+            await pool.start()
+        except Exception:
+            metrics.inc("swallowed_exceptions_total", stage="eval_pool_start")
+            pool = None
+    ws_mode = str(opts.get("market_data_mode", "rest")).lower() == "ws"
+    universe = make_universe(ku, store, ind, cfg, opts, warm=not ws_mode)
 
     await tg.send("✅ KuCoin Spot Signal Bot запущен")
 
-    while True:
+    while ws_mode:
         try:
-            await scan_once(tg, ku, cfg, opts)
-            await asyncio.sleep(60)
+            await stream_loop(tg, ku, store, ind, cfg, opts, pool=pool, universe=universe)
         except Exception:
+            metrics.inc("swallowed_exceptions_total", stage="stream_loop")
             await asyncio.sleep(10)
 
+    if not bool(opts.get("align_to_bar_close", True)):
+        while True:
+            try:
+                opts = OPTIONS.get(); tg = notifier_for(opts)
+                await scan_once(tg, ku, store, ind, cfg, opts, pool=pool, universe=universe)
+                await asyncio.sleep(60)
+            except Exception:
+                metrics.inc("swallowed_exceptions_total", stage="scan_loop")
+                await asyncio.sleep(10)
+
+    tfs = cfg["timeframes"]
+    clock = BarClock(tfs["trigger_tf"], [tfs["trigger_tf"], tfs["setup_tf"], tfs["bias_tf"]],
+                     grace_sec=float(opts.get("bar_close_grace_sec", 3)))
+    rolled = None
+    while True:
+        try:
+            opts = OPTIONS.get(); tg = notifier_for(opts)
+            await scan_once(tg, ku, store, ind, cfg, opts, rolled=rolled, pool=pool, universe=universe)
+        except Exception:
+            metrics.inc("swallowed_exceptions_total", stage="scan_loop")
+        rolled = await clock.wait()
+        STATE["scheduler"] = dict(clock.stats)
+
 async def commands_loop():
-    opts = get_addon_options()
-    tg = TelegramNotifier(opts.get("telegram_token",""), opts.get("telegram_chat_id",""))
     while True:
+        opts = OPTIONS.get()
+        tg = get_notifier(opts.get("telegram_token",""), opts.get("telegram_chat_id",""))
         try:
             updates = await tg.get_updates()
             for upd in updates:
@@ -269,7 +860,8 @@ async def commands_loop():
                         f"min_confirms: {STATE['runtime']['min_confirms']}\n"
                         f"EMA: {opts.get('ema_fast',20)}/{opts.get('ema_mid',50)}/{opts.get('ema_slow',200)}; "
                         f"RSI: {opts.get('rsi_length',14)}; MACD: {opts.get('macd_fast',12)}/{opts.get('macd_slow',26)}/{opts.get('macd_signal',9)}; "
-                        f"RVOL15m_min: {opts.get('rvol15m_min',1.6)}"
+                        f"RVOL15m_min: {opts.get('rvol15m_min',1.6)}\n"
+                        f"Profiles: {', '.join(p.name for p in build_profiles(opts))}"
                     )
                 elif low.startswith("/min"):
                     m = re.findall(r"/min\s+(\d+)", low)
@@ -284,32 +876,16 @@ async def commands_loop():
                     else:
                         await tg.send("Использование: /min 3|4|5")
         except Exception:
-            pass
+            metrics.inc("swallowed_exceptions_total", stage="commands")
         await asyncio.sleep(5)
 
 from fastapi import FastAPI
 app = FastAPI()
 
 
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse
 from fastapi import Request
 
-def read_json(path, default):
-    try:
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return default
-
-def merged_options():
-    opts = get_addon_options()
-    user = read_json('/data/user_config.json', {})
-    merged = opts.copy()
-    merged.update(user)
-    return merged
-
 @app.get("/", response_class=HTMLResponse)
 def ui_root():
     with open('/app/ui.html','r',encoding='utf-8') as f:
@@ -328,7 +904,7 @@ async def api_set_options(req: Request):
 @app.get("/api/ping")
 async def api_ping():
     tg_opts = merged_options()
-    tg = TelegramNotifier(tg_opts.get("telegram_token",""), tg_opts.get("telegram_chat_id",""))
+    tg = get_notifier(tg_opts.get("telegram_token",""), tg_opts.get("telegram_chat_id",""))
     await tg.send("pong")
     return {"ok": True}
 
@@ -340,15 +916,35 @@ async def api_set_min(val: int):
     save_runtime_min_confirms(val)
     await persist_options({'min_confirms': val})
     tg_opts = merged_options()
-    tg = TelegramNotifier(tg_opts.get('telegram_token',''), tg_opts.get('telegram_chat_id',''))
+    tg = get_notifier(tg_opts.get('telegram_token',''), tg_opts.get('telegram_chat_id',''))
     await tg.send(f"✅ min_confirms set to {val} (via UI)")
     return {"ok": True, "min": val}
 
+@app.get("/api/signals")
+async def api_signals(limit: int = 50, before: Optional[int] = None, symbol: Optional[str] = None,
+                      profile: Optional[str] = None, status: Optional[str] = None):
+    # newest first; pass the returned `next` as `before` for the following page
+    try:
+        return await JOURNAL.query(profile=profile, symbol=symbol, status=status, before=before, limit=limit)
+    except ValueError as e:
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=400)
+
+@app.get("/api/signals/stats")
+async def api_signal_stats(profile: Optional[str] = None):
+    return await JOURNAL.outcome_stats(profile)
+
 @app.on_event("startup")
 async def on_startup():
+    OPTIONS.load()
+    STATE["options"] = {"version": OPTIONS.version, "stats": OPTIONS.stats}
+    asyncio.create_task(OPTIONS.watch())
     asyncio.create_task(worker_loop())
     asyncio.create_task(commands_loop())
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health():
-    return {"ok": True, "signals_sent": STATE["signals_sent"], "tracked_symbols": len(STATE.get("symbols", [])), "min_confirms": STATE["runtime"]["min_confirms"]}
+    return {"ok": True, "signals_sent": STATE["signals_sent"], "tracked_symbols": len(STATE.get("symbols", [])), "min_confirms": STATE["runtime"]["min_confirms"], "scan": STATE.get("scan", {}), "scheduler": STATE.get("scheduler", {}), "telegram": STATE.get("telegram", {}), "spreads": STATE.get("spreads", {}), "options": STATE.get("options", {}), "profiles": STATE.get("profiles", {}), "journal": STATE.get("journal", {})}
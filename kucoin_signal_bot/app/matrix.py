@@ -0,0 +1,221 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+from indicators import ATR_LEN, _alpha_span, _alpha_wilder
+
+# Whole-universe screening: the candle windows of every symbol are stacked
+# into (symbols x bars) arrays and the rules run on all rows at once.
+# EMA / MACD / RSI / ATR with pandas' adjust=False recursion are linear in
+# their inputs, so the last r rows of each are one (S x K) @ (K x r) product
+# with a weight operator built once per (params, window length, first bar).
+# Values equal IndicatorState reads over the same window (the batch
+# add_indicators result), and so the warm per-symbol engine a live scan uses,
+# which re-seeds at each window start; bench/bench_matrix.py and
+# tests/test_matrix.py check the decisions against should_signal_np on it.
+
+# windows shorter than this are left to the per-symbol path
+MIN_BARS = 30
+# indicator rows the rules read (MACD histogram slope)
+IND_ROWS = 3
+
+_OPS: Dict[Tuple, np.ndarray] = {}
+
+def _cached(key: Tuple, build) -> np.ndarray:
+    op = _OPS.get(key)
+    if op is None:
+        if len(_OPS) > 512:
+            _OPS.clear()
+        op = _OPS[key] = build()
+    return op
+
+def _ewm_op(alpha: float, k: int, s: int, r: int) -> np.ndarray:
+    # (k x r): x @ op = last r rows of ewm(x[s:], adjust=False), seeded with x[s]
+    def build():
+        f = 1.0 - alpha
+        n = np.arange(k - r, k)[None, :]; j = np.arange(k)[:, None]
+        w = np.where((j > s) & (j <= n), alpha * f ** np.maximum(n - j, 0), 0.0)
+        w[s] = np.where(n[0] >= s, f ** np.maximum(n[0] - s, 0), 0.0)
+        return w
+    return _cached(("ewm", alpha, k, s, r), build)
+
+def _signal_op(params: Tuple, k: int, s: int, r: int) -> np.ndarray:
+    # MACD signal line: ewm over (fast - slow) from the first defined MACD row
+    mfast, mslow, msign = params[1]
+    m0 = s + max(mfast, mslow) - 1
+    def build():
+        macd = _ewm_op(_alpha_span(mfast), k, s, k) - _ewm_op(_alpha_span(mslow), k, s, k)
+        return macd @ _ewm_op(_alpha_span(msign), k, min(m0, k - 1), r)
+    return _cached(("sig", params[1], k, s, r), build)
+
+def _atr_op(k: int, s: int, r: int) -> np.ndarray:
+    # mean of the first ATR_LEN true ranges, then Wilder's recursion; 0 before that
+    def build():
+        f = (ATR_LEN - 1) / float(ATR_LEN)
+        s0 = s + ATR_LEN - 1
+        n = np.arange(k - r, k)[None, :]; j = np.arange(k)[:, None]
+        w = np.where((j > s0) & (j <= n), f ** np.maximum(n - j, 0) / ATR_LEN, 0.0)
+        w[s:s0 + 1] = np.where(n >= s0, f ** np.maximum(n - s0, 0) / ATR_LEN, 0.0)
+        return w
+    return _cached(("atr", k, s, r), build)
+
+class Panel:
+    # Right-aligned (symbols x K) OHLCV arrays; `start` is each row's first
+    # real bar (rows with shorter windows are padded in front). Windows with
+    # fewer than MIN_BARS bars are not stacked and listed in `short`.
+    def __init__(self, windows: Dict[str, Optional[np.ndarray]], k: Optional[int] = None):
+        self.symbols: List[str] = []
+        self.short: List[str] = []
+        rows = []
+        for sym, bars in windows.items():
+            if bars is None or len(bars) < MIN_BARS:
+                self.short.append(sym)
+            else:
+                self.symbols.append(sym); rows.append(bars)
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.k = min(max((len(b) for b in rows), default=0), k or 1 << 30)
+        S, K = len(rows), self.k
+        # one (S x K) array per column
+        a = np.empty((6, S, K))
+        self.start = np.zeros(S, dtype=np.int64)
+        for i, b in enumerate(rows):
+            b = b[-K:]; s = K - len(b)
+            a[:, i, s:] = b.T
+            if s:
+                # padding repeats the first bar with no volume; the operators start at `s`
+                a[:, i, :s] = b[0, :, None]; a[5, i, :s] = 0.0
+                self.start[i] = s
+        self.t, self.o, self.c, self.h, self.l, self.v = a
+        self._cols: Dict[Tuple, Dict[str, np.ndarray]] = {}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def rows(self, symbols: Sequence[str]) -> np.ndarray:
+        return np.array([self.index[s] for s in symbols if s in self.index], dtype=np.int64)
+
+    def columns(self, params: Tuple, r: int) -> Dict[str, np.ndarray]:
+        # every IndicatorState.columns field: OHLCV as the last r rows (S, r),
+        # indicators as the last min(r, IND_ROWS) rows; r is the frame's
+        # rules.tail_rows entry (the trigger frame grows with breakout_lookback_bars)
+        key = (params, r)
+        if key in self._cols:
+            return self._cols[key]
+        S, K = len(self.symbols), self.k
+        r = min(r, K)
+        out = {"t": self.t[:, -r:], "open": self.o[:, -r:], "high": self.h[:, -r:], "low": self.l[:, -r:],
+               "close": self.c[:, -r:], "volume": self.v[:, -r:]}
+        r = min(r, IND_ROWS)
+        emas = tuple(sorted(set(params[0]) | {20, 50, 200}))
+        mfast, mslow, msign = params[1]; rsi_len = params[2]
+        for p in emas:
+            out[f"ema{p}"] = np.empty((S, r))
+        for name in ("mf", "ms", "sig", "up", "dn", "atr"):
+            out[name] = np.empty((S, r))
+        d = np.diff(self.c, axis=1, prepend=self.c[:, :1])
+        up = np.maximum(d, 0.0); dn = np.maximum(-d, 0.0)
+        pc = np.concatenate([self.c[:, :1], self.c[:, :-1]], axis=1)
+        tr = np.fmax(self.h - self.l, np.fmax(np.abs(self.h - pc), np.abs(self.l - pc)))
+        for s in np.unique(self.start):
+            g = self.start == s; s = int(s)
+            c = self.c[g]
+            for p in emas:
+                out[f"ema{p}"][g] = c @ _ewm_op(_alpha_span(p), K, s, r)
+            out["mf"][g] = c @ _ewm_op(_alpha_span(mfast), K, s, r)
+            out["ms"][g] = c @ _ewm_op(_alpha_span(mslow), K, s, r)
+            out["sig"][g] = c @ _signal_op(params, K, s, r)
+            u, w = up[g], dn[g]; u[:, s] = 0.0; w[:, s] = 0.0
+            aw = _alpha_wilder(rsi_len)
+            out["up"][g] = u @ _ewm_op(aw, K, s, r)
+            out["dn"][g] = w @ _ewm_op(aw, K, s, r)
+            x = tr[g]; x[:, s] = (self.h[g] - self.l[g])[:, s]
+            out["atr"][g] = x @ _atr_op(K, s, r)
+        # rows before each indicator is defined are NaN, as in IndicatorState.columns
+        rel = np.arange(K - r, K)[None, :] - self.start[:, None]
+        for p in emas:
+            out[f"ema{p}"][rel < p - 1] = np.nan
+        mf, ms = out.pop("mf"), out.pop("ms")
+        mf[rel < mfast - 1] = np.nan; ms[rel < mslow - 1] = np.nan
+        sig = out.pop("sig"); sig[rel < max(mfast, mslow) - 1 + msign - 1] = np.nan
+        out["macd"] = mf - ms; out["macd_signal"] = sig; out["macd_hist"] = out["macd"] - sig
+        up, dn = out.pop("up"), out.pop("dn")
+        up[rel < rsi_len - 1] = np.nan; dn[rel < rsi_len - 1] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["rsi"] = np.where(dn == 0, 100, 100 - (100 / (1 + up / dn)))
+            cv = np.cumsum(self.v, axis=1)[:, -r:]
+            out["vwap"] = np.where(cv == 0, np.nan, np.cumsum(self.c * self.v, axis=1)[:, -r:] / cv)
+        self._cols[key] = out
+        return out
+
+    def take(self, cols: Dict[str, np.ndarray], rows: np.ndarray) -> Dict[str, np.ndarray]:
+        return {name: x[rows] for name, x in cols.items()}
+
+# --- rules over (S, r) columns, mirroring rules.*_np ------------------------
+
+def bias_1h_mat(c1h: Dict[str, np.ndarray], opts: Dict[str, Any]) -> np.ndarray:
+    # per row: 1 pass, 0 fail, -1 decided by the 15m close vs EMA200 (rules.bias_1h)
+    low = c1h["rsi"][:, -1] < int(opts.get("bias_rsi_min", 50))
+    leg = np.ones(len(low), dtype=np.int8)
+    if bool(opts.get("bias_need_ema_order", True)):
+        leg[~(c1h["ema20"][:, -1] >= c1h["ema50"][:, -1])] = 0
+    leg[low] = -1 if bool(opts.get("bias_allow_price_above_ema200_15m", True)) else 0
+    return leg
+
+def bias_15m_mat(c15: Dict[str, np.ndarray]) -> np.ndarray:
+    return c15["close"][:, -1] >= c15["ema200"][:, -1]
+
+def anti_noise_mat(c5: Dict[str, np.ndarray], opts: Dict[str, Any]) -> np.ndarray:
+    close = c5["close"][:, -1]
+    body = np.abs(close - c5["open"][:, -1])
+    atr = np.nan_to_num(c5["atr"][:, -1], nan=0.0)
+    ok = ~((atr > 0) & (body > float(opts.get("breakout_body_max_atr_mult", 1.8)) * atr))
+    ema200 = c5["ema200"][:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        near = (ema200 > 0) & (np.abs(close - ema200) / ema200 * 100 < float(opts.get("ema200_5m_min_distance_pct", 0.2)))
+    return ok & ~near
+
+def confirmations_mat(c5: Dict[str, np.ndarray], c15: Dict[str, np.ndarray], opts: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    # one boolean column per confirmation, in rules.compute_confirmations order, plus rvol15m
+    close = c5["close"][:, -1]
+    vw = c5["vwap"]
+    dh = np.diff(c5["macd_hist"][:, -3:], axis=1)
+    m, s = c5["macd"], c5["macd_signal"]
+    cross = (m[:, -1] >= s[:, -1]) & (m[:, -2] < s[:, -2])
+    rising = (dh[:, -1] > 0) & (dh[:, -2] > 0) if int(opts.get("macd_hist_rising_bars_min", 2)) >= 2 else dh[:, -1] > 0
+    vol = c15["volume"][:, -20:]
+    sma = vol.mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rvol = np.where((vol[:, -1] != 0) & (sma != 0) & ~np.isnan(sma), vol[:, -1] / sma, 0.0)
+    lbars = int(opts.get("breakout_lookback_bars", 10))
+    return {
+        "ema20": close >= c5["ema20"][:, -1],
+        "vwap": (close >= vw[:, -1]) & (vw[:, -1] - vw[:, -2] > 0),
+        "macd": rising | (bool(opts.get("macd_cross_up_allowed", True)) & cross),
+        "rvol": rvol >= float(opts.get("rvol15m_min", 1.6)),
+        "breakout": close >= c5["high"][:, -lbars:].max(axis=1),
+        "rvol15m": rvol,
+    }
+
+REASONS = (("ema20", "EMA20 reclaim"), ("vwap", "VWAP↑ & price>VWAP"), ("macd", "MACD impulse"),
+           ("rvol", None), ("breakout", "Local high breakout"))
+
+def screen_mat(c15: Dict[str, np.ndarray], c5: Dict[str, np.ndarray], cfg: Dict[str, Any],
+               opts: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    # rules.should_signal_np after the bias step, for every row:
+    # (stage per row: "anti_noise" / "confirms" / "" when it signals, confirmation count, conditions)
+    conf = confirmations_mat(c5, c15, opts)
+    count = sum(conf[k].astype(np.int64) for k, _ in REASONS)
+    stage = np.where(anti_noise_mat(c5, opts), np.where(count >= cfg["trigger"]["confirmations_needed"], "", "confirms"),
+                     "anti_noise")
+    return stage, count, conf
+
+def signal_at(i: int, c5: Dict[str, np.ndarray], count: np.ndarray, conf: Dict[str, np.ndarray],
+              cfg: Dict[str, Any]) -> Dict[str, Any]:
+    # the should_signal_np result for row i
+    rvol = float(conf["rvol15m"][i])
+    reasons = [label or f"RVOL15m {rvol:.2f}" for k, label in REASONS if conf[k][i]]
+    entry = float(c5["close"][i, -1])
+    atr = float(c5["atr"][i, -1]); atr = 0.0 if np.isnan(atr) else atr
+    vwap = float(c5["vwap"][i, -1]); vwap = entry if np.isnan(vwap) else vwap
+    low_recent = float(np.nanmin(c5["low"][i, -10:]))
+    sl = max(min(vwap - 0.5*atr, low_recent - 0.5*atr), 0.0)
+    return {"ok": True, "reasons": reasons, "confirms": int(count[i]), "entry": entry, "sl": sl,
+            "tps": [entry * (1 + x) for x in cfg["exits"]["tp_levels_pct"]], "rvol15m": rvol}
@@ -0,0 +1,101 @@
+import bisect, time
+from contextlib import contextmanager
+from typing import Dict, Tuple, List, Iterator
+
+# Minimal Prometheus text-format registry (no client library needed in the
+# add-on image). Hot paths call observe()/inc()/timer(); /metrics renders.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CYCLE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+HISTOGRAMS: Dict[str, Tuple[str, Tuple[float, ...]]] = {
+    "kucoin_request_seconds": ("KuCoin REST round-trip per request and endpoint (no rate-limit waits)", LATENCY_BUCKETS),
+    "indicator_seconds": ("Indicator computation per frame", LATENCY_BUCKETS),
+    "rules_seconds": ("should_signal evaluation per symbol", LATENCY_BUCKETS),
+    "symbol_eval_seconds": ("Full per-symbol evaluation (fetch, indicators, rules, dispatch)", LATENCY_BUCKETS),
+    "scan_cycle_seconds": ("Full scan cycle duration", CYCLE_BUCKETS),
+    "telegram_send_seconds": ("Telegram sendMessage latency", LATENCY_BUCKETS),
+}
+COUNTERS: Dict[str, str] = {
+    "kucoin_requests_total": "KuCoin REST requests per endpoint",
+    "kucoin_http_errors_total": "KuCoin responses with status >= 400",
+    "kucoin_429_total": "KuCoin 429 responses",
+    "telegram_http_errors_total": "Telegram responses with status >= 400",
+    "telegram_429_total": "Telegram 429 responses",
+    "swallowed_exceptions_total": "Exceptions caught and ignored, per stage",
+    "scan_stage_total": "Symbols stopping at each scan stage",
+    "symbol_evaluations_total": "Evaluations per symbol",
+    "signals_sent_total": "Signals handed to Telegram",
+    "journal_rows_lost_total": "Signal journal rows that could not be written",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class _Hist:
+    __slots__ = ("counts", "sum", "n")
+    def __init__(self, nb: int):
+        self.counts = [0] * nb
+        self.sum = 0.0
+        self.n = 0
+
+_hists: Dict[str, Dict[Labels, _Hist]] = {k: {} for k in HISTOGRAMS}
+_counters: Dict[str, Dict[Labels, float]] = {k: {} for k in COUNTERS}
+
+def _labels(kw: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kw.items()))
+
+def observe(name: str, value: float, **labels):
+    buckets = HISTOGRAMS[name][1]
+    series = _hists[name]
+    key = _labels(labels)
+    h = series.get(key)
+    if h is None:
+        h = series[key] = _Hist(len(buckets))
+    i = bisect.bisect_left(buckets, value)
+    if i < len(buckets):
+        h.counts[i] += 1
+    h.sum += value
+    h.n += 1
+
+def inc(name: str, n: float = 1, **labels):
+    series = _counters[name]
+    key = _labels(labels)
+    series[key] = series.get(key, 0) + n
+
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+def _escape(v: str) -> str:
+    # label values per the text exposition format: \\, \" and \n
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+def render() -> str:
+    out: List[str] = []
+    for name, (help_, buckets) in HISTOGRAMS.items():
+        out.append(f"# HELP {name} {help_}")
+        out.append(f"# TYPE {name} histogram")
+        for labels, h in sorted(_hists[name].items()):
+            acc = 0
+            for b, c in zip(buckets, h.counts):
+                acc += c
+                out.append(f"{name}_bucket{_fmt(labels, (('le', repr(b)),))} {acc}")
+            out.append(f"{name}_bucket{_fmt(labels, (('le', '+Inf'),))} {h.n}")
+            out.append(f"{name}_sum{_fmt(labels)} {h.sum:.6f}")
+            out.append(f"{name}_count{_fmt(labels)} {h.n}")
+    for name, help_ in COUNTERS.items():
+        out.append(f"# HELP {name} {help_}")
+        out.append(f"# TYPE {name} counter")
+        for labels, v in sorted(_counters[name].items()):
+            out.append(f"{name}{_fmt(labels)} {int(v) if float(v).is_integer() else v}")
+    return "\n".join(out) + "\n"
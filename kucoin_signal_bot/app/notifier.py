@@ -1,43 +1,154 @@
-import asyncio
+import asyncio, time
 import httpx
-from typing import Optional, List, Dict, Any
+import metrics
+from typing import Optional, List, Dict, Any, Tuple
+
+# Telegram allows ~1 message/s per chat and 4096 characters per message.
+TG_MIN_INTERVAL = 1.0
+TG_MAX_LEN = 4096
 
 class TelegramNotifier:
-    def __init__(self, token: str, chat_id: str):
+    # One long-lived pooled client per bot. `send` posts right away (command
+    # replies); `enqueue` hands signal texts to a background sender that
+    # coalesces whatever arrives within `batch_sec` into as few messages as
+    # fit, paces them per chat and waits out 429 retry_after.
+    def __init__(self, token: str, chat_id: str, batch_sec: float = 1.0, min_interval: float = TG_MIN_INTERVAL,
+                 max_queue: int = 1000):
         self.token = token.strip()
         self.chat_id = str(chat_id).strip() if chat_id is not None else ""
         self.base = f"https://api.telegram.org/bot{self.token}" if self.token else None
         self._last_update_id = 0
+        self.batch_sec = batch_sec
+        self.min_interval = min_interval
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._sender: Optional[asyncio.Task] = None
+        self._chat_lock = asyncio.Lock()
+        self._last_send = 0.0
+        self.stats = {"sent": 0, "queued": 0, "batches": 0, "retries_429": 0, "dropped": 0, "errors": 0}
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(10, read=20),
+                                             limits=httpx.Limits(max_connections=4, max_keepalive_connections=2))
+        return self._client
+
+    async def _post(self, text: str, retries: int = 3) -> Optional[dict]:
+        payload = {"chat_id": self.chat_id, "text": text}
+        for _ in range(retries + 1):
+            async with self._chat_lock:
+                wait = self._last_send + self.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    with metrics.timer("telegram_send_seconds"):
+                        r = await self.client().post(f"{self.base}/sendMessage", json=payload)
+                finally:
+                    self._last_send = time.monotonic()
+                try:
+                    data = r.json()
+                except Exception:
+                    data = None
+                if r.status_code == 429:
+                    self.stats["retries_429"] += 1
+                    metrics.inc("telegram_429_total")
+                    retry = ((data or {}).get("parameters") or {}).get("retry_after", 1)
+                    # hold the chat lock so nothing else jumps the flood wait
+                    await asyncio.sleep(float(retry))
+                    continue
+                if r.status_code < 400:
+                    self.stats["sent"] += 1
+                else:
+                    self.stats["errors"] += 1
+                    metrics.inc("telegram_http_errors_total", status=r.status_code)
+                return data
+        self.stats["errors"] += 1
+        return None
 
     async def send(self, text: str) -> Optional[dict]:
         if not self.base or not self.chat_id:
             return None
-        url = f"{self.base}/sendMessage"
-        payload = {"chat_id": self.chat_id, "text": text}
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.post(url, json=payload)
-            try:
-                return r.json()
-            except Exception:
-                return None
+        try:
+            return await self._post(text)
+        except Exception:
+            self.stats["errors"] += 1
+            return None
+
+    def enqueue(self, text: str) -> bool:
+        # never blocks the caller; drops (and counts) when the queue is full
+        if not self.base or not self.chat_id:
+            return False
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_loop())
+        try:
+            self._queue.put_nowait(text)
+            self.stats["queued"] += 1
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+
+    @staticmethod
+    def _pack(texts: List[str]) -> List[str]:
+        out: List[str] = []
+        for t in texts:
+            t = t[:TG_MAX_LEN]
+            if out and len(out[-1]) + 2 + len(t) <= TG_MAX_LEN:
+                out[-1] += "\n\n" + t
+            else:
+                out.append(t)
+        return out
+
+    async def _send_loop(self):
+        while True:
+            texts = [await self._queue.get()]
+            deadline = time.monotonic() + self.batch_sec
+            while True:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    texts.append(await asyncio.wait_for(self._queue.get(), left))
+                except asyncio.TimeoutError:
+                    break
+            while not self._queue.empty():
+                texts.append(self._queue.get_nowait())
+            for msg in self._pack(texts):
+                self.stats["batches"] += 1
+                try:
+                    await self._post(msg)
+                except Exception:
+                    self.stats["errors"] += 1
+
+    async def flush(self, timeout: float = 10.0):
+        end = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < end:
+            await asyncio.sleep(0.05)
+
+    async def close(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_updates(self) -> List[Dict[str, Any]]:
         if not self.base:
             return []
         params = {"timeout": 10, "offset": self._last_update_id + 1}
         url = f"{self.base}/getUpdates"
-        async with httpx.AsyncClient(timeout=15) as client:
-            try:
-                r = await client.get(url, params=params)
-                data = r.json()
-                if not data.get("ok"):
-                    return []
-                updates = data.get("result", [])
-                if updates:
-                    self._last_update_id = max(u.get("update_id", 0) for u in updates)
-                return updates
-            except Exception:
+        try:
+            r = await self.client().get(url, params=params, timeout=15)
+            data = r.json()
+            if not data.get("ok"):
                 return []
+            updates = data.get("result", [])
+            if updates:
+                self._last_update_id = max(u.get("update_id", 0) for u in updates)
+            return updates
+        except Exception:
+            return []
 
     @staticmethod
     def parse_command(upd: Dict[str, Any]) -> Optional[str]:
@@ -48,3 +159,16 @@ class TelegramNotifier:
         if not text or not text.startswith("/"):
             return None
         return text
+
+_NOTIFIERS: Dict[Tuple[str, str], TelegramNotifier] = {}
+
+def get_notifier(token: str, chat_id: str, batch_sec: Optional[float] = None) -> TelegramNotifier:
+    # one instance (and connection pool / pacing state) per bot + chat; callers
+    # that pass batch_sec (the signal paths) set the window, lookups keep it
+    key = ((token or "").strip(), str(chat_id or "").strip())
+    tg = _NOTIFIERS.get(key)
+    if tg is None:
+        tg = _NOTIFIERS[key] = TelegramNotifier(key[0], key[1], batch_sec=1.0 if batch_sec is None else batch_sec)
+    elif batch_sec is not None:
+        tg.batch_sec = batch_sec
+    return tg
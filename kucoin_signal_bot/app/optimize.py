@@ -0,0 +1,275 @@
+# Parameter sweep over the rule set.
+#   python optimize.py --data /share/klines --grid grid.json [--random 200] [--workers 4] [--out sweep.csv]
+# grid.json maps option names to lists of candidate values, e.g.
+#   {"rvol15m_min": [1.2, 1.6, 2.0], "macd_fast": [8, 12], "tp_levels_pct": [[0.007, 0.012, 0.02]]}
+# `confirmations_needed` (config.yaml trigger) can be swept as well.
+# Every combination is evaluated as boolean masks over the whole 5m history
+# (bias_ok, anti_noise_checks, compute_confirmations); indicator columns and
+# partial masks are shared between combinations that use the same periods /
+# thresholds. Symbols are spread over worker processes, combinations are
+# ranked by --rank and written to a CSV.
+import argparse, itertools, json, os, random, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from indicators import IndicatorState, indicator_params
+from kucoin_client import TF_SECONDS
+from rules import adjust_tps
+from backtest import (load_klines, list_symbols, load_cfg_opts, simulate_trade, _closed_index,
+                      _window, _bias_mask, _anti_noise_mask)
+
+SWEEP_KEYS = ("bias_rsi_min", "bias_need_ema_order", "bias_allow_price_above_ema200_15m", "rsi_length",
+              "macd_fast", "macd_slow", "macd_signal", "macd_hist_rising_bars_min", "macd_cross_up_allowed",
+              "rvol15m_min", "breakout_lookback_bars", "breakout_body_max_atr_mult",
+              "ema200_5m_min_distance_pct", "min_confirms", "confirmations_needed", "cooldown_minutes",
+              "tp_levels_pct", "taker_fee_bps", "roundtrip_extra_buffer_bps", "min_net_profit_bps")
+
+def _key(o: Dict[str, Any], *names) -> Tuple:
+    return tuple(json.dumps(o.get(n)) for n in names)
+
+class SymbolData:
+    # one symbol's history plus memoised indicator columns and partial masks
+    def __init__(self, symbol: str, data_dir: str, cfg: Dict[str, Any], opts: Dict[str, Any]):
+        tfs = cfg["timeframes"]
+        self.symbol = symbol
+        self.b5 = load_klines(data_dir, symbol, tfs["trigger_tf"])
+        b15 = load_klines(data_dir, symbol, tfs["setup_tf"])
+        b1h = load_klines(data_dir, symbol, tfs["bias_tf"])
+        self.ok = min(len(self.b5), len(b15), len(b1h)) >= 30
+        self._cache: Dict[Tuple, Any] = {}
+        self._trades: Dict[Tuple, Dict[str, Any]] = {}
+        if not self.ok:
+            return
+        self.bars = {"trigger": self.b5, "setup": b15, "bias": b1h}
+        self.t_close = self.b5[:, 0] + TF_SECONDS.get(tfs["trigger_tf"], 300)
+        self.i15 = _closed_index(b15[:, 0], TF_SECONDS.get(tfs["setup_tf"], 900), self.t_close)
+        self.i1h = _closed_index(b1h[:, 0], TF_SECONDS.get(tfs["bias_tf"], 3600), self.t_close)
+        self.a = np.clip(self.i15, 0, None); self.b = np.clip(self.i1h, 0, None)
+        # every column is read on the live candle window ending at the bar
+        # (backtest._window); lagged values keep that window's start
+        self.params = indicator_params(opts)
+        self.win = int(opts.get("candle_window", 300))
+        self.idx = np.arange(len(self.b5))
+        w5 = _window(self.state("trigger", self.params), self.idx, self.win)
+        w15 = _window(self.state("setup", self.params), self.a, self.win)
+        w1h = _window(self.state("bias", self.params), self.b, self.win)
+        self.c = w5["close"]; self.o = w5["open"]; self.h = w5["high"]; self.l = w5["low"]
+        self.atr = w5["atr"]; self.e20 = w5["ema20"]; self.e200 = w5["ema200"]
+        self.c15 = w15["close"]; self.e200_15 = w15["ema200"]
+        self.e20_1h = w1h["ema20"]; self.e50_1h = w1h["ema50"]
+        # VWAP for the bar itself and for the previous bar of the same window (vwap.diff())
+        self.vwap = w5["vwap"]
+        prev = _window(self.state("trigger", self.params), self.idx, self.win, lag=1)["vwap"]
+        self.vwap_prev = np.where(self.idx > np.maximum(self.idx - self.win + 1, 0), prev, np.nan)
+        self.evaluated_base = (self.i15 >= 20) & (self.i1h >= 1)
+
+    def memo(self, key: Tuple, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    # indicator columns, one per distinct period set
+    def state(self, leg: str, params: Tuple) -> IndicatorState:
+        b = self.bars[leg]
+        return self.memo(("state", leg, params), lambda: IndicatorState(params, b, len(b)))
+
+    def rsi1h(self, n: int) -> np.ndarray:
+        p = self.params
+        return self.memo(("rsi", n), lambda: _window(self.state("bias", (p[0], p[1], n)), self.b, self.win)["rsi"])
+
+    def macd5(self, fast: int, slow: int, sig: int) -> List[Dict[str, np.ndarray]]:
+        # macd columns for the bar and the two before it, on the bar's window
+        def calc():
+            st = self.state("trigger", (self.params[0], (fast, slow, sig), self.params[2]))
+            s = np.maximum(self.idx - self.win + 1, 0)
+            out = []
+            for lag in range(3):
+                w = _window(st, self.idx, self.win, lag)
+                out.append({k: np.where(self.idx - lag >= s, w[k], np.nan)
+                            for k in ("macd", "macd_signal", "macd_hist")})
+            return out
+        return self.memo(("macd", fast, slow, sig), calc)
+
+    def rvol15(self) -> np.ndarray:
+        # rolling_rvol(df15.volume[-20:]) at the last closed 15m bar
+        def calc():
+            v = self.bars["setup"][:, 5]
+            out = np.zeros(len(v))
+            if len(v) >= 20:
+                sma = sliding_window_view(v, 20).mean(axis=1)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    r = np.where((v[19:] != 0) & (sma != 0) & ~np.isnan(sma), v[19:] / sma, 0.0)
+                out[19:] = r
+            return out[self.a]
+        return self.memo(("rvol15",), calc)
+
+    def high_max(self, n: int) -> np.ndarray:
+        def calc():
+            out = np.full(len(self.h), np.nan)
+            if len(self.h) >= n:
+                out[n - 1:] = sliding_window_view(self.h, n).max(axis=1)
+            return out
+        return self.memo(("hmax", n), calc)
+
+    # partial masks, keyed by the options they depend on
+    def bias(self, o: Dict[str, Any]) -> np.ndarray:
+        k = ("bias",) + _key(o, "bias_rsi_min", "bias_need_ema_order", "bias_allow_price_above_ema200_15m", "rsi_length")
+        return self.memo(k, lambda: _bias_mask(
+            self.rsi1h(int(o.get("rsi_length", 14))), self.e20_1h, self.e50_1h, self.c15, self.e200_15, o))
+
+    def anti_noise(self, o: Dict[str, Any]) -> np.ndarray:
+        k = ("noise",) + _key(o, "breakout_body_max_atr_mult", "ema200_5m_min_distance_pct")
+        return self.memo(k, lambda: _anti_noise_mask(self.c, self.o, self.atr, self.e200, o))
+
+    def macd_ok(self, o: Dict[str, Any]) -> np.ndarray:
+        k = ("macd_ok",) + _key(o, "macd_fast", "macd_slow", "macd_signal", "macd_hist_rising_bars_min", "macd_cross_up_allowed")
+        def calc():
+            l0, l1, l2 = self.macd5(int(o.get("macd_fast", 12)), int(o.get("macd_slow", 26)), int(o.get("macd_signal", 9)))
+            with np.errstate(invalid="ignore"):
+                d1 = (l0["macd_hist"] - l1["macd_hist"]) > 0
+                d2 = (l1["macd_hist"] - l2["macd_hist"]) > 0
+                cross = (l0["macd"] >= l0["macd_signal"]) & (l1["macd"] < l1["macd_signal"])
+            rising = (d1 & d2) if int(o.get("macd_hist_rising_bars_min", 2)) >= 2 else d1
+            return rising | (cross if bool(o.get("macd_cross_up_allowed", True)) else False)
+        return self.memo(k, calc)
+
+    def confirms(self, o: Dict[str, Any]) -> np.ndarray:
+        k = ("confirms",) + _key(o, "macd_fast", "macd_slow", "macd_signal", "macd_hist_rising_bars_min",
+                                 "macd_cross_up_allowed", "rvol15m_min", "breakout_lookback_bars")
+        def calc():
+            def base():
+                with np.errstate(invalid="ignore"):
+                    return ((self.c >= self.e20).astype(np.int8)
+                            + ((self.c >= self.vwap) & ((self.vwap - self.vwap_prev) > 0)))
+            n = self.memo(("confirms_base",), base).copy()
+            n += self.macd_ok(o)
+            n += self.rvol15() >= float(o.get("rvol15m_min", 1.6))
+            with np.errstate(invalid="ignore"):
+                n += self.c >= self.high_max(int(o.get("breakout_lookback_bars", 10)))
+            return n
+        return self.memo(k, calc)
+
+    def trade(self, i: int, tps: List[float], o: Dict[str, Any], spread_bps: float, max_hold: int) -> Dict[str, Any]:
+        # make_sl_tp on the window the live bot would see; simulations are
+        # shared by every combination that fires on the same bar with the same exits
+        k = (i, tuple(tps), int(o.get("taker_fee_bps", 10)), spread_bps, max_hold)
+        if k not in self._trades:
+            entry = float(self.c[i])
+            atr = 0.0 if np.isnan(self.atr[i]) else float(self.atr[i])
+            vwap = entry if np.isnan(self.vwap[i]) else float(self.vwap[i])
+            low_recent = float(self.l[max(0, i - 9):i + 1].min())
+            sl = max(min(vwap - 0.5 * atr, low_recent - 0.5 * atr), 0.0)
+            self._trades[k] = simulate_trade(self.b5, i, entry, sl, tps, o, spread_bps, max_hold)
+        return self._trades[k]
+
+def run_combo(sd: SymbolData, cfg: Dict[str, Any], o: Dict[str, Any]) -> Dict[str, Any]:
+    lbars = int(o.get("breakout_lookback_bars", 10))
+    k5 = max(lbars, 10, 3) + 1
+    need = int(o.get("confirmations_needed", cfg["trigger"]["confirmations_needed"]))
+    min_conf = max(3, int(o.get("min_confirms", 3)))
+    live = sd.evaluated_base & (np.arange(len(sd.b5)) >= k5)
+    conf = sd.confirms(o)
+    fire = live & sd.bias(o) & sd.anti_noise(o) & (conf >= max(need, min_conf))
+    cooldown = int(o.get("cooldown_minutes", 20)) * 60
+    spread_bps = float(o.get("backtest_spread_bps", o.get("roundtrip_extra_buffer_bps", 5)))
+    max_hold = int(o.get("backtest_max_hold_bars", 288))
+    levels = o.get("tp_levels_pct") or cfg["exits"]["tp_levels_pct"]
+    agg = {"evaluated": int(live.sum()), "signals": 0, "ret_sum": 0.0, "wins": 0, "sl": 0, "timeout": 0,
+           "hits": [0] * len(levels)}
+    last_ts, last_conf = -1e18, 0
+    for i in np.flatnonzero(fire):
+        c = int(conf[i]); now = sd.t_close[i]
+        if not (now - last_ts >= cooldown or c > last_conf):
+            continue
+        last_ts, last_conf = now, c
+        entry = float(sd.c[i])
+        tr = sd.trade(int(i), adjust_tps(entry, levels, o, spread_bps), o, spread_bps, max_hold)
+        agg["signals"] += 1
+        agg["ret_sum"] += tr["ret"]
+        agg["wins"] += tr["ret"] > 0
+        agg["sl"] += tr["outcome"] == "sl"
+        agg["timeout"] += tr["outcome"] == "timeout"
+        for k, h in enumerate(tr["hits"]):
+            agg["hits"][k] += h
+    return agg
+
+def sweep_symbol(args) -> List[Dict[str, Any]]:
+    symbol, data_dir, cfg, opts, combos = args
+    sd = SymbolData(symbol, data_dir, cfg, opts)
+    if not sd.ok:
+        return [None] * len(combos)
+    return [run_combo(sd, cfg, {**opts, **c}) for c in combos]
+
+def build_combos(grid: Dict[str, List[Any]], n_random: int, seed: int) -> List[Dict[str, Any]]:
+    bad = [k for k in grid if k not in SWEEP_KEYS]
+    if bad:
+        raise ValueError(f"not sweepable: {', '.join(bad)}")
+    keys = list(grid)
+    space = 1
+    for k in keys:
+        space *= len(grid[k])
+    if n_random and n_random < space:
+        rng = random.Random(seed); seen = set(); out = []
+        while len(out) < n_random:
+            pick = tuple(rng.randrange(len(grid[k])) for k in keys)
+            if pick not in seen:
+                seen.add(pick); out.append({k: grid[k][j] for k, j in zip(keys, pick)})
+        return out
+    return [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+
+def rank(combos: List[Dict[str, Any]], per_symbol: List[List[Dict[str, Any]]], by: str, min_signals: int) -> pd.DataFrame:
+    rows = []
+    for j, combo in enumerate(combos):
+        parts = [res[j] for res in per_symbol if res[j] is not None]
+        n = sum(p["signals"] for p in parts)
+        row = {k: json.dumps(v) if isinstance(v, list) else v for k, v in combo.items()}
+        row.update({"signals": n, "evaluated": sum(p["evaluated"] for p in parts)})
+        if n:
+            row["expectancy_pct"] = round(sum(p["ret_sum"] for p in parts) / n * 100, 4)
+            row["total_ret_pct"] = round(sum(p["ret_sum"] for p in parts) * 100, 4)
+            row["win_rate"] = round(sum(p["wins"] for p in parts) / n, 4)
+            row["sl_rate"] = round(sum(p["sl"] for p in parts) / n, 4)
+            row["timeout_rate"] = round(sum(p["timeout"] for p in parts) / n, 4)
+            for k in range(len(parts[0]["hits"])):
+                row[f"tp{k+1}_hit_rate"] = round(sum(p["hits"][k] for p in parts) / n, 4)
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    if by not in df:
+        df[by] = np.nan
+    df = df[df["signals"] >= min_signals] if min_signals else df
+    return df.sort_values(by, ascending=by in ("sl_rate", "timeout_rate"), na_position="last").reset_index(drop=True)
+
+def main():
+    ap = argparse.ArgumentParser(description="Grid / random search over rule options")
+    ap.add_argument("--data", required=True, help="directory with <SYMBOL>_<tf>.json|csv files")
+    ap.add_argument("--grid", required=True, help="JSON file: option -> list of values")
+    ap.add_argument("--symbols", default="")
+    ap.add_argument("--options", default="", help="JSON file with base option overrides")
+    ap.add_argument("--random", type=int, default=0, help="sample this many combinations instead of the full grid")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--rank", default="expectancy_pct")
+    ap.add_argument("--min-signals", type=int, default=20)
+    ap.add_argument("--out", default="sweep.csv")
+    a = ap.parse_args()
+
+    cfg, opts = load_cfg_opts(a.options)
+    with open(a.grid, "r", encoding="utf-8") as f:
+        combos = build_combos(json.load(f), a.random, a.seed)
+    symbols = [s for s in a.symbols.split(",") if s] or list_symbols(a.data)
+    t0 = time.time()
+    jobs = [(s, a.data, cfg, opts, combos) for s in symbols]
+    if a.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=a.workers) as ex:
+            per_symbol = list(ex.map(sweep_symbol, jobs))
+    else:
+        per_symbol = [sweep_symbol(j) for j in jobs]
+    df = rank(combos, per_symbol, a.rank, a.min_signals)
+    df.to_csv(a.out, index=False)
+    print(f"{len(combos)} combinations x {len(symbols)} symbols in {time.time() - t0:.1f}s -> {a.out}")
+    print(df.head(10).to_string(index=False))
+
+if __name__ == "__main__":
+    sys.exit(main())
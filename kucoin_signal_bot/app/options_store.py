@@ -0,0 +1,123 @@
+import asyncio, json, os
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# Listener signature: (old, new) merged option dicts.
+OptionsListener = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+def write_json_atomic(path: str, data: Any):
+    # readers never see a half-written file: write a sibling, fsync, rename over
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class OptionsStore:
+    # Add-on options overlaid with the UI's user_config, kept in memory.
+    # `get()` never touches the disk; `watch()` stats both files every
+    # `interval` seconds off the event loop and reloads the ones whose mtime
+    # moved. Each change publishes a new dict (never mutated afterwards), so a
+    # scan cycle that grabbed `get()` keeps one consistent snapshot, and
+    # listeners receive (old, new) to invalidate what depends on them.
+    def __init__(self, addon_path: str, user_path: str, interval: float = 2.0):
+        self.addon_path = addon_path
+        self.user_path = user_path
+        self.interval = interval
+        self.options: Dict[str, Any] = {}
+        self.version = 0
+        self._parts: Dict[str, Dict[str, Any]] = {addon_path: {}, user_path: {}}
+        self._mtimes: Dict[str, Optional[int]] = {addon_path: None, user_path: None}
+        self._listeners: List[OptionsListener] = []
+        self._lock = asyncio.Lock()
+        self.stats = {"reloads": 0, "persists": 0, "errors": 0}
+
+    def on_change(self, fn: OptionsListener):
+        self._listeners.append(fn)
+
+    def get(self) -> Dict[str, Any]:
+        return self.options
+
+    @property
+    def addon(self) -> Dict[str, Any]:
+        return self._parts[self.addon_path]
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self) -> bool:
+        # blocking; True when a file changed and parsed
+        changed = False
+        for path in (self.addon_path, self.user_path):
+            m = self._mtime(path)
+            if m == self._mtimes[path]:
+                continue
+            data: Any = {}
+            if m is not None:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except Exception:
+                    # mid-write by another process: keep the old view, retry next tick
+                    self.stats["errors"] += 1
+                    continue
+            self._mtimes[path] = m
+            self._parts[path] = data if isinstance(data, dict) else {}
+            changed = True
+        return changed
+
+    def _publish(self):
+        new = dict(self._parts[self.addon_path])
+        new.update(self._parts[self.user_path])
+        if new == self.options:
+            return
+        old, self.options = self.options, new
+        self.version += 1
+        for fn in self._listeners:
+            try:
+                fn(old, new)
+            except Exception:
+                pass
+
+    def load(self) -> Dict[str, Any]:
+        # synchronous first read, before the event loop work starts
+        self._read()
+        self._publish()
+        return self.options
+
+    async def refresh(self) -> bool:
+        if not await asyncio.to_thread(self._read):
+            return False
+        self.stats["reloads"] += 1
+        self._publish()
+        return True
+
+    async def watch(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                self.stats["errors"] += 1
+            await asyncio.sleep(self.interval)
+
+    async def persist(self, new_vals: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        # merge into user_config (atomic write off-loop) and publish at once;
+        # returns (merged options, add-on options with the new values)
+        async with self._lock:
+            await self.refresh()
+            user = dict(self._parts[self.user_path])
+            user.update(new_vals or {})
+            def write() -> Optional[int]:
+                write_json_atomic(self.user_path, user)
+                return self._mtime(self.user_path)
+            self._mtimes[self.user_path] = await asyncio.to_thread(write)
+            self._parts[self.user_path] = user
+            self.stats["persists"] += 1
+            self._publish()
+            addon = dict(self._parts[self.addon_path])
+            addon.update(new_vals or {})
+            return self.options, addon
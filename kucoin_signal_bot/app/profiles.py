@@ -0,0 +1,81 @@
+from typing import Dict, Any, List, Optional, Set
+
+DEFAULT = "default"
+
+class Profile:
+    # A named option set evaluated on the shared scan: its options are the
+    # base options with the profile's overrides on top, and its signals go
+    # to its own chats under its own cooldown keys. `members` is its share of
+    # the shared universe once scope() has run.
+    __slots__ = ("name", "opts", "overrides", "chat_ids", "members")
+
+    def __init__(self, name: str, opts: Dict[str, Any], overrides: Dict[str, Any], chat_ids: List[str]):
+        self.name = name
+        self.opts = opts
+        self.overrides = overrides
+        self.chat_ids = chat_ids
+        self.members: Optional[Set[str]] = None
+
+    @property
+    def quote(self) -> str:
+        return str(self.opts.get("symbols_quote", "USDT"))
+
+    def accepts(self, symbol: str, ticker: Optional[Dict[str, Any]] = None) -> bool:
+        # the universe is the union over profiles; narrow it back to this one
+        if not symbol.endswith(f"-{self.quote}"):
+            return False
+        if self.members is not None and symbol not in self.members:
+            return False
+        if ticker:
+            try:
+                return float(ticker.get("volValue") or 0) >= float(self.opts.get("min_vol_24h_usd", 5000000))
+            except Exception:
+                return True
+        return True
+
+    def scope(self, ranked: List[str], tickers: Dict[str, Dict[str, Any]]):
+        # own quote, volume floor and top_n_by_volume cut over the universe
+        # ranking (highest 24h volume first) and its cached tickers, so the
+        # cut also holds where scans get no ticker (stream mode, stale snapshot)
+        self.members = None
+        keep = [s for s in ranked if self.accepts(s, tickers.get(s))]
+        self.members = set(keep[:int(self.opts.get("top_n_by_volume", 120))])
+
+    def key(self, symbol: str) -> str:
+        # cooldown key; the default profile keeps the bare symbol (cooldown.json stays compatible)
+        return symbol if self.name == DEFAULT else f"{self.name}/{symbol}"
+
+def _chats(raw: Dict[str, Any], base: Dict[str, Any]) -> List[str]:
+    ids = raw.get("chat_ids")
+    if isinstance(ids, str):
+        ids = ids.split(",")
+    if not ids:
+        ids = [raw.get("telegram_chat_id", base.get("telegram_chat_id", ""))]
+    return [str(c).strip() for c in ids if str(c).strip()]
+
+def build_profiles(opts: Dict[str, Any]) -> List[Profile]:
+    # `profiles`: [{"name": "fast", "chat_ids": ["-100..."], "min_confirms": 4, ...}]
+    # Without it the add-on runs one "default" profile on the base options.
+    base = {k: v for k, v in opts.items() if k != "profiles"}
+    out: List[Profile] = []
+    seen = set()
+    for i, raw in enumerate(opts.get("profiles") or []):
+        if not isinstance(raw, dict):
+            continue
+        name = str(raw.get("name") or f"profile{i + 1}").strip()
+        if name in seen:
+            continue
+        seen.add(name)
+        over = {k: v for k, v in raw.items() if k not in ("name", "chat_ids")}
+        merged = dict(base); merged.update(over)
+        out.append(Profile(name, merged, over, _chats(raw, base)))
+    if not out:
+        out.append(Profile(DEFAULT, base, {}, _chats({}, base)))
+    return out
+
+def universe_quote(profiles: List[Profile]) -> str:
+    quotes: List[str] = []
+    for p in profiles:
+        if p.quote not in quotes:
+            quotes.append(p.quote)
+    return ",".join(quotes)
@@ -1,4 +1,5 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Optional
+import numpy as np
 import pandas as pd
 from features import rolling_rvol
 
@@ -37,16 +38,23 @@ def anti_noise_checks(df5: pd.DataFrame, opts: Dict[str, Any]) -> bool:
             return False
     return True
 
-def bias_ok(df1h: pd.DataFrame, df15: pd.DataFrame, opts: Dict[str, Any]) -> bool:
+def bias_1h(df1h: pd.DataFrame, opts: Dict[str, Any]) -> Optional[bool]:
+    # the 1h half of bias_ok; None when the answer rides on the 15m close vs EMA200
     if df1h["rsi"].iloc[-1] < int(opts.get("bias_rsi_min", 50)):
         if bool(opts.get("bias_allow_price_above_ema200_15m", True)):
-            return df15["close"].iloc[-1] >= df15["ema200"].iloc[-1]
+            return None
         return False
     if bool(opts.get("bias_need_ema_order", True)):
         if not (df1h["ema20"].iloc[-1] >= df1h["ema50"].iloc[-1]):
             return False
     return True
 
+def bias_ok(df1h: pd.DataFrame, df15: pd.DataFrame, opts: Dict[str, Any]) -> bool:
+    leg = bias_1h(df1h, opts)
+    if leg is None:
+        return df15["close"].iloc[-1] >= df15["ema200"].iloc[-1]
+    return leg
+
 def make_sl_tp(entry: float, df5: pd.DataFrame, cfg: Dict[str, Any]) -> Tuple[float, list]:
     atr = float(df5["atr"].iloc[-1]) if not pd.isna(df5["atr"].iloc[-1]) else 0.0
     vwap = float(df5["vwap"].iloc[-1]) if not pd.isna(df5["vwap"].iloc[-1]) else entry
@@ -58,10 +66,23 @@ def make_sl_tp(entry: float, df5: pd.DataFrame, cfg: Dict[str, Any]) -> Tuple[fl
     tps = [entry * (1 + x) for x in raw]
     return sl, tps
 
-def should_signal(df1h: pd.DataFrame, df15: pd.DataFrame, df5: pd.DataFrame, cfg: Dict[str, Any], opts: Dict[str, Any]) -> Dict[str, Any]:
+def adjust_tps(entry: float, raw_levels, opts: Dict[str, Any], spread_bps: float=None):
+    fee = int(opts.get("taker_fee_bps",10))
+    buffer = int(opts.get("roundtrip_extra_buffer_bps",5))
+    min_net = int(opts.get("min_net_profit_bps",10))
+    cost_bps = 2*fee + (int(spread_bps) if spread_bps is not None else buffer)
+    min_pct = (cost_bps + min_net) / 10000.0
+    result = []
+    for lvl in raw_levels:
+        pct = max(float(lvl), min_pct)
+        result.append(entry*(1.0+pct))
+    return result
+
+def should_signal(df1h: pd.DataFrame, df15: pd.DataFrame, df5: pd.DataFrame, cfg: Dict[str, Any], opts: Dict[str, Any], bias: Optional[bool] = None) -> Dict[str, Any]:
+    # bias: precomputed bias_ok result (cached between 1h/15m bar closes)
     if df5.empty or df15.empty or df1h.empty:
         return {"ok": False, "why": "insufficient data"}
-    if not bias_ok(df1h, df15, opts):
+    if not (bias if bias is not None else bias_ok(df1h, df15, opts)):
         return {"ok": False, "why": "bias filter failed"}
     if not anti_noise_checks(df5, opts):
         return {"ok": False, "why": "anti-noise failed"}
@@ -72,3 +93,103 @@ def should_signal(df1h: pd.DataFrame, df15: pd.DataFrame, df5: pd.DataFrame, cfg
         sl, tps = make_sl_tp(entry, df5, cfg)
         return {"ok": True, "reasons": c["reasons"], "confirms": c["count"], "entry": entry, "sl": sl, "tps": tps, "rvol15m": c["rvol15m"]}
     return {"ok": False, "why": f"only {c['count']} confirmations"}
+
+# --- array path --------------------------------------------------------------
+# Same rules over dicts of NumPy column arrays holding only the last few rows
+# of each frame (IndicatorState.columns / frame_tail). No DataFrame is built
+# and every read is a plain array index; should_signal above stays the
+# reference implementation (bench/bench_rules.py checks they agree).
+
+Tail = Dict[str, np.ndarray]
+
+def tail_rows(opts: Dict[str, Any]) -> Tuple[int, int, int]:
+    # rows of the trigger / setup / bias frames the rules look at
+    lbars = int(opts.get("breakout_lookback_bars", 10))
+    return max(lbars, 10, 3) + 1, 20, 1
+
+def frame_tail(df: pd.DataFrame, k: int) -> Tail:
+    return {c: df[c].to_numpy(dtype=np.float64)[-k:] for c in df.columns if c != "time"}
+
+def _last(x: np.ndarray, default: float = 0.0) -> float:
+    v = float(x[-1])
+    return default if np.isnan(v) else v
+
+def compute_confirmations_np(t5: Tail, t15: Tail, opts: Dict[str, Any]) -> Dict[str, Any]:
+    confirms = 0; reasons = []
+    c = t5["close"]; close = c[-1]
+    if close >= t5["ema20"][-1]:
+        confirms += 1; reasons.append("EMA20 reclaim")
+    vw = t5["vwap"]
+    if close >= vw[-1] and len(vw) >= 2 and vw[-1] - vw[-2] > 0:
+        confirms += 1; reasons.append("VWAP↑ & price>VWAP")
+    dh = np.diff(t5["macd_hist"][-3:])
+    m, s = t5["macd"], t5["macd_signal"]
+    cross_up = len(m) >= 2 and m[-1] >= s[-1] and m[-2] < s[-2]
+    d1 = len(dh) >= 1 and dh[-1] > 0
+    d2 = len(dh) >= 2 and dh[-2] > 0
+    rising_ok = (d1 and d2) if int(opts.get("macd_hist_rising_bars_min", 2)) >= 2 else d1
+    if rising_ok or (bool(opts.get("macd_cross_up_allowed", True)) and cross_up):
+        confirms += 1; reasons.append("MACD impulse")
+    vol = t15["volume"]
+    rvol15 = 0.0
+    if len(vol) >= 20 and vol[-1] != 0:
+        sma = vol[-20:].mean()
+        if sma and not np.isnan(sma):
+            rvol15 = float(vol[-1] / sma)
+    if rvol15 >= float(opts.get("rvol15m_min", 1.6)):
+        confirms += 1; reasons.append(f"RVOL15m {rvol15:.2f}")
+    lbars = int(opts.get("breakout_lookback_bars", 10))
+    if close >= t5["high"][-lbars:].max():
+        confirms += 1; reasons.append("Local high breakout")
+    return {"count": confirms, "reasons": reasons, "rvol15m": rvol15}
+
+def anti_noise_np(t5: Tail, opts: Dict[str, Any]) -> bool:
+    close = t5["close"][-1]
+    body = abs(close - t5["open"][-1])
+    atr = _last(t5["atr"])
+    if atr > 0 and body > float(opts.get("breakout_body_max_atr_mult", 1.8)) * atr:
+        return False
+    ema200 = t5["ema200"][-1]
+    if ema200 > 0:
+        if abs(close - ema200) / ema200 * 100 < float(opts.get("ema200_5m_min_distance_pct", 0.2)):
+            return False
+    return True
+
+def bias_1h_np(t1h: Tail, opts: Dict[str, Any]) -> Optional[bool]:
+    if t1h["rsi"][-1] < int(opts.get("bias_rsi_min", 50)):
+        if bool(opts.get("bias_allow_price_above_ema200_15m", True)):
+            return None
+        return False
+    if bool(opts.get("bias_need_ema_order", True)):
+        if not (t1h["ema20"][-1] >= t1h["ema50"][-1]):
+            return False
+    return True
+
+def bias_ok_np(t1h: Tail, t15: Tail, opts: Dict[str, Any]) -> bool:
+    leg = bias_1h_np(t1h, opts)
+    if leg is None:
+        return bool(t15["close"][-1] >= t15["ema200"][-1])
+    return leg
+
+def make_sl_tp_np(entry: float, t5: Tail, cfg: Dict[str, Any]) -> Tuple[float, list]:
+    atr = _last(t5["atr"])
+    vwap = _last(t5["vwap"], entry)
+    low_recent = float(np.nanmin(t5["low"][-10:]))
+    sl = max(min(vwap - 0.5*atr, low_recent - 0.5*atr), 0.0)
+    return sl, [entry * (1 + x) for x in cfg["exits"]["tp_levels_pct"]]
+
+def should_signal_np(t1h: Tail, t15: Tail, t5: Tail, cfg: Dict[str, Any], opts: Dict[str, Any],
+                     bias: Optional[bool] = None) -> Dict[str, Any]:
+    if not len(t5["close"]) or not len(t15["close"]) or not len(t1h["close"]):
+        return {"ok": False, "why": "insufficient data"}
+    if not (bias if bias is not None else bias_ok_np(t1h, t15, opts)):
+        return {"ok": False, "why": "bias filter failed"}
+    if not anti_noise_np(t5, opts):
+        return {"ok": False, "why": "anti-noise failed"}
+    c = compute_confirmations_np(t5, t15, opts)
+    need = cfg["trigger"]["confirmations_needed"]
+    if c["count"] >= need:
+        entry = float(t5["close"][-1])
+        sl, tps = make_sl_tp_np(entry, t5, cfg)
+        return {"ok": True, "reasons": c["reasons"], "confirms": c["count"], "entry": entry, "sl": sl, "tps": tps, "rvol15m": c["rvol15m"]}
+    return {"ok": False, "why": f"only {c['count']} confirmations"}
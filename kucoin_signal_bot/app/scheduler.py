@@ -0,0 +1,38 @@
+import asyncio, time
+from typing import Dict, Iterable
+from kucoin_client import TF_SECONDS
+
+class BarClock:
+    # Wakes up just after each close of the base timeframe (KuCoin bars are
+    # aligned to UTC epoch multiples) and reports which timeframes rolled over.
+    def __init__(self, base_tf: str, tfs: Iterable[str], grace_sec: float = 3.0):
+        self.step = TF_SECONDS[base_tf]
+        self.tfs = list(tfs)
+        self.grace = grace_sec
+        self.last_boundary = 0.0
+        self.stats = {"wakeups": 0, "skipped": 0, "lag_last_ms": 0.0, "lag_max_ms": 0.0, "lag_avg_ms": 0.0}
+
+    def next_boundary(self, now: float) -> float:
+        return (now // self.step + 1) * self.step
+
+    async def wait(self) -> Dict[str, bool]:
+        now = time.time()
+        nxt = self.next_boundary(now)
+        prev = self.last_boundary or nxt - self.step
+        if self.last_boundary:
+            # boundaries that passed while the previous cycle was still running
+            missed = int(round((nxt - self.last_boundary) / self.step)) - 1
+            if missed > 0:
+                self.stats["skipped"] += missed
+        await asyncio.sleep(max(0.0, nxt + self.grace - now))
+        lag = max(0.0, time.time() - nxt - self.grace) * 1000
+        self.last_boundary = nxt
+        s = self.stats
+        s["wakeups"] += 1
+        s["lag_last_ms"] = round(lag, 1)
+        s["lag_max_ms"] = round(max(s["lag_max_ms"], lag), 1)
+        s["lag_avg_ms"] = round(s["lag_avg_ms"] + (lag - s["lag_avg_ms"]) / s["wakeups"], 1)
+        # a timeframe rolled if any of its boundaries fell in (prev, nxt],
+        # including ones passed while the previous cycle overran
+        return {tf: int(nxt) // TF_SECONDS.get(tf, self.step) > int(prev) // TF_SECONDS.get(tf, self.step)
+                for tf in self.tfs}
@@ -0,0 +1,53 @@
+import time
+from typing import Dict, Any, Tuple, Optional, Iterable, Callable
+from kucoin_client import KucoinClient
+
+class SpreadBook:
+    # Best bid / ask per symbol, fed in bulk from the allTickers payload the
+    # universe already downloads (buy / sell) and from ticker stream pushes.
+    # `spread_bps` serves the snapshot while it is younger than `max_age` and
+    # only then falls back to a level-1 request (which refreshes the entry;
+    # request errors propagate to the caller). `clock` gives the wall-clock
+    # time the snapshot ages against.
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.quotes: Dict[str, Tuple[float, float, float]] = {}
+        self.stats = {"hits": 0, "stale": 0, "level1": 0}
+
+    def update(self, symbol: str, bid: float, ask: float, ts: Optional[float] = None):
+        if bid > 0 and ask > 0:
+            self.quotes[symbol] = (bid, ask, self.clock() if ts is None else ts)
+
+    def ingest(self, rows: Iterable[Dict[str, Any]], ts: Optional[float] = None):
+        ts = self.clock() if ts is None else ts
+        for t in rows:
+            try:
+                self.update(t.get("symbol", ""), float(t.get("buy") or 0), float(t.get("sell") or 0), ts)
+            except Exception:
+                pass
+
+    def retain(self, symbols: Iterable[str]):
+        keep = set(symbols)
+        for sym in [s for s in self.quotes if s not in keep]:
+            del self.quotes[sym]
+
+    def get(self, symbol: str, max_age: float) -> Optional[Tuple[float, float]]:
+        q = self.quotes.get(symbol)
+        if q and self.clock() - q[2] <= max_age:
+            return q[0], q[1]
+        return None
+
+    async def spread_bps(self, symbol: str, ku: KucoinClient, max_age: float = 30.0) -> Optional[int]:
+        q = self.get(symbol, max_age)
+        if q:
+            self.stats["hits"] += 1
+        else:
+            self.stats["stale"] += 1
+            lvl1 = await ku.fetch_level1(symbol)
+            self.stats["level1"] += 1
+            q = (float(lvl1.get("bestBid") or 0), float(lvl1.get("bestAsk") or 0))
+            self.update(symbol, *q)
+        bid, ask = q
+        if bid > 0 and ask > 0:
+            return int(((ask - bid) / bid) * 10000)
+        return None
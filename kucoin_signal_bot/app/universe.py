@@ -0,0 +1,94 @@
+import asyncio, heapq, time
+from typing import Dict, Any, List, Tuple, Callable, Optional
+from kucoin_client import KucoinClient
+from spreads import SpreadBook
+
+# Listener signature: (added, removed), both in rank order.
+UniverseListener = Callable[[List[str], List[str]], None]
+
+class UniverseManager:
+    # Top-N quote pairs by 24h USD volume. allTickers is re-ranked at most once
+    # per `ttl` seconds (partial select, no full sort); `refresh(max_age=...)` may
+    # refetch prices more often without touching the membership. Listeners
+    # get the added / removed symbols so caches can warm up and evict; the
+    # members' buy / sell quotes go to `spreads` on every fetch.
+    def __init__(self, ku: KucoinClient, quote: str = "USDT", top_n: int = 120, min_vol24: float = 5_000_000,
+                 ttl: float = 300.0, spreads: Optional[SpreadBook] = None):
+        self.ku = ku
+        self.quote = quote
+        self.top_n = top_n
+        self.min_vol24 = min_vol24
+        self.ttl = ttl
+        self.spreads = spreads
+        self.symbols: List[str] = []
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        self.ranked_ts = 0.0
+        self.tickers_ts = 0.0
+        self._listeners: List[UniverseListener] = []
+        self._lock = asyncio.Lock()
+        self.stats = {"fetches": 0, "reranks": 0, "added": 0, "removed": 0}
+
+    def on_change(self, fn: UniverseListener):
+        self._listeners.append(fn)
+
+    def configure(self, quote: str, top_n: int, min_vol24: float, ttl: Optional[float] = None):
+        # changed filters force a re-rank on the next refresh
+        if (quote, top_n, min_vol24) != (self.quote, self.top_n, self.min_vol24):
+            self.quote, self.top_n, self.min_vol24 = quote, top_n, min_vol24
+            self.ranked_ts = 0.0
+        if ttl is not None:
+            self.ttl = ttl
+
+    def _rank(self, rows: List[Dict[str, Any]]) -> List[str]:
+        # quote may list several ("USDT,USDC"); volValue is in the quote currency
+        suffix = tuple(f"-{q.strip()}" for q in self.quote.split(",") if q.strip())
+        cand: List[Tuple[float, str]] = []
+        for t in rows:
+            sym = t.get("symbol", "")
+            if not sym.endswith(suffix):
+                continue
+            try:
+                vol_usd = float(t.get("volValue", "0"))
+            except Exception:
+                vol_usd = 0.0
+            if vol_usd >= self.min_vol24:
+                cand.append((vol_usd, sym))
+        return [s for _, s in heapq.nlargest(self.top_n, cand)]
+
+    async def refresh(self, force: bool = False, max_age: Optional[float] = None) -> Tuple[List[str], List[str]]:
+        # max_age: refetch prices if the snapshot is older, re-rank only past the ttl
+        async with self._lock:
+            now = time.monotonic()
+            rerank = force or not self.ranked_ts or now - self.ranked_ts >= self.ttl
+            if not rerank and (max_age is None or self.ticker_age() < max_age):
+                return [], []
+            data = await self.ku.fetch_all_tickers()
+            rows = data.get("data", {}).get("ticker", [])
+            self.stats["fetches"] += 1
+            added: List[str] = []; removed: List[str] = []
+            if rerank:
+                symbols = self._rank(rows)
+                old, new = set(self.symbols), set(symbols)
+                added = [s for s in symbols if s not in old]
+                removed = [s for s in self.symbols if s not in new]
+                self.symbols = symbols
+                self.ranked_ts = now
+                self.stats["reranks"] += 1
+                self.stats["added"] += len(added); self.stats["removed"] += len(removed)
+            keep = set(self.symbols)
+            self.tickers = {t.get("symbol", ""): t for t in rows if t.get("symbol", "") in keep}
+            self.tickers_ts = time.time()
+            if self.spreads is not None:
+                self.spreads.ingest(self.tickers.values(), self.tickers_ts)
+                if removed:
+                    self.spreads.retain(keep)
+        if added or removed:
+            for fn in self._listeners:
+                try:
+                    fn(added, removed)
+                except Exception:
+                    pass
+        return added, removed
+
+    def ticker_age(self) -> float:
+        return time.time() - self.tickers_ts if self.tickers_ts else float("inf")
@@ -0,0 +1,108 @@
+# Equivalence check + benchmark: whole-universe matrix screening (matrix.py)
+# vs the per-symbol path (IndicatorEngine tails + rules.should_signal_np).
+#   python bench/bench_matrix.py [--sizes 50,200,1000] [--cycles 20] [--window 300]
+# Each symbol is a random walk; every cycle appends one 5m bar (and the
+# matching 15m / 1h bars as they close) to all windows, then both paths
+# evaluate the whole universe under a few option sets. Decisions and signal
+# payloads must agree with the per-symbol path on warm (incremental) engine
+# states, which is what a running scan acts on, and with cold states over the
+# same windows. Timings are per cycle.
+import argparse, os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import numpy as np
+from indicators import IndicatorEngine, IndicatorState, indicator_params
+from rules import should_signal_np, bias_ok_np, tail_rows
+from matrix import Panel, bias_1h_mat, bias_15m_mat, screen_mat, signal_at
+from bench_rules import walk, same, CFG, OPTION_SETS
+
+def per_symbol(eng, wins, opts, cold=False):
+    # {sym: result} from the per-symbol path; cold=True builds fresh states instead of the engine's
+    k5, k15, k1h = tail_rows(opts)
+    params = indicator_params(opts)
+    out = {}
+    for sym, (b5, b15, b1h) in wins.items():
+        if cold:
+            t5, t15, t1h = (IndicatorState(params, b, len(b)).columns(len(b), k)
+                            for b, k in ((b5, k5), (b15, k15), (b1h, k1h)))
+        else:
+            t5 = eng.tail(sym, "5m", b5, opts, k5); t15 = eng.tail(sym, "15m", b15, opts, k15)
+            t1h = eng.tail(sym, "1h", b1h, opts, k1h)
+        if not bias_ok_np(t1h, t15, opts):
+            out[sym] = {"ok": False, "why": "bias"}
+            continue
+        out[sym] = should_signal_np(t1h, t15, t5, CFG, opts, bias=True)
+    return out
+
+def matrix(wins, opts):
+    params = indicator_params(opts)
+    k5, k15, _ = tail_rows(opts)
+    syms = list(wins)
+    p1h = Panel({s: wins[s][2] for s in syms})
+    leg = bias_1h_mat(p1h.columns(params, 1), opts)
+    live = [s for s, g in zip(p1h.symbols, leg) if g]
+    p15 = Panel({s: wins[s][1] for s in live})
+    c15 = p15.columns(params, k15)
+    ok15 = bias_15m_mat(c15)
+    keep = [s for s in live if leg[p1h.index[s]] == 1 or ok15[p15.index[s]]]
+    out = {s: {"ok": False, "why": "bias"} for s in syms}
+    p5 = Panel({s: wins[s][0] for s in keep})
+    c5 = p5.columns(params, k5)
+    c15k = p15.take(c15, p15.rows(keep))
+    stage, count, conf = screen_mat(c15k, c5, CFG, opts)
+    for i, s in enumerate(keep):
+        out[s] = signal_at(i, c5, count, conf, CFG) if not stage[i] else \
+                 {"ok": False, "why": "anti-noise failed" if stage[i] == "anti_noise" else f"only {count[i]} confirmations"}
+    return out
+
+def agree(a, b) -> bool:
+    if a.get("ok") or b.get("ok"):
+        return same(a, b)
+    return a["why"].split(" ")[0] == b["why"].split(" ")[0]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="50,200,1000")
+    ap.add_argument("--cycles", type=int, default=20)
+    ap.add_argument("--window", type=int, default=300)
+    a = ap.parse_args()
+    W = a.window
+    bad = checked = signals = 0
+    print(f"{'symbols':>8} {'per-symbol ms':>14} {'matrix ms':>10} {'speedup':>8}")
+    for n in (int(x) for x in a.sizes.split(",")):
+        rng = np.random.default_rng(n)
+        hist = {}
+        for i in range(n):
+            total = W + a.cycles
+            # a few recent listings with short windows
+            short = i % 25 == 0
+            b5 = walk(total, 300, rng)
+            # some bars close at their high, so breakouts (incl. long lookbacks) fire
+            top = rng.random(total) < 0.35
+            b5[top, 2] = b5[top, 3]
+            hist[f"S{i}-USDT"] = (b5, walk(total, 900, rng), walk(total, 3600, rng), short)
+        engines = {j: IndicatorEngine(maxlen=W) for j in range(len(OPTION_SETS))}
+        t_sym = t_mat = 0.0
+        for c in range(a.cycles):
+            wins = {}
+            for sym, (b5, b15, b1h, short) in hist.items():
+                m = 60 if short else W
+                wins[sym] = (b5[c:c + W][-m:], b15[c:c + W][-m:], b1h[c:c + W][-m:])
+            for j, over in enumerate(OPTION_SETS):
+                opts = dict(over)
+                t = time.perf_counter(); ref = per_symbol(engines[j], wins, opts); t_sym += time.perf_counter() - t
+                t = time.perf_counter(); got = matrix(wins, opts); t_mat += time.perf_counter() - t
+                cold = per_symbol(None, wins, opts, cold=True) if c % 5 == 0 else {}
+                for sym in wins:
+                    checked += 1; signals += bool(ref[sym].get("ok"))
+                    for name, r in (("warm", ref.get(sym)), ("cold", cold.get(sym))):
+                        if r is not None and not agree(r, got[sym]):
+                            bad += 1
+                            if bad <= 5:
+                                print(f"  mismatch ({name}) {sym} opts={over}\n    per-symbol={r}\n    matrix    ={got[sym]}")
+        k = a.cycles * len(OPTION_SETS)
+        print(f"{n:>8} {t_sym / k * 1e3:>14.2f} {t_mat / k * 1e3:>10.2f} {t_sym / max(t_mat, 1e-9):>7.1f}x")
+    print(f"decisions checked: {checked}, signals: {signals}, mismatches: {bad}")
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Micro-benchmark: vectorised features.ohlcv_df vs the previous row-wise parser.
+#   python bench/bench_ohlcv.py [--rows 300] [--arrays 360]
+import argparse, os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import pandas as pd
+from features import ohlcv_df, ohlcv_array
+
+def ohlcv_df_rowwise(klines):
+    # the parser as it was before the vectorised fast path
+    if not klines:
+        return pd.DataFrame(columns=["time","open","high","low","close","volume"])
+    rows = []
+    for k in klines:
+        t = int(float(k[0]))
+        rows.append({"time": pd.to_datetime(t, unit="s"),
+                     "open": float(k[1]), "close": float(k[2]),
+                     "high": float(k[3]), "low": float(k[4]),
+                     "volume": float(k[5])})
+    return pd.DataFrame(rows).sort_values("time").reset_index(drop=True)
+
+def make_klines(n: int, t0: int = 1_700_000_000):
+    return [[str(t0 + 300*i), f"{100+i*0.01:.4f}", f"{100.5+i*0.01:.4f}", f"{101+i*0.01:.4f}",
+             f"{99+i*0.01:.4f}", f"{1000+i:.4f}", f"{100000+i:.4f}"] for i in range(n)]
+
+def bench(fn, batch, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for kl in batch:
+            fn(kl)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=300)
+    ap.add_argument("--arrays", type=int, default=360)
+    a = ap.parse_args()
+    batch = [make_klines(a.rows, 1_700_000_000 + i) for i in range(a.arrays)]
+    ref, new = ohlcv_df_rowwise(batch[0]), ohlcv_df(batch[0])
+    assert (ref[["open","high","low","close","volume"]].to_numpy() == new[["open","high","low","close","volume"]].to_numpy()).all()
+    assert (ref["time"].to_numpy() == new["time"].to_numpy()).all()
+    results = [("rowwise ohlcv_df", bench(ohlcv_df_rowwise, batch)),
+               ("vectorised ohlcv_df", bench(ohlcv_df, batch)),
+               ("ohlcv_array only", bench(ohlcv_array, batch))]
+    base = results[0][1]
+    print(f"{a.arrays} arrays x {a.rows} rows")
+    for name, sec in results:
+        print(f"{name:<22} {sec*1000:9.1f} ms/cycle {sec/a.arrays*1e6:9.1f} us/array  x{base/sec:6.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Micro-benchmark: rules.should_signal (pandas frames) vs rules.should_signal_np
+# (last-rows column arrays).
+#   python bench/bench_rules.py [--bars 3000] [--seeds 4] [--windows 2000]
+# Indicators are computed once per random-walk series; every 5m bar is then
+# evaluated by both paths under the option sets of tests/test_rules.py (which
+# asserts their equivalence) and timed; mismatches on these longer series are
+# still counted.
+import argparse, os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import numpy as np
+from features import bars_df, add_indicators
+from rules import should_signal, should_signal_np, tail_rows, frame_tail
+
+CFG = {"trigger": {"confirmations_needed": 1}, "exits": {"tp_levels_pct": [0.006, 0.012, 0.02]}}
+OPTION_SETS = [
+    {},
+    {"macd_cross_up_allowed": False, "macd_hist_rising_bars_min": 1, "rvol15m_min": 1.1},
+    {"bias_allow_price_above_ema200_15m": False, "bias_need_ema_order": False, "breakout_lookback_bars": 4},
+    {"bias_rsi_min": 30, "ema200_5m_min_distance_pct": 0.0, "breakout_body_max_atr_mult": 0.8},
+    {"bias_rsi_min": 30, "breakout_lookback_bars": 40},
+]
+
+def walk(n: int, step: int, rng, t0: int = 1_700_000_000) -> np.ndarray:
+    # ohlcv_array layout: time, open, close, high, low, volume
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.004 * np.sqrt(step / 300), n)))
+    o = np.concatenate([[100.0], c[:-1]])
+    h = np.maximum(o, c) * (1 + np.abs(rng.normal(0, 0.001, n)))
+    l = np.minimum(o, c) * (1 - np.abs(rng.normal(0, 0.001, n)))
+    v = np.abs(rng.normal(1000, 400, n)) * np.where(rng.random(n) < 0.05, 4, 1)
+    return np.column_stack([t0 + step * np.arange(n), o, c, h, l, v]).astype(np.float64)
+
+def same(a, b) -> bool:
+    if a.keys() != b.keys():
+        return False
+    for k in a:
+        x, y = a[k], b[k]
+        if isinstance(x, list) and x and isinstance(x[0], float):
+            if not np.allclose(x, y, rtol=1e-12, atol=0):
+                return False
+        elif isinstance(x, float):
+            # rolling().mean() and ndarray.mean() may differ in the last ulp
+            if not np.isclose(x, y, rtol=1e-12, atol=0):
+                return False
+        elif k == "reasons":
+            # the RVOL reason carries a 2-decimal rendering of rvol15m
+            if [r.split(" ")[0] for r in x] != [r.split(" ")[0] for r in y]:
+                return False
+        elif x != y:
+            return False
+    return True
+
+def check_rules(b5, b15, b1h, windows: int):
+    checked = mismatched = signals = 0
+    t_pd = t_np = 0.0
+    for over in OPTION_SETS:
+        opts = dict(over)
+        k5, k15, k1h = tail_rows(opts)
+        d5, d15, d1h = (add_indicators(bars_df(b), opts) for b in (b5, b15, b1h))
+        c5, c15, c1h = (frame_tail(d, len(d)) for d in (d5, d15, d1h))
+        for i in range(len(d5) - windows, len(d5)):
+            a, b = (i + 1) // 3, (i + 1) // 12      # bars of the coarser frames closed with 5m bar i
+            f5, f15, f1h = d5.iloc[:i + 1], d15.iloc[:a], d1h.iloc[:b]
+            t = time.perf_counter()
+            ref = should_signal(f1h, f15, f5, CFG, opts)
+            t_pd += time.perf_counter() - t
+            t = time.perf_counter()
+            s5 = {c: x[max(0, i + 1 - k5):i + 1] for c, x in c5.items()}
+            s15 = {c: x[max(0, a - k15):a] for c, x in c15.items()}
+            s1h = {c: x[max(0, b - k1h):b] for c, x in c1h.items()}
+            got = should_signal_np(s1h, s15, s5, CFG, opts)
+            t_np += time.perf_counter() - t
+            checked += 1; signals += bool(ref.get("ok"))
+            if not same(ref, got):
+                mismatched += 1
+                if mismatched <= 5:
+                    print(f"  mismatch opts={over} bar={i}\n    pandas={ref}\n    numpy ={got}")
+    return checked, mismatched, signals, t_pd, t_np
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=3000, help="5m bars per series")
+    ap.add_argument("--seeds", type=int, default=4)
+    ap.add_argument("--windows", type=int, default=2000, help="5m bars evaluated per series and option set")
+    a = ap.parse_args()
+    total = bad = ok = 0
+    t_pd = t_np = 0.0
+    for seed in range(a.seeds):
+        rng = np.random.default_rng(seed)
+        b5, b15, b1h = walk(a.bars, 300, rng), walk(a.bars // 3, 900, rng), walk(a.bars // 12, 3600, rng)
+        n, m, s, tp, tn = check_rules(b5, b15, b1h, min(a.windows, a.bars - 300))
+        total += n; bad += m; ok += s; t_pd += tp; t_np += tn
+    print(f"evaluations:     {total}")
+    print(f"signals (ok):    {ok}")
+    print(f"mismatches:      {bad}")
+    print(f"should_signal    {t_pd / total * 1e6:8.1f} us/eval")
+    print(f"should_signal_np {t_np / total * 1e6:8.1f} us/eval   ({t_pd / max(t_np, 1e-9):.1f}x)")
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
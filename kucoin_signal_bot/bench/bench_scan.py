@@ -0,0 +1,353 @@
+# Scan-pipeline benchmark on recorded KuCoin responses.
+#   record:  python bench/bench_scan.py record --symbols 50 --out bench/fixtures
+#   synth:   python bench/bench_scan.py synth --symbols 50 --out bench/fixtures   (offline stand-in data)
+#   run:     python bench/bench_scan.py run [--fixtures bench/fixtures] [--sizes 50,500,2000]
+#            [--save-baseline] [--baseline bench/baseline.json] [--threshold 0.25] [--seed 0]
+# Fixtures are the raw REST payloads (allTickers.json, candles/<SYM>_<type>.json,
+# level1/<SYM>.json). They are not committed: `run` synthesises them from --seed
+# when the directory is empty, byte for byte the same on every machine, and the
+# baseline stores a digest of the fixtures it was measured on; a baseline from
+# other fixtures (a recording, another seed) is reported, not compared. `run`
+# serves them through a MockTransport behind the real KucoinClient, so parsing,
+# rate limiting and the store code are all exercised; universes larger than
+# the recording reuse recorded series under alias names.
+# It times ohlcv_df, add_indicators, should_signal(_np) and full scan_once cycles
+# (cold store, then a warm bar-close cycle), reports throughput, latency
+# percentiles and tracemalloc peak memory, and diffs against a stored baseline.
+import argparse, asyncio, hashlib, json, os, platform, sys, tempfile, time, tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import numpy as np
+import httpx
+import yaml
+import pandas as pd
+from kucoin_client import KucoinClient, TF_MAP, TF_SECONDS
+from features import ohlcv_df, add_indicators
+from rules import should_signal, should_signal_np, tail_rows, frame_tail
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, "..", "app")
+TFS = ("5m", "15m", "1h")
+# synthetic series end here; FixtureMarket shifts every series to the current bar
+SYNTH_END = 1_700_002_800
+
+def load_cfg_opts():
+    with open(os.path.join(APP_DIR, "config.yaml"), "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    with open(os.path.join(BENCH_DIR, "..", "config.json"), "r", encoding="utf-8") as f:
+        opts = json.load(f)["options"]
+    return cfg, opts
+
+def _dump(path: str, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, separators=(",", ":"))
+
+async def record(n: int, out: str, quote: str = "USDT"):
+    ku = KucoinClient()
+    tickers = await ku.fetch_all_tickers()
+    _dump(os.path.join(out, "allTickers.json"), tickers)
+    rows = [t for t in tickers["data"]["ticker"] if t.get("symbol", "").endswith(f"-{quote}")]
+    rows.sort(key=lambda t: float(t.get("volValue") or 0), reverse=True)
+    for t in rows[:n]:
+        sym = t["symbol"]
+        for tf in TFS:
+            r = await ku._get("/api/v1/market/candles", {"symbol": sym, "type": TF_MAP[tf]})
+            _dump(os.path.join(out, "candles", f"{sym}_{TF_MAP[tf]}.json"), r.json())
+        r = await ku._get("/api/v1/market/orderbook/level1", {"symbol": sym})
+        _dump(os.path.join(out, "level1", f"{sym}.json"), r.json())
+    await ku.close()
+    print(f"recorded {min(n, len(rows))} symbols to {out}")
+
+def synth(n: int, out: str, bars: int = 1500, seed: int = 0):
+    # random walks in the exact REST payload shapes, for machines without network access
+    rng = np.random.default_rng(seed)
+    end = SYNTH_END
+    ticker = []
+    for i in range(n):
+        sym = f"SYN{i}-USDT"
+        for tf in TFS:
+            step = TF_SECONDS[tf]
+            r = rng.normal(0.0, 0.004 * np.sqrt(step / 300), bars)
+            c = 100 * np.exp(np.cumsum(r)); o = np.concatenate([[100.0], c[:-1]])
+            h = np.maximum(o, c) * (1 + np.abs(rng.normal(0, 0.0015, bars)))
+            l = np.minimum(o, c) * (1 - np.abs(rng.normal(0, 0.0015, bars)))
+            v = np.abs(rng.normal(1000, 400, bars)) * np.where(rng.random(bars) < 0.03, 4, 1)
+            t = end - step * np.arange(bars)[::-1]
+            data = [[str(int(t[k])), f"{o[k]:.8f}", f"{c[k]:.8f}", f"{h[k]:.8f}", f"{l[k]:.8f}",
+                     f"{v[k]:.4f}", f"{v[k]*c[k]:.4f}"] for k in range(bars)][::-1]
+            _dump(os.path.join(out, "candles", f"{sym}_{TF_MAP[tf]}.json"), {"code": "200000", "data": data})
+            if tf == "5m":
+                last = c[-1]
+        _dump(os.path.join(out, "level1", f"{sym}.json"),
+              {"code": "200000", "data": {"bestBid": f"{last*0.9995:.8f}", "bestAsk": f"{last*1.0005:.8f}"}})
+        ticker.append({"symbol": sym, "volValue": str(1e9 / (i + 1)), "last": f"{last:.8f}",
+                       "changeRate": f"{rng.normal(0, 0.03):.4f}", "vol": "1000"})
+    _dump(os.path.join(out, "allTickers.json"), {"code": "200000", "data": {"time": end * 1000, "ticker": ticker}})
+    print(f"wrote {n} synthetic symbols to {out}")
+
+def fixture_digest(path: str) -> str:
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            fn = os.path.join(root, name)
+            h.update(os.path.relpath(fn, path).encode())
+            with open(fn, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+class FixtureMarket:
+    # in-memory replay of the fixture directory, widened to `size` symbols
+    def __init__(self, path: str, size: int, latency_ms: float = 0.0):
+        with open(os.path.join(path, "allTickers.json"), "r", encoding="utf-8") as f:
+            tick = json.load(f)["data"]["ticker"]
+        recorded = sorted({name.rsplit("_", 1)[0] for name in os.listdir(os.path.join(path, "candles"))})
+        if not recorded:
+            raise SystemExit(f"no candle fixtures in {path}")
+        by_sym = {t["symbol"]: t for t in tick}
+        self.candles = {}
+        for sym in recorded:
+            for tf in TFS:
+                with open(os.path.join(path, "candles", f"{sym}_{TF_MAP[tf]}.json"), "r", encoding="utf-8") as f:
+                    self.candles[(sym, TF_MAP[tf])] = json.load(f)["data"]
+        self.level1 = {}
+        for sym in recorded:
+            fn = os.path.join(path, "level1", f"{sym}.json")
+            if os.path.exists(fn):
+                with open(fn, "r", encoding="utf-8") as f:
+                    self.level1[sym] = json.load(f)["data"]
+        # alias k maps onto recorded series k % len(recorded)
+        self.alias = {}
+        rows = []
+        for k in range(size):
+            src = recorded[k % len(recorded)]
+            sym = src if k < len(recorded) else f"{src.split('-')[0]}X{k}-{src.split('-')[1]}"
+            self.alias[sym] = src
+            row = dict(by_sym.get(src, {"symbol": src}))
+            row.update({"symbol": sym, "volValue": str(1e12 / (k + 1))})
+            rows.append(row)
+        self.tickers = {"code": "200000", "data": {"time": int(time.time() * 1000), "ticker": rows}}
+        # replayed bars end at the current bar, like a live market; full
+        # responses are encoded once so the stand-in costs little per request
+        self.series = {}
+        for (sym, tag), data in self.candles.items():
+            step = TF_SECONDS[next(tf for tf, t in TF_MAP.items() if t == tag)]
+            shift = (int(time.time()) // step * step) - int(data[0][0])
+            rows = [[str(int(r[0]) + shift)] + r[1:] for r in data[:1500]]
+            times = np.array([int(r[0]) for r in rows])
+            full = json.dumps({"code": "200000", "data": rows}, separators=(",", ":")).encode()
+            self.series[(sym, tag)] = (rows, times, full)
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+
+    async def handler(self, req: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        p = req.url.path; q = req.url.params
+        if p.endswith("allTickers"):
+            return httpx.Response(200, json=self.tickers)
+        if p.endswith("candles"):
+            ser = self.series.get((self.alias.get(q["symbol"]), q["type"]))
+            if ser is None:
+                return httpx.Response(200, json={"code": "200000", "data": []})
+            rows, times, full = ser
+            if "startAt" not in q and "endAt" not in q:
+                return httpx.Response(200, content=full, headers={"content-type": "application/json"})
+            start = int(q.get("startAt", 0)); end = int(q.get("endAt", 0) or 1 << 62)
+            sel = [rows[i] for i in np.flatnonzero((times >= start) & (times < end))]
+            return httpx.Response(200, json={"code": "200000", "data": sel})
+        if p.endswith("level1"):
+            return httpx.Response(200, json={"code": "200000", "data": self.level1.get(self.alias.get(q["symbol"]), {})})
+        return httpx.Response(404)
+
+    def client(self) -> KucoinClient:
+        ku = KucoinClient(weight_per_window=10**9)
+        ku._http = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return ku
+
+class NullNotifier:
+    def __init__(self):
+        self.sent = 0
+    def enqueue(self, text):
+        self.sent += 1
+        return True
+    async def send(self, text):
+        self.sent += 1
+
+def _summary(lat, total=None, peak=None):
+    lat = np.asarray(lat, dtype=np.float64)
+    total = float(lat.sum()) if total is None else total
+    out = {"n": int(len(lat)), "total_s": round(total, 4), "ops_per_s": round(len(lat) / total, 1) if total else 0.0,
+           "p50_ms": round(float(np.percentile(lat, 50)) * 1000, 3),
+           "p95_ms": round(float(np.percentile(lat, 95)) * 1000, 3),
+           "p99_ms": round(float(np.percentile(lat, 99)) * 1000, 3)}
+    if peak is not None:
+        out["peak_mb"] = round(peak / 2**20, 2)
+    return out
+
+def _peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_stages(market: FixtureMarket, cfg, opts, limit: int = 300):
+    klines = {}
+    for (sym, tag), data in market.candles.items():
+        klines[(sym, tag)] = data[:limit]
+    keys = list(klines)
+    res = {}
+
+    lat = []
+    for k in keys:
+        t = time.perf_counter(); ohlcv_df(klines[k]); lat.append(time.perf_counter() - t)
+    res["ohlcv_df"] = _summary(lat, peak=_peak(lambda: [ohlcv_df(klines[k]) for k in keys]))
+
+    frames = {k: ohlcv_df(klines[k]) for k in keys}
+    lat = []
+    out = {}
+    for k in keys:
+        df = frames[k].copy()
+        t = time.perf_counter(); out[k] = add_indicators(df, opts); lat.append(time.perf_counter() - t)
+    res["add_indicators"] = _summary(lat, peak=_peak(lambda: [add_indicators(frames[k].copy(), opts) for k in keys]))
+
+    syms = sorted({s for s, _ in keys})
+    triples = [(out[(s, TF_MAP["1h"])], out[(s, TF_MAP["15m"])], out[(s, TF_MAP["5m"])]) for s in syms]
+    lat = []
+    for d1, d15, d5 in triples:
+        t = time.perf_counter(); should_signal(d1, d15, d5, cfg, opts); lat.append(time.perf_counter() - t)
+    res["should_signal"] = _summary(lat, peak=_peak(lambda: [should_signal(*tr, cfg, opts) for tr in triples]))
+
+    k5, k15, k1h = tail_rows(opts)
+    tails = [(frame_tail(d1, k1h), frame_tail(d15, k15), frame_tail(d5, k5)) for d1, d15, d5 in triples]
+    lat = []
+    for tr in tails:
+        t = time.perf_counter(); should_signal_np(*tr, cfg, opts); lat.append(time.perf_counter() - t)
+    res["should_signal_np"] = _summary(lat, peak=_peak(lambda: [should_signal_np(*tr, cfg, opts) for tr in tails]))
+    return res
+
+async def _scan_pass(market: FixtureMarket, cfg, opts, size: int, trace: bool):
+    # one cold cycle (empty store) then one warm bar-close cycle on the same caches
+    import main
+    from candle_store import CandleStore
+    from indicators import IndicatorEngine
+    main.STATE["cfg"] = cfg
+    main.COOLDOWN_PATH = os.path.join(tempfile.gettempdir(), "bench_cooldown.json")
+    o = dict(opts, top_n_by_volume=size, min_vol_24h_usd=0, use_level1_spread=True)
+    ku = market.client()
+    store = CandleStore(ku, maxlen=int(o.get("candle_window", 300)))
+    ind = IndicatorEngine(maxlen=store.maxlen)
+    universe = main.make_universe(ku, store, ind, cfg, o, warm=False)
+    out = {}
+    for label, rolled in (("cold", None), ("warm", {"5m": True, "15m": False, "1h": False})):
+        main.STATE["last_signal_ts"].clear(); main.STATE["last_confirms"].clear()
+        r0 = market.requests
+        if trace:
+            tracemalloc.start()
+        t = time.perf_counter()
+        await main.scan_once(NullNotifier(), ku, store, ind, cfg, o, rolled=rolled, universe=universe)
+        total = time.perf_counter() - t
+        if trace:
+            out[label] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            out[label] = (total, dict(main.STATE["scan"]), market.requests - r0)
+    await ku.close()
+    return out
+
+async def bench_scan(market: FixtureMarket, cfg, opts, size: int):
+    timed = await _scan_pass(market, cfg, opts, size, trace=False)
+    # tracemalloc slows allocation-heavy code, so memory gets its own pass
+    peaks = await _scan_pass(market, cfg, opts, size, trace=True)
+    res = {}
+    for label, (total, sc, requests) in timed.items():
+        lat = sc["symbol_latency_ms"]
+        res[f"scan_once_{label}@{size}"] = {
+            "n": sc["symbols"], "total_s": round(total, 4), "ops_per_s": round(sc["symbols"] / total, 1),
+            "p50_ms": lat["p50"], "p95_ms": lat["p95"], "max_ms": lat["max"],
+            "peak_mb": round(peaks[label] / 2**20, 2), "requests": requests, "stages": sc.get("stages", {})}
+    return res
+
+def compare(cur, base, threshold: float):
+    regressions = []
+    print(f"\n{'benchmark':<26}{'p50 ms':>10}{'base':>10}{'Δ':>8}  {'ops/s':>10}{'base':>10}{'Δ':>8}  {'peak MB':>8}")
+    for name, r in cur.items():
+        b = base.get(name, {})
+        def d(key, inverse=False):
+            if not b.get(key) or not r.get(key):
+                return None
+            return (b[key] / r[key] - 1) if inverse else (r[key] / b[key] - 1)
+        dp, dt = d("p50_ms"), d("ops_per_s", inverse=True)
+        flag = ""
+        worst = max([x for x in (dp, dt) if x is not None], default=None)
+        if worst is not None and worst > threshold:
+            flag = "  REGRESSION"; regressions.append(name)
+        fmt = lambda x: f"{x*100:+7.1f}%" if x is not None else "       -"
+        print(f"{name:<26}{r['p50_ms']:>10.3f}{b.get('p50_ms', float('nan')):>10.3f}{fmt(dp)}  "
+              f"{r['ops_per_s']:>10.1f}{b.get('ops_per_s', float('nan')):>10.1f}{fmt(dt)}  {r.get('peak_mb', 0):>8.2f}{flag}")
+    return regressions
+
+def run(a):
+    if not os.path.isdir(os.path.join(a.fixtures, "candles")):
+        synth(50, a.fixtures, seed=a.seed)
+    digest = fixture_digest(a.fixtures)
+    cfg, opts = load_cfg_opts()
+    sizes = [int(x) for x in a.sizes.split(",") if x]
+    results = bench_stages(FixtureMarket(a.fixtures, max(sizes), a.latency_ms), cfg, opts)
+    for size in sizes:
+        results.update(asyncio.run(bench_scan(FixtureMarket(a.fixtures, size, a.latency_ms), cfg, opts, size)))
+    meta = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(), "when": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "fixtures": digest, "seed": a.seed}
+    print(json.dumps({"meta": meta, "results": results}, indent=1, ensure_ascii=False))
+    if a.save_baseline:
+        with open(a.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=1, ensure_ascii=False)
+        print(f"baseline saved to {a.baseline}")
+        return 0
+    if os.path.exists(a.baseline):
+        with open(a.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        bm = base.get("meta", {})
+        print(f"baseline from {bm.get('when', '?')} ({bm.get('machine', '?')}, {bm.get('cpus', '?')} cpus)")
+        if bm.get("fixtures") != digest:
+            print(f"baseline was measured on other fixtures ({bm.get('fixtures', 'unknown')}, here {digest}); "
+                  f"not comparing. Rebuild it here: empty {a.fixtures}, then run --seed {bm.get('seed', 0)} --save-baseline")
+            return 0
+        if bm.get("cpus") != os.cpu_count() or bm.get("machine") != platform.machine():
+            print("note: baseline comes from a different machine; timings are only indicative")
+        bad = compare(results, base.get("results", {}), a.threshold)
+        if bad:
+            print(f"\n{len(bad)} regression(s) over {a.threshold*100:.0f}%: {', '.join(bad)}")
+            return 1 if a.fail_on_regression else 0
+    return 0
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("record"); r.add_argument("--symbols", type=int, default=50)
+    r.add_argument("--out", default=os.path.join(BENCH_DIR, "fixtures"))
+    s = sub.add_parser("synth"); s.add_argument("--symbols", type=int, default=50)
+    s.add_argument("--out", default=os.path.join(BENCH_DIR, "fixtures")); s.add_argument("--seed", type=int, default=0)
+    b = sub.add_parser("run")
+    b.add_argument("--fixtures", default=os.path.join(BENCH_DIR, "fixtures"))
+    b.add_argument("--sizes", default="50,500,2000")
+    b.add_argument("--latency-ms", type=float, default=0.0, help="simulated network latency per request")
+    b.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    b.add_argument("--save-baseline", action="store_true")
+    b.add_argument("--threshold", type=float, default=0.25, help="relative slowdown reported as a regression")
+    b.add_argument("--fail-on-regression", action="store_true")
+    b.add_argument("--seed", type=int, default=0, help="synth seed used when the fixture directory is empty")
+    a = ap.parse_args()
+    if a.cmd == "record":
+        asyncio.run(record(a.symbols, a.out))
+    elif a.cmd == "synth":
+        synth(a.symbols, a.out, seed=a.seed)
+    else:
+        return run(a)
+
+if __name__ == "__main__":
+    sys.exit(main())
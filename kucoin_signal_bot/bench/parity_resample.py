@@ -0,0 +1,138 @@
+# Parity checks for local multi-timeframe resampling (features.resample_bars,
+# CandleStore with base_tf).
+#   recorded:  python bench/parity_resample.py recorded [--fixtures bench/fixtures] [--base 5m]
+#   replay:    python bench/parity_resample.py replay [--fixtures bench/fixtures] [--base 5m] [--steps 600]
+# `recorded` aggregates each recorded base series and compares it with the
+# 15m / 1h candles KuCoin returned for the same symbol (needs fixtures from
+# `bench_scan.py record`; the forming bar is reported separately since the
+# files are fetched a few hundred ms apart). `replay` walks a base series bar
+# by bar through a CandleStore fed by a fake exchange that aggregates with
+# pandas, and checks every derived window, forming bar included, after each
+# step; it also counts the requests the store made (base_fresh_sec=0 here,
+# so every base update is a request).
+import argparse, asyncio, glob, json, os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import numpy as np
+import pandas as pd
+from kucoin_client import TF_MAP, TF_SECONDS
+from features import ohlcv_array, resample_bars
+from candle_store import CandleStore
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DERIVED = ("15m", "1h")
+
+def pandas_resample(bars: np.ndarray, step: int) -> np.ndarray:
+    # independent reference: pandas resample with KuCoin's epoch-aligned, left-labelled buckets
+    df = pd.DataFrame(bars[:, 1:], columns=["open", "close", "high", "low", "volume"],
+                      index=pd.to_datetime(bars[:, 0].astype("int64"), unit="s"))
+    r = df.resample(f"{step}s", origin="epoch", label="left", closed="left").agg(
+        {"open": "first", "close": "last", "high": "max", "low": "min", "volume": "sum"}).dropna()
+    t = r.index.values.astype("datetime64[s]").astype("int64").astype(np.float64)
+    out = np.column_stack([t, r[["open", "close", "high", "low", "volume"]].to_numpy()])
+    return out[1:] if len(out) and bars[0, 0] > out[0, 0] else out
+
+def diff(a: np.ndarray, b: np.ndarray, rtol: float = 1e-9) -> int:
+    # rows of a and b with equal open times whose OHLCV differ
+    common, ia, ib = np.intersect1d(a[:, 0], b[:, 0], return_indices=True)
+    if not len(common):
+        return 0
+    return int((~np.isclose(a[ia], b[ib], rtol=rtol, atol=0).all(axis=1)).sum())
+
+def load(path: str) -> np.ndarray:
+    with open(path, "r", encoding="utf-8") as f:
+        return ohlcv_array(json.load(f)["data"])
+
+def recorded(a):
+    base_tag = TF_MAP[a.base]
+    files = sorted(glob.glob(os.path.join(a.fixtures, "candles", f"*_{base_tag}.json")))
+    tot = {tf: [0, 0, 0] for tf in DERIVED}  # compared, mismatched closed bars, forming mismatches
+    for fn in files:
+        sym = os.path.basename(fn)[:-len(f"_{base_tag}.json")]
+        base = load(fn)
+        for tf in DERIVED:
+            p = os.path.join(a.fixtures, "candles", f"{sym}_{TF_MAP[tf]}.json")
+            if not os.path.exists(p) or TF_SECONDS[tf] <= TF_SECONDS[a.base]:
+                continue
+            ref = load(p); got = resample_bars(base, TF_SECONDS[tf])
+            if not len(ref) or not len(got):
+                continue
+            closed = got[got[:, 0] < ref[-1, 0]]
+            tot[tf][0] += len(np.intersect1d(closed[:, 0], ref[:, 0]))
+            tot[tf][1] += diff(closed, ref)
+            tot[tf][2] += int(got[-1, 0] == ref[-1, 0] and diff(got[-1:], ref[-1:]) > 0)
+    print(f"{len(files)} symbols, base {a.base}")
+    for tf, (n, bad, forming) in tot.items():
+        print(f"  {tf:>4}: {n} closed bars compared, {bad} mismatched, forming bar differs for {forming} symbols")
+    return 1 if any(v[1] for v in tot.values()) else 0
+
+class FakeExchange:
+    # serves every timeframe as pandas aggregates of the base bars opened up to `now`
+    def __init__(self, base: np.ndarray, base_tf: str):
+        self.base = base; self.base_tf = base_tf; self.now = 0; self.requests = {}
+
+    def visible(self, tf: str) -> np.ndarray:
+        bars = self.base[self.base[:, 0] <= self.now]
+        return bars if tf == self.base_tf else pandas_resample(bars, TF_SECONDS[tf])
+
+    async def fetch_candles(self, symbol, tf, limit=300, start_at=None, end_at=None):
+        self.requests[tf] = self.requests.get(tf, 0) + 1
+        bars = self.visible(tf)
+        if start_at is not None:
+            bars = bars[bars[:, 0] >= start_at]
+        if end_at is not None:
+            bars = bars[bars[:, 0] < end_at]
+        return [[str(int(r[0]))] + [repr(float(x)) for x in r[1:]] for r in bars[-limit:]]
+
+def replay(a):
+    base_tag = TF_MAP[a.base]
+    files = sorted(glob.glob(os.path.join(a.fixtures, "candles", f"*_{base_tag}.json")))[:a.symbols]
+    bad = steps = 0
+    fetched = {}; t0 = time.perf_counter()
+    for fn in files:
+        base = load(fn)
+        ex = FakeExchange(base, a.base)
+        store = CandleStore(ex, maxlen=a.window, base_tf=a.base, base_fresh_sec=0)
+        start = max(0, len(base) - a.steps)
+
+        async def walk():
+            nonlocal bad, steps
+            for k in range(start, len(base)):
+                ex.now = base[k, 0]
+                for tf in (a.base,) + DERIVED:
+                    got = await store.update("X", tf)
+                    ref = ex.visible(tf)[-a.window:]
+                    if len(got) != len(ref) or diff(got, ref) or not np.array_equal(got[:, 0], ref[:, 0]):
+                        bad += 1
+                        if bad <= 5:
+                            print(f"  mismatch {os.path.basename(fn)} tf={tf} t={int(ex.now)}")
+                steps += 1
+        # the store paces itself on wall-clock time; pin it to the replayed clock
+        real = time.time
+        time.time = lambda: float(ex.now)
+        try:
+            asyncio.run(walk())
+        finally:
+            time.time = real
+        for tf, n in ex.requests.items():
+            fetched[tf] = fetched.get(tf, 0) + n
+    print(f"{len(files)} symbols x {steps // max(1, len(files))} base bars: {bad} mismatched windows, "
+          f"{time.perf_counter() - t0:.1f}s")
+    print(f"  requests per timeframe: {fetched}")
+    return 1 if bad else 0
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("recorded", "replay"):
+        p = sub.add_parser(name)
+        p.add_argument("--fixtures", default=os.path.join(BENCH_DIR, "fixtures"))
+        p.add_argument("--base", default="5m", choices=[tf for tf in TF_MAP if tf not in DERIVED])
+        if name == "replay":
+            p.add_argument("--steps", type=int, default=600, help="base bars replayed per symbol")
+            p.add_argument("--symbols", type=int, default=5)
+            p.add_argument("--window", type=int, default=300)
+    a = ap.parse_args()
+    sys.exit(recorded(a) if a.cmd == "recorded" else replay(a))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Local stand-in for the KuCoin public WebSocket feed.
+#   record: python bench/ws_replay.py record --symbols BTC-USDT,ETH-USDT --seconds 120 --out frames.jsonl
+#   replay: python bench/ws_replay.py replay --frames frames.jsonl [--speed 10]
+# `replay` serves the recorded frames on localhost and drives a KucoinStream
+# against it, printing the stream counters and dirty-symbol events.
+import argparse, asyncio, json, os, sys, time, uuid
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import numpy as np
+import websockets
+from kucoin_client import KucoinClient, TF_MAP
+from candle_store import CandleStore
+from kucoin_ws import KucoinStream, TF_FROM_TAG
+
+async def record(symbols, seconds: float, out: str, tfs=("5m", "15m", "1h")):
+    ku = KucoinClient()
+    tok = await ku.fetch_ws_token()
+    srv = tok["instanceServers"][0]
+    url = f"{srv['endpoint']}?token={tok['token']}&connectId={uuid.uuid4().hex}"
+    t0 = time.monotonic(); n = 0
+    async with websockets.connect(url, ping_interval=None) as ws, open(out, "w", encoding="utf-8") as f:
+        await ws.recv()
+        topics = ["/market/candles:" + ",".join(f"{s}_{TF_MAP[tf]}" for s in symbols) for tf in tfs]
+        topics.append("/market/ticker:" + ",".join(symbols))
+        for topic in topics:
+            await ws.send(json.dumps({"id": uuid.uuid4().hex, "type": "subscribe", "topic": topic, "response": True}))
+        last_ping = time.monotonic()
+        while time.monotonic() - t0 < seconds:
+            if time.monotonic() - last_ping > 15:
+                await ws.send(json.dumps({"id": str(int(time.time()*1000)), "type": "ping"}))
+                last_ping = time.monotonic()
+            try:
+                raw = await asyncio.wait_for(ws.recv(), 5)
+            except asyncio.TimeoutError:
+                continue
+            msg = json.loads(raw)
+            if msg.get("type") == "message":
+                f.write(json.dumps({"t": round(time.monotonic() - t0, 3), "msg": msg}) + "\n"); n += 1
+    await ku.close()
+    print(f"recorded {n} frames to {out}")
+
+def load_frames(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+async def serve(frames, host: str = "127.0.0.1", port: int = 0, speed: float = 1.0, drop_after: int = 0):
+    # welcome -> ack every subscribe -> pong every ping -> replay frames;
+    # drop_after > 0 closes the socket after that many frames to exercise reconnects
+    async def handler(ws):
+        await ws.send(json.dumps({"id": uuid.uuid4().hex, "type": "welcome"}))
+        async def reader():
+            async for raw in ws:
+                m = json.loads(raw)
+                if m.get("type") == "ping":
+                    await ws.send(json.dumps({"id": m.get("id"), "type": "pong"}))
+                elif m.get("type") == "subscribe":
+                    await ws.send(json.dumps({"id": m.get("id"), "type": "ack"}))
+        rt = asyncio.create_task(reader())
+        try:
+            last = 0.0
+            for i, fr in enumerate(frames):
+                if drop_after and i and i % drop_after == 0:
+                    await ws.close()
+                    return
+                await asyncio.sleep(max(0.0, (fr["t"] - last) / speed)); last = fr["t"]
+                await ws.send(json.dumps(fr["msg"]))
+            await ws.wait_closed()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            rt.cancel()
+    return await websockets.serve(handler, host, port)
+
+async def replay(path: str, speed: float, drop_after: int, seconds: float):
+    frames = load_frames(path)
+    server = await serve(frames, speed=speed, drop_after=drop_after)
+    port = server.sockets[0].getsockname()[1]
+
+    async def token():
+        return {"token": "local", "instanceServers": [{"endpoint": f"ws://127.0.0.1:{port}", "pingInterval": 5000, "pingTimeout": 5000}]}
+
+    store = CandleStore(KucoinClient())
+    symbols, tfs = set(), set()
+    for fr in frames:
+        m = fr["msg"]
+        if m.get("topic", "").startswith("/market/candles:"):
+            sym = m["data"]["symbol"]; tf = TF_FROM_TAG[m["topic"].rsplit("_", 1)[-1]]
+            symbols.add(sym); tfs.add(tf)
+            if store.get(sym, tf) is None:
+                store.merge(sym, tf, np.array([m["data"]["candles"][:6]], dtype=np.float64))
+    tfs = sorted(tfs) or ["5m"]
+    stream = KucoinStream(store.ku, store, tfs, "5m" if "5m" in tfs else tfs[0], token_provider=token)
+    stream._backfill = lambda syms: asyncio.sleep(0)
+    stream.set_symbols(sorted(symbols))
+    t0 = time.monotonic(); events = 0; closes = 0
+    while time.monotonic() - t0 < seconds:
+        ev = await stream.next_events(timeout=1.0)
+        events += len(ev); closes += sum(1 for c in ev.values() if c)
+    await stream.close()
+    server.close(); await server.wait_closed()
+    print(json.dumps({"frames": len(frames), "events": events, "closes": closes, "stream": stream.stats}, indent=2))
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("record"); r.add_argument("--symbols", required=True); r.add_argument("--seconds", type=float, default=120); r.add_argument("--out", required=True)
+    p = sub.add_parser("replay"); p.add_argument("--frames", required=True); p.add_argument("--speed", type=float, default=10.0)
+    p.add_argument("--drop-after", type=int, default=0); p.add_argument("--seconds", type=float, default=10.0)
+    a = ap.parse_args()
+    if a.cmd == "record":
+        asyncio.run(record(a.symbols.split(","), a.seconds, a.out))
+    else:
+        asyncio.run(replay(a.frames, a.speed, a.drop_after, a.seconds))
+
+if __name__ == "__main__":
+    main()
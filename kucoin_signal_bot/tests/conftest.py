@@ -0,0 +1,29 @@
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import numpy as np
+
+def walk(n: int, step: int = 300, seed: int = 0, t0: int = 1_700_000_200) -> np.ndarray:
+    # random-walk bars in ohlcv_array layout: time, open, close, high, low, volume
+    rng = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.004 * np.sqrt(step / 300), n)))
+    o = np.concatenate([[100.0], c[:-1]])
+    h = np.maximum(o, c) * (1 + np.abs(rng.normal(0, 0.001, n)))
+    l = np.minimum(o, c) * (1 - np.abs(rng.normal(0, 0.001, n)))
+    v = np.abs(rng.normal(1000, 400, n)) * np.where(rng.random(n) < 0.05, 4, 1)
+    return np.column_stack([t0 // step * step + step * np.arange(n), o, c, h, l, v]).astype(np.float64)
+
+def assert_same(ref, got):
+    # rules results: floats to the last ulps, RVOL reason by its label
+    assert ref.keys() == got.keys()
+    for k in ref:
+        x, y = ref[k], got[k]
+        if isinstance(x, list) and x and isinstance(x[0], float):
+            np.testing.assert_allclose(x, y, rtol=1e-12, atol=0)
+        elif isinstance(x, float):
+            # rolling().mean() and ndarray.mean() may differ in the last ulp
+            assert np.isclose(x, y, rtol=1e-12, atol=0), k
+        elif k == "reasons":
+            # the RVOL reason carries a 2-decimal rendering of rvol15m
+            assert [r.split(" ")[0] for r in x] == [r.split(" ")[0] for r in y]
+        else:
+            assert x == y, k
@@ -0,0 +1,102 @@
+import asyncio, time
+import httpx
+import numpy as np
+from conftest import walk
+from kucoin_client import KucoinClient
+from candle_store import CandleStore
+
+def klines(bars):
+    # KuCoin payload rows: time, open, close, high, low, volume, turnover
+    return [[str(int(r[0]))] + [repr(float(x)) for x in r[1:]] + ["0"] for r in bars]
+
+class Exchange:
+    # fetch_candles stand-in serving `bars` up to `now`, recording each call
+    def __init__(self, bars):
+        self.bars = bars; self.now = bars[-1, 0]; self.calls = []
+    async def fetch_candles(self, symbol, tf, limit=300, start_at=None, end_at=None):
+        self.calls.append((start_at, end_at))
+        b = self.bars[self.bars[:, 0] <= self.now]
+        if start_at is not None:
+            b = b[b[:, 0] >= start_at]
+        if end_at is not None:
+            b = b[b[:, 0] < end_at]
+        return klines(b[-limit:])
+
+def test_merge_dedups_overlapping_bar_and_replaces_forming():
+    b = walk(10)
+    s = CandleStore(None, maxlen=50)
+    s.merge("X", "5m", b[:6])
+    forming = b[5:8].copy(); forming[0, 2] += 1; forming[0, 3] += 1
+    got = s.merge("X", "5m", forming)
+    assert len(got) == 8
+    np.testing.assert_array_equal(got[:, 0], b[:8, 0])
+    np.testing.assert_array_equal(got[5], forming[0])
+    np.testing.assert_array_equal(got[:5], b[:5])
+    # an empty response leaves the window alone
+    assert s.merge("X", "5m", b[:0]) is got
+
+def test_merge_trims_to_maxlen():
+    b = walk(30)
+    s = CandleStore(None, maxlen=12)
+    s.merge("X", "5m", b[:10])
+    got = s.merge("X", "5m", b[9:30])
+    np.testing.assert_array_equal(got, b[-12:])
+
+def test_incremental_fetch_starts_at_last_stored_bar(monkeypatch):
+    b = walk(150)
+    ex = Exchange(b); ex.now = b[59, 0]
+    s = CandleStore(ex, maxlen=40)
+    monkeypatch.setattr(time, "time", lambda: float(ex.now) + 10)
+    async def run():
+        got = await s.update("X", "5m")
+        np.testing.assert_array_equal(got, b[20:60])
+        ex.now = b[62, 0]
+        got = await s.update("X", "5m")
+        np.testing.assert_array_equal(got, b[23:63])
+        # a window too stale to bridge is backfilled from scratch
+        ex.now = b[149, 0]
+        got = await s.update("X", "5m")
+        np.testing.assert_array_equal(got, b[110:150])
+    asyncio.run(run())
+    assert ex.calls[0] == (None, None)
+    assert ex.calls[1] == (int(b[59, 0]), int(b[62, 0]) + 10 + 300)
+    assert ex.calls[2] == (None, None)
+    assert s.stats["backfills"] == 2 and s.stats["incremental"] == 1
+
+def test_fetch_candles_keeps_newest_limit_bars():
+    b = walk(8)
+    def handler(req):
+        return httpx.Response(200, json={"data": klines(b[::-1])})
+    async def run():
+        ku = KucoinClient()
+        ku._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await ku.fetch_candles("X", "5m", limit=3)
+        finally:
+            await ku.close()
+    assert [int(r[0]) for r in asyncio.run(run())] == [int(t) for t in b[-3:, 0]]
+
+def test_flush_reload_mmap_roundtrip(tmp_path):
+    b = walk(80)
+    s = CandleStore(None, maxlen=50, path=str(tmp_path))
+    s.merge("BTC-USDT", "5m", b[:60]); s.merge("BTC-USDT", "1h", b[:10]); s.merge("ETH-USDT", "5m", b[:30])
+    asyncio.run(s.flush())
+    assert s.stats["flushed"] == 3 and not s._dirty
+    asyncio.run(s.flush())  # nothing dirty: nothing written
+    assert s.stats["flushed"] == 3
+    r = CandleStore(None, maxlen=40, path=str(tmp_path))
+    assert r.load() == 3
+    got = r.get("BTC-USDT", "5m")
+    assert isinstance(got, np.memmap)
+    np.testing.assert_array_equal(got, b[20:60])
+    np.testing.assert_array_equal(r.get("BTC-USDT", "1h"), b[:10])
+    # new bars land on the mapped window; the flush replaces the file atomically
+    r.merge("BTC-USDT", "5m", b[59:70])
+    asyncio.run(r.flush())
+    r2 = CandleStore(None, maxlen=40, path=str(tmp_path)); r2.load()
+    np.testing.assert_array_equal(r2.get("BTC-USDT", "5m"), b[30:70])
+    assert not list(tmp_path.glob("*.tmp"))
+    # symbols that left the universe lose their windows and files
+    r2.retain(["BTC-USDT"])
+    assert r2.get("ETH-USDT", "5m") is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["BTC-USDT__1h.npy", "BTC-USDT__5m.npy"]
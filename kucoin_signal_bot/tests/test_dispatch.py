@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+import main
+from notifier import TelegramNotifier
+from profiles import build_profiles
+
+RES = {"ok": True, "entry": 100.0, "sl": 99.0, "confirms": 4, "reasons": ["a", "b", "c", "d"]}
+CFG = {"exits": {"tp_levels_pct": [0.006, 0.012, 0.02]}}
+
+@pytest.fixture
+def sent(monkeypatch):
+    out = []
+    monkeypatch.setattr(TelegramNotifier, "enqueue", lambda self, text: out.append(self.chat_id) or True)
+    monkeypatch.setattr(main, "save_cooldowns", lambda delay=1.0: None)
+    for k in ("last_signal_ts", "last_confirms"):
+        monkeypatch.setitem(main.STATE, k, {})
+    monkeypatch.setitem(main.STATE, "profiles", {})
+    return out
+
+def dispatch(profile, opts):
+    tg = main.notifier_for(opts)
+    return asyncio.run(main.dispatch_signal("BTC-USDT", dict(RES), tg, None, CFG, opts, profile))
+
+def test_profile_named_default_uses_its_own_chats(sent):
+    opts = {"telegram_token": "t0k", "telegram_chat_id": "100",
+            "profiles": [{"name": "default", "chat_ids": ["201", "202"]}]}
+    assert dispatch(build_profiles(opts)[0], opts) == "signal"
+    assert sent == ["201", "202"]
+
+def test_profiles_without_chat_ids_go_to_the_base_chat(sent):
+    opts = {"telegram_token": "t0k", "telegram_chat_id": "100", "profiles": [{"name": "fast"}]}
+    assert dispatch(build_profiles(opts)[0], opts) == "signal"
+    assert dispatch(None, {**opts, "profiles": []}) == "signal"
+    assert sent == ["100", "100"]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from features import ohlcv_array, ohlcv_df, OHLCV_COLS
+
+def ohlcv_df_rowwise(klines):
+    # the row-by-row DataFrame parser ohlcv_array replaced (times in seconds)
+    rows = []
+    for k in klines:
+        rows.append({"time": pd.to_datetime(int(float(k[0])), unit="s"),
+                     "open": float(k[1]), "close": float(k[2]), "high": float(k[3]), "low": float(k[4]),
+                     "volume": float(k[5])})
+    return pd.DataFrame(rows).sort_values("time").reset_index(drop=True)
+
+def payload(n=200, seed=0):
+    # KuCoin kline rows: strings, newest first, turnover as a 7th column;
+    # a few awkward renderings and a shuffled block
+    rng = np.random.default_rng(seed)
+    t = 1_700_000_100 + 300 * np.arange(n)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    rows = [[str(t[i]), f"{c[i] * 0.999:.8f}", repr(float(c[i])), f"{c[i] * 1.002:.6g}", f"{c[i] * 0.997:.4e}",
+             f"{rng.uniform(0, 5000):.3f}", "123.4"] for i in range(n)]
+    rows[3][5] = "0"; rows[4][1] = "1e2"
+    rows = rows[::-1]
+    rows[10:40] = [rows[i] for i in rng.permutation(range(10, 40))]
+    return rows
+
+def test_ohlcv_array_matches_rowwise_parser():
+    kl = payload()
+    ref = ohlcv_df_rowwise(kl)
+    arr = ohlcv_array(kl)
+    assert arr.dtype == np.float64 and arr.shape == (len(kl), len(OHLCV_COLS))
+    assert (np.diff(arr[:, 0]) > 0).all()
+    np.testing.assert_array_equal(arr[:, 0].astype("int64").astype("datetime64[s]"), ref["time"].to_numpy())
+    np.testing.assert_array_equal(arr[:, 1:], ref[["open", "close", "high", "low", "volume"]].to_numpy())
+    df = ohlcv_df(kl)
+    for col in ("time", "open", "high", "low", "close", "volume"):
+        np.testing.assert_array_equal(df[col].to_numpy(), ref[col].to_numpy())
+
+def test_ohlcv_array_ragged_and_empty():
+    kl = payload(50)
+    kl[5] = kl[5][:6]  # a row without the turnover column
+    np.testing.assert_array_equal(ohlcv_array(kl)[:, 1:], ohlcv_df_rowwise(kl)[["open", "close", "high", "low", "volume"]].to_numpy())
+    assert ohlcv_array([]).shape == (0, len(OHLCV_COLS))
+    assert ohlcv_df([]).empty
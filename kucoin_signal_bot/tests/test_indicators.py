@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from conftest import walk
+from features import bars_df, add_indicators
+from indicators import IndicatorEngine, IndicatorState, indicator_params
+
+OPTS = [{}, {"macd_fast": 8, "macd_slow": 21, "macd_signal": 5, "rsi_length": 10, "ema_fast": 9}]
+
+def assert_batch(cols, bars, opts):
+    # same values (and NaN / 0 warm-up rows) as add_indicators over `bars`
+    ref = add_indicators(bars_df(bars), opts)
+    k = len(cols["close"])
+    for name in ref.columns:
+        if name == "time":
+            continue
+        y = ref[name].to_numpy(dtype=np.float64)[-k:]
+        # MACD is a difference of two close EMAs: compare on the price scale
+        atol = 1e-9 * bars[:, 2].max() if name.startswith("macd") else 0.0
+        np.testing.assert_allclose(cols[name], y, rtol=1e-9, atol=atol, err_msg=name)
+
+@pytest.mark.parametrize("opts", OPTS)
+def test_cold_state_matches_batch(opts):
+    b = walk(300)
+    assert_batch(IndicatorState(indicator_params(opts), b, 300).columns(300), b, opts)
+
+@pytest.mark.parametrize("opts", OPTS)
+def test_warm_engine_matches_batch_over_window(opts):
+    # the engine slides a 300-bar window far past its cold start (and past
+    # several compactions); every read equals the batch over that window
+    b = walk(2000, seed=1)
+    eng = IndicatorEngine(300)
+    for end in range(300, len(b) + 1, 97):
+        win = b[end - 300:end]
+        assert_batch(eng.tail("X", "5m", win, opts, 300), win, opts)
+    assert eng.stats["cold_starts"] == 1
+
+def test_forming_bar_revision_matches_batch():
+    b = walk(700, seed=2)
+    eng = IndicatorEngine(300)
+    eng.tail("X", "5m", b[100:400], {}, 5)
+    for px in (1.01, 0.98):
+        win = b[101:401].copy()
+        win[-1, 2] *= px; win[-1, 3] = max(win[-1, 3], win[-1, 2]); win[-1, 4] = min(win[-1, 4], win[-1, 2])
+        assert_batch(eng.tail("X", "5m", win, {}, 5), win, {})
+    assert eng.stats["cold_starts"] == 1
+
+def test_anchored_matches_batch_for_any_window():
+    # backtest/optimize read one state over the whole history at per-bar starts
+    b = walk(1200, seed=3)
+    st = IndicatorState(indicator_params({}), b, len(b))
+    for i, m in ((50, 300), (299, 300), (750, 300), (1199, 40), (900, 15)):
+        s = max(0, i - m + 1)
+        assert_batch(st.columns(m, None, end=i + 1), b[s:i + 1], {})
+
+def test_flat_window_rsi_and_atr():
+    # no down moves / no range inside the window: exact 100 RSI and 0 ATR,
+    # not rounding noise from the carried history
+    b = walk(600, seed=4)
+    flat = b[-60:].copy()
+    flat[:, 1:5] = flat[0, 2]
+    b = np.concatenate([b[:-60], flat])
+    st = IndicatorState(indicator_params({}), b, len(b))
+    cols = st.columns(30)
+    assert (cols["rsi"][13:] == 100).all()
+    assert (cols["atr"][14:] == 0).all()
+    assert_batch(cols, b[-30:], {})
+
+def test_engine_retain_drops_states_of_removed_symbols():
+    eng = IndicatorEngine(maxlen=120)
+    for sym in ("A-USDT", "B-USDT"):
+        for tf, step in (("5m", 300), ("1h", 3600)):
+            eng.tail(sym, tf, walk(120, step), {}, 3)
+    eng.tail("A-USDT", "5m", walk(120), {"rsi_length": 10}, 3)
+    assert len(eng) == 5
+    eng.retain(["A-USDT"])
+    assert len(eng) == 3 and all(k[0] == "A-USDT" for k in eng._states)
+    eng.evict(indicator_params({"rsi_length": 10}))
+    assert len(eng) == 2
@@ -0,0 +1,138 @@
+import asyncio, sqlite3
+import pytest
+from conftest import walk
+from backtest import simulate_trade
+from journal import SignalJournal
+
+OPTS = {"taker_fee_bps": 10, "journal_max_hold_bars": 40}
+STEP = 300
+
+class Store:
+    # CandleStore.get stand-in: bars visible up to a moving `upto` row
+    def __init__(self):
+        self.bars = {}
+        self.upto = None
+    def get(self, symbol, tf):
+        b = self.bars.get(symbol)
+        return b if b is None or self.upto is None else b[:self.upto]
+
+def signal(b, i):
+    e = float(b[i, 2])
+    return {"entry": e, "sl": e * 0.99, "reasons": ["x"]}, [e * 1.004, e * 1.008, e * 1.012]
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_track_matches_simulate_trade(tmp_path):
+    async def go():
+        j = SignalJournal(batch_sec=0.01); j.open(str(tmp_path / "s.db"))
+        st = Store(); exp = {}
+        for k in range(30):
+            b = walk(200, STEP, k); sym = f"S{k}-USDT"; st.bars[sym] = b
+            res, tps = signal(b, 20)
+            # sent just after bar 20 closed
+            sid = j.record(sym, "fast" if k % 2 else "default", res, 4, tps, 6, ts=b[20, 0] + STEP + 1)
+            exp[sid] = simulate_trade(b, 20, res["entry"], res["sl"], tps, OPTS, 6, 40)
+        b0 = st.bars["S0-USDT"]
+        # successive scans, a few bars at a time
+        for n in range(22, 200, 7):
+            st.upto = n
+            j.track(st, "5m", STEP, OPTS, now=b0[n - 1, 0] + STEP)
+        await j.flush()
+        assert j.stats["open"] == 0
+        items = (await j.query(limit=500))["items"]
+        assert len(items) == 30
+        for it in items:
+            x = exp[it["id"]]
+            assert it["status"] == x["outcome"]
+            assert it["tp_hits"] == x["hits"]
+            assert it["bars_held"] == x["bars_held"]
+            assert abs(it["ret"] - x["ret"]) < 1e-12
+        stats = await j.outcome_stats()
+        for prof in ("default", "fast"):
+            mine = [exp[it["id"]] for it in items if it["profile"] == prof]
+            s = stats[prof]
+            assert s["signals"] == s["closed"] == len(mine) and s["open"] == 0
+            for outcome in ("tp", "sl", "timeout"):
+                assert s[outcome] == sum(x["outcome"] == outcome for x in mine)
+            assert s["tp1"] == sum(x["hits"][0] for x in mine)
+            assert abs(s["ret_sum"] - sum(x["ret"] for x in mine)) < 1e-9
+        await j.close()
+    run(go())
+
+def test_reopen_resumes_partially_tracked_signal(tmp_path):
+    async def go():
+        path = str(tmp_path / "p.db")
+        b = walk(200, STEP, 3); st = Store(); st.bars["S-USDT"] = b
+        e = float(b[20, 2]); tps = [e * 1.004, e * 1.008, e * 1.5]
+        j = SignalJournal(batch_sec=0.01); j.open(path)
+        j.record("S-USDT", "default", {"entry": e, "sl": e * 0.9, "reasons": []}, 3, tps, 6, ts=b[20, 0] + STEP + 1)
+        j.track(st, "5m", STEP, OPTS, now=b[30, 0])
+        await j.close()
+        j = SignalJournal(batch_sec=0.01); j.open(path)
+        assert j.stats["open"] == 1
+        j.track(st, "5m", STEP, OPTS, now=b[-1, 0] + STEP)
+        await j.flush()
+        it = (await j.query())["items"][0]
+        x = simulate_trade(b, 20, e, e * 0.9, tps, OPTS, 6, 40)
+        assert (it["status"], it["tp_hits"], it["bars_held"]) == (x["outcome"], x["hits"], x["bars_held"])
+        assert abs(it["ret"] - x["ret"]) < 1e-12
+        await j.close()
+    run(go())
+
+def test_signal_without_bars_times_out_by_wall_clock(tmp_path):
+    async def go():
+        j = SignalJournal(batch_sec=0.01); j.open(str(tmp_path / "t.db"))
+        e = 100.0
+        ts = 1_700_000_000.0
+        j.record("GONE-USDT", "default", {"entry": e, "sl": 99.0, "reasons": []}, 3, [101.0, 102.0, 103.0], 6, ts=ts)
+        # the symbol left the universe: its windows were evicted from the store
+        assert j.track(Store(), "5m", STEP, OPTS, now=ts + 40 * STEP) == 0
+        assert j.track(Store(), "5m", STEP, OPTS, now=ts + 41 * STEP) == 1
+        await j.flush()
+        it = (await j.query())["items"][0]
+        assert it["status"] == "timeout" and it["tp_hits"] == [False, False, False]
+        half = 6 / 20000.0
+        assert abs(it["ret"] - ((1 - half) / (1 + half) - 1 - 2 * 0.001)) < 1e-12
+        assert (await j.outcome_stats())["default"]["timeout"] == 1
+        await j.close()
+    run(go())
+
+def test_unknown_status_is_rejected(tmp_path):
+    async def go():
+        j = SignalJournal(batch_sec=0.01); j.open(str(tmp_path / "q.db"))
+        with pytest.raises(ValueError):
+            await j.query(status="tp1")
+        assert (await j.query(status="sl"))["items"] == []
+        await j.close()
+    run(go())
+
+def test_failed_batch_is_retried_and_only_bad_rows_are_lost(tmp_path, monkeypatch):
+    async def go():
+        j = SignalJournal(batch_sec=0.01); j.open(str(tmp_path / "r.db"))
+        apply = j._apply; fails = {"left": 1}
+        def flaky(batch):
+            # one transient failure, and row 2 never goes in
+            if fails["left"]:
+                fails["left"] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            if any(r["id"] == 2 for _, r in batch):
+                raise sqlite3.IntegrityError("bad row")
+            apply(batch)
+        monkeypatch.setattr(j, "_apply", flaky)
+        for k in range(3):
+            j.record(f"S{k}-USDT", "default", {"entry": 100.0, "sl": 99.0, "reasons": []}, 3, [101.0, 102.0, 103.0], 6,
+                     ts=1_700_000_000.0 + k)
+        await j.flush()
+        assert [it["id"] for it in (await j.query())["items"]] == [3, 1]
+        assert j.stats["lost"] == 1 and j.stats["written"] == 2 and j.stats["errors"] == 3
+        await j.close()
+    run(go())
+
+def test_api_rejects_unknown_status():
+    from fastapi.testclient import TestClient
+    import main
+    c = TestClient(main.app)
+    r = c.get("/api/signals", params={"status": "won"})
+    assert r.status_code == 400 and not r.json()["ok"]
+    assert c.get("/api/signals", params={"status": "open"}).status_code == 200
@@ -0,0 +1,81 @@
+import asyncio, time
+import httpx
+from kucoin_client import KucoinClient, TokenBucket, KU_WEIGHTS
+
+CANDLES = "/api/v1/market/candles"
+
+def client(handler, bucket=None) -> KucoinClient:
+    ku = KucoinClient()
+    ku._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    if bucket is not None:
+        ku.bucket = bucket
+    return ku
+
+def test_bucket_burst_then_refill():
+    async def run():
+        b = TokenBucket(5, 50)
+        t = time.monotonic()
+        for _ in range(5):
+            await b.acquire()
+        burst = time.monotonic() - t
+        await b.acquire(5)  # empty: waits ~5 / 50 s for the refill
+        return burst, time.monotonic() - t
+    burst, total = asyncio.run(run())
+    assert burst < 0.05
+    assert 0.09 <= total < 0.5
+
+def test_429_retry_after_backs_off_then_succeeds():
+    calls = []
+    def handler(req):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.6"})
+        return httpx.Response(200, json={"data": [["1700000100", "1", "2", "3", "0.5", "10", "20"]]})
+    async def run():
+        ku = client(handler)
+        try:
+            return ku, await ku.fetch_candles("BTC-USDT", "5m")
+        finally:
+            await ku.close()
+    ku, rows = asyncio.run(run())
+    assert rows == [["1700000100", "1", "2", "3", "0.5", "10", "20"]]
+    assert len(calls) == 2 and calls[1] - calls[0] >= 0.6
+    assert ku.stats["throttled"] == 1 and ku.stats["requests"] == 2 and ku.stats["errors"] == 0
+
+def test_429_reset_header_is_milliseconds():
+    calls = []
+    def handler(req):
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            return httpx.Response(429, headers={"gw-ratelimit-reset": "500"})
+        return httpx.Response(200, json={"data": {"price": "1"}})
+    async def run():
+        ku = client(handler)
+        try:
+            return await ku.fetch_level1("BTC-USDT")
+        finally:
+            await ku.close()
+    assert asyncio.run(run()) == {"price": "1"}
+    assert len(calls) == 3 and 1.0 <= calls[2] - calls[0] < 2.0
+
+def test_concurrent_callers_stay_under_rate():
+    # 60 candle requests (weight 3) against a 30-unit bucket refilling 300/s:
+    # at any moment the weight sent is within the burst plus what refilled
+    cap, rate, cost = 30.0, 300.0, KU_WEIGHTS[CANDLES]
+    sent = []
+    def handler(req):
+        sent.append(time.monotonic())
+        return httpx.Response(200, json={"data": []})
+    async def run():
+        ku = client(handler, TokenBucket(cap, rate))
+        t0 = time.monotonic()
+        try:
+            await asyncio.gather(*(ku.fetch_candles(f"S{i}-USDT", "5m") for i in range(60)))
+        finally:
+            await ku.close()
+        return t0
+    t0 = asyncio.run(run())
+    assert len(sent) == 60
+    for k, t in enumerate(sorted(sent)):
+        assert (k + 1) * cost <= cap + rate * (t - t0) + 1e-6
+    assert sorted(sent)[-1] - t0 >= (60 * cost - cap) / rate
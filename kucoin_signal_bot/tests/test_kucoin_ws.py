@@ -0,0 +1,32 @@
+import numpy as np
+from candle_store import CandleStore
+from kucoin_ws import KucoinStream
+
+# frames as KuCoin pushes them for a multi-symbol subscription
+TICKER = {"type": "message", "topic": "/market/ticker:ETH-USDT", "subject": "trade.ticker",
+          "data": {"sequence": "1545896668986", "price": "2301.5", "size": "0.011", "bestAsk": "2301.6",
+                   "bestAskSize": "0.18", "bestBid": "2301.4", "bestBidSize": "0.036", "Time": 1704873323416}}
+
+def stream():
+    return KucoinStream(None, CandleStore(None), ["5m"], "5m", token_provider=lambda: None)
+
+def test_ticker_push_keyed_by_topic_symbol():
+    s = stream()
+    s.handle(TICKER)
+    assert set(s.spreads.quotes) == {"ETH-USDT"}
+    assert s.spreads.get("ETH-USDT", 60) == (2301.4, 2301.6)
+    assert s.stats["tickers"] == 1
+
+def test_ticker_push_without_quotes_is_ignored():
+    s = stream()
+    s.handle({**TICKER, "data": {"price": "2301.5"}})
+    assert not s.spreads.quotes
+
+def test_candle_push_marks_closed_bar():
+    s = stream()
+    s.store.merge("ETH-USDT", "5m", np.array([[1704873000.0, 1, 1, 1, 1, 1]]))
+    s.handle({"type": "message", "topic": "/market/candles:ETH-USDT_5min", "subject": "trade.candles.update",
+              "data": {"symbol": "ETH-USDT", "candles": ["1704873300", "1", "2", "2", "1", "10", "20"],
+                       "time": 1704873323416000000}})
+    assert s.stats["candles"] == 1
+    assert s._dirty == {"ETH-USDT": True}
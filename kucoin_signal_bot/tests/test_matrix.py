@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from conftest import walk, assert_same
+from indicators import IndicatorEngine, indicator_params
+from rules import should_signal_np, bias_ok_np, tail_rows
+from matrix import Panel, bias_1h_mat, bias_15m_mat, screen_mat, signal_at
+
+CFG = {"trigger": {"confirmations_needed": 1}, "exits": {"tp_levels_pct": [0.006, 0.012, 0.02]}}
+OPTION_SETS = [
+    {},
+    {"bias_rsi_min": 30, "ema200_5m_min_distance_pct": 0.0, "macd_fast": 8, "macd_slow": 21, "rsi_length": 10},
+    {"bias_rsi_min": 30, "breakout_lookback_bars": 40},
+]
+W = 300
+
+def bars(n, step, seed):
+    # a third of the bars close at their high, so the breakout confirmation
+    # (close >= the lookback's highest high) actually fires
+    b = walk(n, step, seed)
+    top = np.random.default_rng(seed).random(n) < 0.35
+    b[top, 2] = b[top, 3]
+    return b
+
+def live(eng, wins, opts):
+    # the per-symbol path as scan_symbol runs it: warm engine tails + should_signal_np
+    k5, k15, k1h = tail_rows(opts)
+    out = {}
+    for sym, (b5, b15, b1h) in wins.items():
+        t5 = eng.tail(sym, "5m", b5, opts, k5); t15 = eng.tail(sym, "15m", b15, opts, k15)
+        t1h = eng.tail(sym, "1h", b1h, opts, k1h)
+        out[sym] = should_signal_np(t1h, t15, t5, CFG, opts, bias=True) if bias_ok_np(t1h, t15, opts) else None
+    return out
+
+def screen(wins, opts):
+    # matrix_scan's stages on the same windows
+    params = indicator_params(opts)
+    k5, k15, _ = tail_rows(opts)
+    syms = list(wins)
+    p1h = Panel({s: wins[s][2] for s in syms})
+    leg = bias_1h_mat(p1h.columns(params, 1), opts)
+    alive = [s for s, g in zip(p1h.symbols, leg) if g]
+    p15 = Panel({s: wins[s][1] for s in alive})
+    c15 = p15.columns(params, k15)
+    ok15 = bias_15m_mat(c15)
+    keep = [s for s in alive if leg[p1h.index[s]] == 1 or ok15[p15.index[s]]]
+    out = {s: None for s in syms}
+    p5 = Panel({s: wins[s][0] for s in keep})
+    c5 = p5.columns(params, k5)
+    stage, count, conf = screen_mat(p15.take(c15, p15.rows(keep)), c5, CFG, opts)
+    for i, s in enumerate(keep):
+        out[s] = signal_at(i, c5, count, conf, CFG) if not stage[i] else \
+                 {"ok": False, "stage": str(stage[i]), "count": int(count[i])}
+    return out
+
+@pytest.mark.parametrize("opts", OPTION_SETS)
+def test_matrix_matches_live_path(opts):
+    # windows slide past the engines' cold start, so the per-symbol side is
+    # the warm incremental state the running bot reads
+    cycles = 40
+    hist = {f"S{i}-USDT": (bars(W + cycles, 300, i), walk(W + cycles, 900, 100 + i), walk(W + cycles, 3600, 200 + i))
+            for i in range(30)}
+    eng = IndicatorEngine(maxlen=W)
+    signals = breakouts = 0
+    for c in range(0, cycles, 3):
+        wins = {s: (b5[c:c + W], b15[c:c + W], b1h[c:c + W]) for s, (b5, b15, b1h) in hist.items()}
+        ref, got = live(eng, wins, opts), screen(wins, opts)
+        for s in wins:
+            r, g = ref[s], got[s]
+            if r is None or g is None:
+                assert r is g is None, s
+            elif r.get("ok") or g.get("ok"):
+                assert_same(r, g)
+                signals += 1; breakouts += "Local high breakout" in r["reasons"]
+            else:
+                assert r["why"] == ("anti-noise failed" if g["stage"] == "anti_noise" else f"only {g['count']} confirmations")
+    assert eng.stats["incremental"] > eng.stats["cold_starts"]
+    assert signals and breakouts
@@ -0,0 +1,32 @@
+import asyncio
+import httpx
+import metrics
+from kucoin_client import KucoinClient
+
+def test_label_values_are_escaped():
+    metrics.inc("swallowed_exceptions_total", stage='we"ird\\sym\nbol')
+    line = [l for l in metrics.render().splitlines() if l.startswith("swallowed_exceptions_total{")
+            and "ird" in l][0]
+    assert line == 'swallowed_exceptions_total{stage="we\\"ird\\\\sym\\nbol"} 1'
+
+def test_request_seconds_excludes_backoff():
+    path = "/api/v1/market/allTickers"
+    calls = []
+    def handler(req):
+        calls.append(1)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.6"})
+        return httpx.Response(200, json={"data": {"ticker": []}})
+    async def run():
+        ku = KucoinClient()
+        ku._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            await ku.fetch_all_tickers()
+        finally:
+            await ku.close()
+    before = metrics._hists["kucoin_request_seconds"].get((("endpoint", path),))
+    n0, s0 = (before.n, before.sum) if before else (0, 0.0)
+    asyncio.run(run())
+    h = metrics._hists["kucoin_request_seconds"][(("endpoint", path),)]
+    # one observation per round-trip; the 0.6 s Retry-After wait is not in them
+    assert h.n - n0 == 2 and h.sum - s0 < 0.3
@@ -0,0 +1,15 @@
+import main
+from notifier import get_notifier
+
+def test_command_lookup_keeps_configured_batch_window():
+    opts = {"telegram_token": "t0k", "telegram_chat_id": "42", "telegram_batch_sec": 4}
+    tg = main.notifier_for(opts)
+    assert tg.batch_sec == 4.0
+    # commands_loop, /api/ping and /api/set_min look the notifier up without a window
+    assert get_notifier(opts["telegram_token"], opts["telegram_chat_id"]) is tg
+    assert tg.batch_sec == 4.0
+    main.notifier_for({**opts, "telegram_batch_sec": 2.5})
+    assert tg.batch_sec == 2.5
+
+def test_new_notifier_defaults_to_one_second_window():
+    assert get_notifier("t0k", "43").batch_sec == 1.0
@@ -0,0 +1,70 @@
+import asyncio, json, os
+from options_store import OptionsStore, write_json_atomic
+
+def write(path, data, bump=0):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+    if bump:
+        # some filesystems keep coarse mtimes: move it explicitly
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 10**9))
+
+def store(tmp_path):
+    addon, user = str(tmp_path / "options.json"), str(tmp_path / "user_config.json")
+    write(addon, {"min_confirms": 3, "top_n_by_volume": 120})
+    return OptionsStore(addon, user), addon, user
+
+def test_reload_on_mtime_change_notifies_listeners(tmp_path):
+    s, addon, user = store(tmp_path)
+    seen = []
+    s.on_change(lambda old, new: seen.append((old, new)))
+    assert s.load() == {"min_confirms": 3, "top_n_by_volume": 120} and s.version == 1
+    first = s.get()
+    async def run():
+        assert not await s.refresh()  # nothing moved
+        write(user, {"min_confirms": 4}, bump=1)
+        assert await s.refresh()
+        write(addon, {"min_confirms": 3, "top_n_by_volume": 50}, bump=2)
+        assert await s.refresh()
+    asyncio.run(run())
+    # the user file wins over the add-on options; old snapshots are never mutated
+    assert s.get() == {"min_confirms": 4, "top_n_by_volume": 50} and s.version == 3
+    assert first == {"min_confirms": 3, "top_n_by_volume": 120}
+    assert [new for _, new in seen[1:]] == [{"min_confirms": 4, "top_n_by_volume": 120}, s.get()]
+
+def test_invalid_json_keeps_last_good_view(tmp_path):
+    s, addon, user = store(tmp_path)
+    s.load()
+    async def run():
+        write(addon, '{"min_confirms": 5, "top_n', bump=1)
+        assert not await s.refresh()
+        assert s.get() == {"min_confirms": 3, "top_n_by_volume": 120} and s.stats["errors"] == 1
+        # retried on the next tick, once the writer has finished
+        write(addon, {"min_confirms": 5}, bump=1)
+        assert await s.refresh()
+    asyncio.run(run())
+    assert s.get() == {"min_confirms": 5}
+
+def test_persist_writes_atomically_and_publishes(tmp_path):
+    s, addon, user = store(tmp_path)
+    s.load()
+    async def run():
+        return await s.persist({"min_confirms": 5})
+    opts, addon_view = asyncio.run(run())
+    assert opts == s.get() == {"min_confirms": 5, "top_n_by_volume": 120}
+    assert addon_view == {"min_confirms": 5, "top_n_by_volume": 120}
+    with open(user, encoding="utf-8") as f:
+        assert json.load(f) == {"min_confirms": 5}
+    assert not os.path.exists(user + ".tmp")
+    # our own write is not seen as an external change
+    assert not asyncio.run(s.refresh()) and s.stats["persists"] == 1
+
+def test_write_json_atomic_leaves_old_file_on_failure(tmp_path):
+    p = str(tmp_path / "x.json")
+    write_json_atomic(p, {"a": 1})
+    try:
+        write_json_atomic(p, {"a": object()})
+    except TypeError:
+        pass
+    with open(p, encoding="utf-8") as f:
+        assert json.load(f) == {"a": 1}
@@ -0,0 +1,74 @@
+import asyncio, time
+import pytest
+import main
+from conftest import walk
+from indicators import IndicatorEngine
+
+CFG = {"timeframes": {"bias_tf": "1h", "setup_tf": "15m", "trigger_tf": "5m"},
+       "trigger": {"confirmations_needed": 1}, "exits": {"tp_levels_pct": [0.006, 0.012, 0.02]}}
+# RSI never reaches 101: the 1h leg always defers to the 15m EMA200 check
+OPTS = {"bias_rsi_min": 101, "staged_scan": True, "numpy_rules": True}
+NOW = 1_700_006_400 + 300  # 5 minutes into a 15m (and 1h) bar
+
+class Store:
+    # CandleStore stand-in that records which windows were refetched
+    def __init__(self):
+        end = NOW // 3600 * 3600
+        self.bars = {tf: walk(300, step, seed, t0=(NOW // step * step) - 299 * step)
+                     for seed, (tf, step) in enumerate((("5m", 300), ("15m", 900), ("1h", 3600)))}
+        assert self.bars["1h"][-1, 0] == end
+        self.stored = dict(self.bars)
+        self.updates = []
+    def get(self, symbol, tf):
+        return self.stored.get(tf)
+    async def update(self, symbol, tf):
+        self.updates.append(tf)
+        self.stored[tf] = self.bars[tf]
+        return self.bars[tf]
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setitem(main.STATE, "bias", {})
+    monkeypatch.setattr(time, "time", lambda: float(NOW))
+    legs = []
+    real = main.bias_1h_np
+    monkeypatch.setattr(main, "bias_1h_np", lambda t1h, opts: legs.append(1) or real(t1h, opts))
+    return Store(), IndicatorEngine(maxlen=300), legs
+
+def scan(store, ind, ticker, rolled=None, opts=OPTS):
+    ticker = {"volValue": "900000000", **ticker}
+    return asyncio.run(main.scan_symbol("BTC-USDT", None, None, store, ind, CFG, opts, rolled=rolled, ticker=ticker))
+
+def test_failing_15m_leg_rejects_without_trigger_fetch(env):
+    store, ind, legs = env
+    # the 1h bar did not roll: no 1h request; the forming 15m bar is in the
+    # store, so the ticker's last price decides the leg without a 15m request
+    assert scan(store, ind, {"last": "0.001"}, rolled={"1h": False}) == "bias_15m"
+    assert store.updates == []
+    assert legs == [1]
+    # same 1h last row: the cached leg is reused
+    assert scan(store, ind, {"last": "0.001"}, rolled={"1h": False}) == "bias_15m"
+    assert legs == [1] and store.updates == []
+
+def test_1h_leg_cache_follows_the_last_row(env):
+    store, ind, legs = env
+    scan(store, ind, {"last": "0.001"}, rolled={"1h": False})
+    b = store.bars["1h"].copy(); b[-1, 2] *= 1.001  # forming 1h bar moved
+    store.stored["1h"] = b
+    scan(store, ind, {"last": "0.001"}, rolled={"1h": False})
+    assert legs == [1, 1]
+
+def test_stale_15m_bar_is_refetched_and_passing_leg_reaches_trigger(env):
+    store, ind, legs = env
+    # forming bar not stored yet; the exchange has it, closing far above EMA200
+    store.stored["15m"] = store.bars["15m"][:-1]
+    store.bars["15m"][-1, [2, 3]] *= 2
+    stage = scan(store, ind, {"last": "1e9"}, rolled={"1h": False})
+    assert store.updates[0] == "15m"
+    assert "5m" in store.updates and stage not in ("bias_15m", "bias_1h", "ticker")
+
+def test_ticker_prefilter_rejects_first(env):
+    store, ind, legs = env
+    stage = scan(store, ind, {"changeRate": "0.002", "last": "1e9"}, rolled={"1h": True},
+                 opts={**OPTS, "prefilter_min_change_pct": 1.0})
+    assert stage == "ticker" and store.updates == [] and legs == []
@@ -0,0 +1,28 @@
+from profiles import build_profiles
+
+RANKED = ["BTC-USDT", "ETH-USDT", "SOL-USDC", "XRP-USDT", "DOGE-USDT"]
+TICKERS = {"BTC-USDT": {"volValue": "900000000"}, "ETH-USDT": {"volValue": "500000000"},
+           "SOL-USDC": {"volValue": "80000000"}, "XRP-USDT": {"volValue": "40000000"},
+           "DOGE-USDT": {"volValue": "6000000"}}
+
+def profiles(**base):
+    return {p.name: p for p in build_profiles({"symbols_quote": "USDT", "top_n_by_volume": 120,
+                                                "min_vol_24h_usd": 5000000, **base})}
+
+def test_base_volume_floor_applies_without_override():
+    p = profiles(min_vol_24h_usd=10000000)["default"]
+    assert p.accepts("XRP-USDT", TICKERS["XRP-USDT"])
+    assert not p.accepts("DOGE-USDT", TICKERS["DOGE-USDT"])
+    assert not p.accepts("SOL-USDC", TICKERS["SOL-USDC"])
+
+def test_scope_applies_own_top_n_and_floor():
+    ps = profiles(profiles=[{"name": "wide"}, {"name": "top2", "top_n_by_volume": 2},
+                            {"name": "big", "min_vol_24h_usd": 100000000}, {"name": "usdc", "symbols_quote": "USDC"}])
+    for p in ps.values():
+        p.scope(RANKED, TICKERS)
+    assert ps["wide"].members == {"BTC-USDT", "ETH-USDT", "XRP-USDT", "DOGE-USDT"}
+    assert ps["top2"].members == {"BTC-USDT", "ETH-USDT"}
+    assert ps["big"].members == {"BTC-USDT", "ETH-USDT"}
+    assert ps["usdc"].members == {"SOL-USDC"}
+    # stream mode evaluates without a ticker: membership still narrows
+    assert ps["top2"].accepts("ETH-USDT") and not ps["top2"].accepts("XRP-USDT")
@@ -0,0 +1,58 @@
+import asyncio, os, sys, time
+import numpy as np
+import pytest
+from conftest import walk
+from features import resample_bars
+from candle_store import CandleStore
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+from parity_resample import FakeExchange, pandas_resample
+
+def base_bars(n, seed, gaps=False):
+    # 5m walk starting mid-hour (partial first 15m / 1h buckets); with gaps,
+    # runs of missing bars like a halted or illiquid market
+    b = walk(n, 300, seed, t0=1_700_000_400)
+    if gaps:
+        keep = np.ones(n, bool)
+        for s in np.random.default_rng(seed).choice(n - 20, 6, replace=False):
+            keep[s:s + 1 + s % 13] = False
+        b = b[keep]
+    return b
+
+@pytest.mark.parametrize("gaps", [False, True])
+@pytest.mark.parametrize("step", [900, 3600])
+def test_resample_bars_matches_pandas(step, gaps):
+    b = base_bars(500, 3, gaps)
+    assert b[0, 0] % step  # first bucket is partial
+    for end in (len(b), len(b) - 1, len(b) - 2):  # forming last bucket at several fill levels
+        got, ref = resample_bars(b[:end], step), pandas_resample(b[:end], step)
+        np.testing.assert_array_equal(got[:, 0], ref[:, 0])
+        np.testing.assert_allclose(got, ref, rtol=1e-12, atol=0)
+        assert got[0, 0] >= b[0, 0]
+
+def test_keep_head_keeps_partial_first_bucket():
+    b = base_bars(40, 1)
+    got = resample_bars(b, 3600, keep_head=True)
+    assert got[0, 0] < b[0, 0] and got[0, 1] == b[0, 1]
+    np.testing.assert_array_equal(got[1:], resample_bars(b, 3600))
+
+@pytest.mark.parametrize("gaps", [False, True])
+def test_store_derived_windows_match_pandas(gaps, monkeypatch):
+    # replay the base series bar by bar; every derived window, forming bar
+    # included, must equal pandas over the bars visible so far
+    base = base_bars(700, 5, gaps)
+    ex = FakeExchange(base, "5m")
+    store = CandleStore(ex, maxlen=120, base_tf="5m", base_fresh_sec=0)
+    monkeypatch.setattr(time, "time", lambda: float(ex.now))
+
+    async def run():
+        for k in range(len(base) - 300, len(base)):
+            ex.now = base[k, 0]
+            for tf in ("5m", "15m", "1h"):
+                got = await store.update("X", tf)
+                ref = ex.visible(tf)[-120:]
+                np.testing.assert_array_equal(got[:, 0], ref[:, 0])
+                np.testing.assert_allclose(got, ref, rtol=1e-12, atol=0)
+    asyncio.run(run())
+    # derived timeframes were fetched once to seed, then built locally
+    assert ex.requests["15m"] == ex.requests["1h"] == 1
+    assert store.stats["derived"] > 0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from conftest import walk, assert_same
+from features import bars_df, add_indicators
+from indicators import IndicatorEngine
+from rules import should_signal, should_signal_np, tail_rows, frame_tail
+
+CFG = {"trigger": {"confirmations_needed": 1}, "exits": {"tp_levels_pct": [0.006, 0.012, 0.02]}}
+# bias legs, MACD modes and a low confirmation bar so SL/TP is exercised
+OPTION_SETS = [
+    {},
+    {"macd_cross_up_allowed": False, "macd_hist_rising_bars_min": 1, "rvol15m_min": 1.1},
+    {"bias_allow_price_above_ema200_15m": False, "bias_need_ema_order": False, "breakout_lookback_bars": 4},
+    {"bias_rsi_min": 30, "ema200_5m_min_distance_pct": 0.0, "breakout_body_max_atr_mult": 0.8},
+    {"bias_rsi_min": 30, "breakout_lookback_bars": 40},
+]
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("opts", OPTION_SETS)
+def test_should_signal_np_matches_pandas(opts, seed):
+    b5, b15, b1h = walk(1200, 300, seed), walk(400, 900, seed + 100), walk(100, 3600, seed + 200)
+    k5, k15, k1h = tail_rows(opts)
+    d5, d15, d1h = (add_indicators(bars_df(b), opts) for b in (b5, b15, b1h))
+    c5, c15, c1h = (frame_tail(d, len(d)) for d in (d5, d15, d1h))
+    for i in range(len(d5) - 300, len(d5)):
+        a, b = (i + 1) // 3, (i + 1) // 12      # bars of the coarser frames closed with 5m bar i
+        ref = should_signal(d1h.iloc[:b], d15.iloc[:a], d5.iloc[:i + 1], CFG, opts)
+        got = should_signal_np({c: x[max(0, b - k1h):b] for c, x in c1h.items()},
+                               {c: x[max(0, a - k15):a] for c, x in c15.items()},
+                               {c: x[max(0, i + 1 - k5):i + 1] for c, x in c5.items()}, CFG, opts)
+        assert_same(ref, got)
+
+def test_engine_tail_matches_frame():
+    b5 = walk(600, 300, 3)
+    eng = IndicatorEngine(maxlen=300)
+    k = tail_rows({})[0]
+    for j in range(300, 500):
+        bars = b5[j - 300:j]
+        ref = frame_tail(eng.frame("X", "5m", bars, {}), k)
+        tail = eng.tail("X", "5m", bars, {}, k)
+        for c, x in ref.items():
+            np.testing.assert_array_equal(x, tail[c], err_msg=c)
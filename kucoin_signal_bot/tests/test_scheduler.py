@@ -0,0 +1,38 @@
+import asyncio
+import scheduler
+from scheduler import BarClock
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+    def time(self) -> float:
+        return self.now
+    async def sleep(self, sec: float):
+        self.now += sec
+
+def wake(monkeypatch, clock: BarClock, at: float, fake: FakeClock):
+    fake.now = at
+    monkeypatch.setattr(scheduler.time, "time", fake.time)
+    monkeypatch.setattr(scheduler.asyncio, "sleep", fake.sleep)
+    return asyncio.run(clock.wait())
+
+def test_rolls_on_aligned_boundaries(monkeypatch):
+    fake = FakeClock(0)
+    clock = BarClock("5m", ["5m", "15m", "1h"], grace_sec=0)
+    t0 = 1_700_000_000 // 3600 * 3600
+    assert wake(monkeypatch, clock, t0 - 10, fake) == {"5m": True, "15m": True, "1h": True}
+    assert wake(monkeypatch, clock, t0 + 1, fake) == {"5m": True, "15m": False, "1h": False}
+    assert wake(monkeypatch, clock, t0 + 301, fake) == {"5m": True, "15m": False, "1h": False}
+    assert wake(monkeypatch, clock, t0 + 601, fake) == {"5m": True, "15m": True, "1h": False}
+    assert clock.stats["skipped"] == 0
+
+def test_missed_boundary_still_rolls(monkeypatch):
+    # the cycle after t0+300 overran past t0+900: the 15m close at t0+900 was
+    # never woken for, but the next wake-up must still report 15m as rolled
+    fake = FakeClock(0)
+    clock = BarClock("5m", ["5m", "15m", "1h"], grace_sec=0)
+    t0 = 1_700_000_000 // 3600 * 3600
+    wake(monkeypatch, clock, t0 + 299, fake)
+    assert wake(monkeypatch, clock, t0 + 950, fake) == {"5m": True, "15m": True, "1h": False}
+    assert clock.stats["skipped"] == 2
+    assert wake(monkeypatch, clock, t0 + 1201, fake) == {"5m": True, "15m": False, "1h": False}
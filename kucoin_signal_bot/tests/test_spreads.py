@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from spreads import SpreadBook
+
+class Clock:
+    def __init__(self, t=1_700_000_000.0):
+        self.t = t
+    def __call__(self):
+        return self.t
+
+class Level1:
+    # fetch_level1 stand-in
+    def __init__(self, bid="2", ask="2.5", fail=False):
+        self.bid, self.ask, self.fail, self.calls = bid, ask, fail, 0
+    async def fetch_level1(self, symbol):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("level1 down")
+        return {"bestBid": self.bid, "bestAsk": self.ask}
+
+def test_fresh_snapshot_then_stale_falls_back_to_level1():
+    clock = Clock(); book = SpreadBook(clock=clock); ku = Level1()
+    book.ingest([{"symbol": "BTC-USDT", "buy": "1", "sell": "1.5"}, {"symbol": "BAD-USDT", "buy": "", "sell": "1"}])
+    assert "BAD-USDT" not in book.quotes
+    spread = lambda sym: asyncio.run(book.spread_bps(sym, ku, max_age=30))
+    assert spread("BTC-USDT") == 5000 and ku.calls == 0
+    clock.t += 30  # the cutoff itself still counts as fresh
+    assert spread("BTC-USDT") == 5000 and ku.calls == 0
+    clock.t += 0.5
+    assert spread("BTC-USDT") == 2500 and ku.calls == 1
+    # the level-1 answer refreshed the entry at the current time
+    assert book.quotes["BTC-USDT"] == (2.0, 2.5, clock.t)
+    clock.t += 10
+    assert spread("BTC-USDT") == 2500 and ku.calls == 1
+    assert book.stats == {"hits": 3, "stale": 1, "level1": 1}
+
+def test_missing_quote_uses_level1_and_errors_propagate():
+    book = SpreadBook(clock=Clock())
+    assert asyncio.run(book.spread_bps("ETH-USDT", Level1(), 30)) == 2500
+    assert asyncio.run(book.spread_bps("XRP-USDT", Level1(bid="0", ask="1"), 30)) is None
+    assert "XRP-USDT" not in book.quotes
+    with pytest.raises(RuntimeError):
+        asyncio.run(book.spread_bps("SOL-USDT", Level1(fail=True), 30))
@@ -0,0 +1,55 @@
+import asyncio
+import universe
+from universe import UniverseManager
+from spreads import SpreadBook
+
+class Clock:
+    # stands in for the time module inside universe.py
+    def __init__(self):
+        self.t = 1000.0
+    def monotonic(self):
+        return self.t
+    def time(self):
+        return self.t
+
+class Exchange:
+    def __init__(self, vols):
+        self.vols = vols; self.fetches = 0
+    async def fetch_all_tickers(self):
+        self.fetches += 1
+        return {"data": {"ticker": [{"symbol": s, "volValue": str(v), "buy": "1.0", "sell": "1.001"}
+                                    for s, v in self.vols.items()]}}
+
+def test_rank_ttl_and_change_events(monkeypatch):
+    clock = Clock(); monkeypatch.setattr(universe, "time", clock)
+    ex = Exchange({"BTC-USDT": 9e8, "ETH-USDT": 5e8, "SOL-USDC": 8e8, "XRP-USDT": 4e7, "DOGE-USDT": 6e6,
+                   "PEPE-USDT": 1e6})
+    book = SpreadBook()
+    u = UniverseManager(ex, "USDT", top_n=3, min_vol24=5e6, ttl=300, spreads=book)
+    events = []
+    u.on_change(lambda added, removed: events.append((added, removed)))
+    u.on_change(lambda added, removed: 1 / 0)  # a failing listener does not stop the others
+
+    async def run():
+        assert await u.refresh() == (["BTC-USDT", "ETH-USDT", "XRP-USDT"], [])
+        assert u.symbols == ["BTC-USDT", "ETH-USDT", "XRP-USDT"]
+        assert set(u.tickers) == set(u.symbols) == set(book.quotes)
+        # inside the ttl: no request, no re-rank
+        ex.vols["DOGE-USDT"] = 7e8
+        clock.t += 299
+        assert await u.refresh() == ([], [])
+        assert ex.fetches == 1
+        # fresher prices on demand, membership unchanged
+        assert await u.refresh(max_age=60) == ([], [])
+        assert ex.fetches == 2 and u.symbols == ["BTC-USDT", "ETH-USDT", "XRP-USDT"]
+        clock.t += 1  # ttl reached
+        assert await u.refresh() == (["DOGE-USDT"], ["XRP-USDT"])
+        assert u.symbols == ["BTC-USDT", "DOGE-USDT", "ETH-USDT"]
+        assert "XRP-USDT" not in book.quotes
+        # changed filters re-rank on the next refresh regardless of the ttl
+        u.configure("USDT,USDC", 3, 5e6)
+        assert await u.refresh() == (["SOL-USDC"], ["ETH-USDT"])
+    asyncio.run(run())
+    assert events == [(["BTC-USDT", "ETH-USDT", "XRP-USDT"], []), (["DOGE-USDT"], ["XRP-USDT"]),
+                      (["SOL-USDC"], ["ETH-USDT"])]
+    assert u.stats["reranks"] == 3 and u.stats["added"] == 5 and u.stats["removed"] == 2